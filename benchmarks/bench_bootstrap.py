@@ -0,0 +1,38 @@
+# benchmarks/bench_bootstrap.py
+#
+# Bootstrap confidence interval time versus log size and resample count,
+# for rounded (cent) pnl, which takes the multinomial-count path, and for
+# continuous pnl, which resamples full index arrays.
+# Usage: python -m benchmarks.bench_bootstrap [--trades 100000 1000000] [--resamples 10000] [--workers 1]
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.bootstrap import CI_METRICS, bootstrap_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bootstrap confidence intervals.")
+    parser.add_argument("--trades", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--resamples", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--continuous", action="store_true", help="unrounded pnl (index-array path)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'trades':>11} {'metric':>14} {'resamples':>10} {'seconds':>8}")
+    for n in args.trades:
+        pnl = rng.normal(0.01, 1.0, n)
+        if not args.continuous:
+            pnl = pnl.round(2)
+        for metrics in (CI_METRICS[:3], CI_METRICS[3:]):
+            start = time.perf_counter()
+            result = bootstrap_metrics(pnl, args.resamples, metrics, seed=0, workers=args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>11,} {'/'.join(metrics):>14.14} {len(result[metrics[0]]):>10,} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
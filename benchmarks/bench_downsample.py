@@ -0,0 +1,63 @@
+# benchmarks/bench_downsample.py
+#
+# Chart payload size and serialization time for the equity + drawdown series,
+# full vs downsampled. Streamlit ships chart data to the browser as Arrow IPC,
+# so the Arrow stream size is the websocket payload (JSON is used without pyarrow).
+# Usage: python -m benchmarks.bench_downsample [--sizes 100000 1000000] [--points 2000]
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.downsample import downsample_equity
+
+
+def serialize(frame):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return frame.to_json(date_format="iso").encode("utf-8")
+    table = pa.Table.from_pandas(frame.reset_index())
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def chart_payload(equity, drawdown):
+    start = time.perf_counter()
+    size = len(serialize(equity.to_frame("cumulative_pnl"))) + len(serialize(drawdown.to_frame("drawdown")))
+    return size, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chart downsampling.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--method", choices=["minmax", "lttb"], default="minmax")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'full KB':>10} {'full ms':>9} {'down KB':>9} {'down ms':>9} {'points':>7}")
+    for n in args.sizes:
+        index = pd.date_range("2020-01-01", periods=n, freq="min")
+        equity = pd.Series(np.cumsum(rng.normal(0.01, 1.0, n)), index=index)
+        drawdown = equity.cummax() - equity
+
+        full_size, full_time = chart_payload(equity, drawdown)
+
+        start = time.perf_counter()
+        eq_small, dd_small = downsample_equity(equity, args.points, args.method)
+        down_size, ser_time = chart_payload(eq_small, dd_small)
+        down_time = time.perf_counter() - start
+
+        assert dd_small.max() == drawdown.max()
+        print(f"{n:>10,} {full_size / 1024:>10.0f} {full_time * 1e3:>9.1f} "
+              f"{down_size / 1024:>9.0f} {down_time * 1e3:>9.1f} {len(eq_small):>7}")
+
+
+if __name__ == "__main__":
+    main()
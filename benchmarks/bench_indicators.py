@@ -0,0 +1,89 @@
+# benchmarks/bench_indicators.py
+#
+# Per-tick throughput of the incremental indicators against what the
+# strategies did before: sum() over a deque (TSLA) and a pandas rolling mean
+# over the whole history to read its last value (AAPL / Mag7 / SMA200).
+# Usage: python -m benchmarks.bench_indicators [--ticks 200000] [--window 200]
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import EMA, SMA, Crossover, RollingStd
+
+
+def per_tick(update, prices):
+    start = time.perf_counter()
+    for price in prices:
+        update(price)
+    return time.perf_counter() - start
+
+
+def deque_sma(window):
+    prices = deque(maxlen=window)
+
+    def update(price):
+        prices.append(price)
+        if len(prices) == window:
+            return sum(prices) / window
+    return update
+
+
+def pandas_sma(window, history):
+    # Rebuilding the Series per tick is what historicalDataEnd did per run
+    def update(price):
+        history.append(price)
+        return pd.Series(history).rolling(window).mean().iloc[-1]
+    return update
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental indicators.")
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--window", type=int, default=200)
+    parser.add_argument("--pandas-ticks", type=int, default=200,
+                        help="ticks for the (slow) pandas rolling baseline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    prices = 100 + np.cumsum(rng.normal(0, 0.1, args.ticks))
+    tick_list = prices.tolist()
+    w = args.window
+
+    sma = SMA(w)
+    ema = EMA(w)
+    std = RollingStd(w)
+    cross = Crossover()
+
+    def combined(price):
+        cross.update(price, sma.update(price))
+        ema.update(price)
+        std.update(price)
+
+    history = tick_list[:-args.pandas_ticks]
+    cases = [
+        ("SMA (ring buffer)", SMA(w).update, tick_list),
+        ("EMA", EMA(w).update, tick_list),
+        ("RollingStd", RollingStd(w).update, tick_list),
+        ("deque sum() SMA", deque_sma(w), tick_list),
+        ("pandas rolling().mean()", pandas_sma(w, history), tick_list[-args.pandas_ticks:]),
+    ]
+
+    print(f"{'indicator':<26} {'ticks':>9} {'ticks/s':>12} {'us/tick':>9}")
+    for name, update, data in cases:
+        elapsed = per_tick(update, data)
+        print(f"{name:<26} {len(data):>9,} {len(data) / elapsed:>12,.0f} {elapsed / len(data) * 1e6:>9.2f}")
+
+    elapsed = per_tick(combined, tick_list)
+    print(f"{'SMA+EMA+Std+Crossover':<26} {len(tick_list):>9,} {len(tick_list) / elapsed:>12,.0f} "
+          f"{elapsed / len(tick_list) * 1e6:>9.2f}")
+
+    expected = pd.Series(prices).rolling(w).mean().iloc[-1]
+    assert abs(sma.value - expected) < 1e-9 * abs(expected)
+
+
+if __name__ == "__main__":
+    main()
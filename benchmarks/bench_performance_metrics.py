@@ -0,0 +1,161 @@
+# benchmarks/bench_performance_metrics.py
+#
+# Compares the NumPy metrics kernel against the previous pandas implementation.
+# Usage: python -m benchmarks.bench_performance_metrics [--sizes 10000 1000000 10000000]
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.performance_metrics import calculate_metrics
+
+
+# Previous pandas implementation and its defaults, copied verbatim for comparison
+
+def legacy_calculate_metrics(df):
+    """
+    Calculates comprehensive performance metrics for a trading strategy.
+
+    Expected columns in df:
+        - 'pnl': float, profit or loss per trade
+        - 'timestamp': datetime, when the trade closed
+
+    Optional columns (if present):
+        - 'duration': time in seconds
+        - 'position_size': trade volume
+        - 'entry_price', 'exit_price'
+
+    Returns:
+        dict: A dictionary with multiple performance metrics
+    """
+
+    # Ensure pnl exists and is numeric
+    if 'pnl' not in df.columns or df.empty:
+        return legacy_default_metrics()
+
+    df['pnl'] = pd.to_numeric(df['pnl'], errors='coerce')
+    pnl = df['pnl'].dropna()
+
+    if len(pnl) < 2:
+        return {
+            'sharpe': 0,
+            'sortino': 0,
+            'win_rate': (pnl > 0).mean() * 100 if len(pnl) > 0 else 0,
+            'wins': int((pnl > 0).sum()),
+            'losses': int((pnl < 0).sum()),
+            'closed_pl': pnl.sum(),
+            'avg_win': pnl[pnl > 0].mean() if any(pnl > 0) else 0,
+            'avg_loss': pnl[pnl < 0].mean() if any(pnl < 0) else 0,
+            'profit_factor': 0,
+            'max_drawdown': 0,
+            'avg_trade_duration': df['duration'].dropna().mean() if 'duration' in df.columns else 0,
+        }
+
+    # Debug print (optional)
+    # print("📊 Metrics Debug:\n", df.head(), "\nPNL dtype:", df["pnl"].dtype)
+
+    if pnl.empty or len(pnl) < 2 or pnl.sum() == 0:
+        return legacy_default_metrics(n=len(pnl))
+
+    returns = pnl
+    cumulative = returns.cumsum()
+    peak = cumulative.cummax()
+    drawdown = peak - cumulative
+    max_drawdown = drawdown.max()
+
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl <= 0]
+
+    win_count = len(wins)
+    loss_count = len(losses)
+
+    avg_win = wins.mean() if win_count else 0.0
+    avg_loss = losses.mean() if loss_count else 0.0
+
+    win_rate = (win_count / len(pnl)) * 100 if len(pnl) > 0 else 0.0
+    profit_factor = abs(wins.sum() / losses.sum()) if losses.sum() != 0 else np.inf
+
+    sharpe = 0.0
+    sortino = 0.0
+    if pnl.std() > 0:
+        sharpe = pnl.mean() / (pnl.std() + 1e-9) * np.sqrt(252)
+    if pnl[pnl < 0].std() > 0:
+        sortino = pnl.mean() / (pnl[pnl < 0].std() + 1e-9) * np.sqrt(252)
+
+    # Duration
+    avg_duration = 0.0
+    if 'duration' in df.columns and not df['duration'].dropna().empty:
+        avg_duration = round(df['duration'].dropna().mean(), 2)
+
+    return {
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'wins': win_count,
+        'losses': loss_count,
+        'win_rate': win_rate,
+        'closed_pl': pnl.sum(),
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': profit_factor,
+        'max_drawdown': max_drawdown,
+        'avg_trade_duration': avg_duration,
+        'total_pnl': pnl.sum(),
+        'number_of_trades': len(pnl)
+    }
+
+def legacy_default_metrics(n=0):
+    return {
+        'sharpe': 0.0,
+        'sortino': 0.0,
+        'wins': 0,
+        'losses': 0,
+        'win_rate': 0.0,
+        'closed_pl': 0.0,
+        'avg_win': 0.0,
+        'avg_loss': 0.0,
+        'profit_factor': 0.0,
+        'max_drawdown': 0.0,
+        'avg_trade_duration': 0.0,
+        'total_pnl': 0.0,
+        'number_of_trades': 0
+    }
+
+
+def make_trades(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2020-01-01", periods=n, freq="min"),
+        "pnl": rng.normal(0.05, 1.0, n).round(2),
+        "duration": rng.exponential(300.0, n),
+    })
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calculate_metrics against the pandas implementation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'legacy (ms)':>12} {'numpy (ms)':>12} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_trades(n)
+        legacy_time, expected = best_of(legacy_calculate_metrics, df, args.repeat)
+        new_time, actual = best_of(calculate_metrics, df, args.repeat)
+        # Logs under two trades also report total_pnl/number_of_trades now; compare the legacy keys
+        assert {k: actual[k] for k in expected} == expected, f"metrics differ at {n} rows"
+        print(f"{n:>12,} {legacy_time * 1e3:>12.1f} {new_time * 1e3:>12.1f} {legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
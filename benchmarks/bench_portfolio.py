@@ -0,0 +1,65 @@
+# benchmarks/bench_portfolio.py
+#
+# Portfolio aggregation time versus number of strategies and combined trades,
+# compared with a pandas baseline: per-strategy resample, concat, corr and
+# calculate_metrics over the concatenated, sorted trades.
+# Usage: python -m benchmarks.bench_portfolio [--strategies 10 50] [--trades 1000000]
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.performance_metrics import calculate_metrics
+from utils.portfolio import build_portfolio
+
+
+def make_frames(strategies, trades, rng):
+    per = trades // strategies
+    span = 10 * 365 * 86400
+    frames = {}
+    for i in range(strategies):
+        seconds = np.sort(rng.integers(0, span, per))
+        frames[f"strategy_{i}"] = pd.DataFrame({
+            "timestamp": pd.Timestamp("2015-01-01") + pd.to_timedelta(seconds, unit="s"),
+            "pnl": rng.normal(0.01, 1.0, per),
+        })
+    return frames
+
+
+def legacy_portfolio(frames):
+    daily = pd.concat({name: df.set_index("timestamp")["pnl"].resample("D").sum() for name, df in frames.items()},
+                      axis=1, sort=True).fillna(0.0)
+    merged = pd.concat(frames.values()).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    equity = merged["pnl"].cumsum()
+    return equity, daily.cumsum(), daily.corr(), calculate_metrics(merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portfolio aggregation.")
+    parser.add_argument("--strategies", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--trades", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'strategies':>10} {'trades':>11} {'portfolio ms':>13} {'pandas ms':>10} {'speedup':>8}")
+    for k in args.strategies:
+        for n in args.trades:
+            frames = make_frames(k, n, rng)
+
+            start = time.perf_counter()
+            portfolio = build_portfolio(frames)
+            fast = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, _, corr, metrics = legacy_portfolio(frames)
+            slow = time.perf_counter() - start
+
+            assert np.allclose(portfolio["correlation"].to_numpy(), corr.to_numpy(), equal_nan=True)
+            assert np.isclose(portfolio["metrics"]["sharpe"], metrics["sharpe"])
+            print(f"{k:>10} {n:>11,} {fast * 1e3:>13.1f} {slow * 1e3:>10.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
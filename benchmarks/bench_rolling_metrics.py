@@ -0,0 +1,59 @@
+# benchmarks/bench_rolling_metrics.py
+#
+# Rolling metrics time versus log size, full series and chart-sized
+# (--points) evaluation, against a baseline that calls metrics_from_arrays
+# on every window of the first --baseline-trades trades.
+# Usage: python -m benchmarks.bench_rolling_metrics [--trades 1000000 5000000] [--window 1000]
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.performance_metrics import metrics_from_arrays
+from utils.rolling_metrics import rolling_metrics
+
+
+def make_log(n, rng):
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2015-01-01") + pd.to_timedelta(np.arange(n) * 60, unit="s"),
+        "pnl": rng.normal(0.01, 1.0, n),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rolling metrics.")
+    parser.add_argument("--trades", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--window", default="1000", help="trades, or an offset such as 30D")
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--baseline-trades", type=int, default=20_000)
+    args = parser.parse_args()
+    window = int(args.window) if args.window.isdigit() else args.window
+
+    rng = np.random.default_rng(0)
+    per_window = np.nan
+    if isinstance(window, int):
+        sample = make_log(args.baseline_trades, rng)
+        windows = np.lib.stride_tricks.sliding_window_view(sample["pnl"].to_numpy(), window)
+        start = time.perf_counter()
+        baseline = [metrics_from_arrays(v)["sharpe"] for v in windows]
+        per_window = (time.perf_counter() - start) / len(windows)
+        assert np.allclose(rolling_metrics(sample, window)["sharpe"].to_numpy()[window - 1:], baseline)
+        print(f"baseline: {per_window * 1e6:.1f} us per window via metrics_from_arrays")
+
+    print(f"{'trades':>11} {'full ms':>9} {'points ms':>10} {'baseline est. s':>16}")
+    for n in args.trades:
+        log = make_log(n, rng)
+        start = time.perf_counter()
+        rolling_metrics(log, window)
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rolling_metrics(log, window, points=args.points)
+        charted = time.perf_counter() - start
+        print(f"{n:>11,} {full * 1e3:>9.0f} {charted * 1e3:>10.0f} {per_window * n:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
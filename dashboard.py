@@ -12,8 +12,17 @@ import streamlit as st
 from PIL import Image
 import pandas as pd
 import os
-import importlib.util
-from utils.performance_metrics import calculate_metrics
+from utils.performance_metrics import default_metrics
+from utils.metric_registry import compute_metrics, summary_row
+from utils.metrics_state import refresh_metrics
+from utils.rollups import log_fingerprint, range_metrics
+from utils.bootstrap import BOOTSTRAP_RESAMPLES, ci_columns, confidence_intervals
+from utils.metrics_cache import get_metrics_cache, metrics_cache_stats
+from utils.trade_schema import schema_stats
+from utils.trade_store import load_trade_log, query_trade_log, trade_log_symbols
+from utils.strategy_runner import load_strategies, run_strategies
+from utils.supervisor_status import supervisor_status
+from utils.detail_view import chart_points_slider, render_portfolio, render_strategy_detail, select_detail_views
 
 # Configuration
 STRATEGY_FOLDER = "strategies"
@@ -38,29 +47,6 @@ with col2:
 
 st.sidebar.header("\U0001F9E0 Strategy Control Panel")
 
-# Utility: Load strategy classes dynamically from a folder
-def load_strategies():
-    strategies = {}
-    for filename in os.listdir(STRATEGY_FOLDER):
-        if filename.endswith(".py"):
-            path = os.path.join(STRATEGY_FOLDER, filename)
-            module_name = filename[:-3]
-            spec = importlib.util.spec_from_file_location(module_name, path)
-
-            if spec is None or spec.loader is None:
-                print(f"⚠️ Skipping {filename}: cannot load module spec.")
-                continue  # Skip to next file
-            
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # if not asyncio.get_event_loop_policy().get_event_loop().is_running():
-                # asyncio.set_event_loop(asyncio.new_event_loop())
-
-            if hasattr(module, "Strategy"):
-                strategies[module_name] = module.Strategy()
-    return strategies
-
 # # Upload new strategy
 # uploaded_file = st.sidebar.file_uploader("Upload a Strategy File (.py)", type="py")
 # if uploaded_file:
@@ -68,13 +54,19 @@ def load_strategies():
 #         f.write(uploaded_file.getvalue())
 #     st.sidebar.success("Strategy uploaded. Please reload the page to activate it.")
 
-# Load strategies
-strategies = load_strategies()
+# Load strategies (modules are imported in parallel)
+strategies, strategy_data_paths, strategy_timeouts = load_strategies(STRATEGY_FOLDER)
 selected_strategies = {}
 
+# When supervisor.py is running it owns the IB sessions; the dashboard only reads
+supervisor_alive, supervisor_board = supervisor_status()
+if supervisor_alive:
+    st.sidebar.success("\U0001F6F0 Supervisor running — strategies trade outside the dashboard")
+
 # Strategy toggles
 for name in strategies:
-    selected = st.sidebar.toggle(f"Run {name}", value=False)
+    selected = st.sidebar.toggle(f"Run {name}", value=False, disabled=supervisor_alive)
+    selected = selected and not supervisor_alive
     selected_strategies[name] = selected
 
     # Generalized environment flag
@@ -82,14 +74,49 @@ for name in strategies:
     env_var_name = f"RUNNING_{name.upper().replace('_STRATEGY', '')}"
     os.environ[env_var_name] = "1" if selected else "0"
 
+# Date range applied to the summary (answered from the daily/monthly rollups) and the detailed views
+date_range = st.sidebar.date_input("Date range", value=[])
+start, end = None, None
+if len(date_range) == 2:
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+max_points = chart_points_slider()
+show_ci = st.sidebar.toggle("Bootstrap confidence intervals", value=False)
+
+metrics_cache = get_metrics_cache()
+
+
+def summarize(df, data_path):
+    """Summary metrics for the selected date range."""
+    if start is not None and data_path:
+        return range_metrics(data_path, start, end) or default_metrics()
+    if start is not None:
+        in_range = df[pd.to_datetime(df["timestamp"]).between(start, end)] if "timestamp" in df.columns else df
+        return compute_metrics(in_range)
+    # Incremental metrics from the persisted state when the strategy logs to a CSV
+    metrics = refresh_metrics(data_path) if data_path else None
+    return metrics if metrics is not None else compute_metrics(df)
+
+
 # Store performance summary
 summary_data = []
 
 # Display results
 strategy_dataframes = {}
-for name, strategy in strategies.items():
-    # strategy = strategies[name]
-    df = strategy.run()
+strategy_metrics = {}
+run_status = st.status("Running strategies...", expanded=False)
+progress = run_status.progress(0.0)
+
+# Strategies run concurrently; results are shown as each one completes
+for done, (name, df, error, elapsed) in enumerate(run_strategies(strategies, strategy_timeouts), start=1):
+    data_path = strategy_data_paths.get(name)
+    if error is not None:
+        run_status.write(f"⚠️ {name}: {error} — showing saved trades")
+        df = load_trade_log(data_path, compact=True) if data_path else pd.DataFrame()
+    else:
+        run_status.write(f"✅ {name} finished in {elapsed:.1f}s")
+    progress.progress(done / len(strategies))
     strategy_dataframes[name] = df
 
     # if df.empty or 'pnl' not in df.columns:
@@ -104,21 +131,24 @@ for name, strategy in strategies.items():
     #     st.text(df.dtypes)
     #     st.write(df.head())
 
-    metrics = calculate_metrics(df)
-    summary_data.append({
-            "Strategy": name,
-            "Sharpe Ratio": round(metrics['sharpe'], 2),
-            "Sortino Ratio": round(metrics['sortino'], 2),
-            "Win Rate (%)": round(metrics['win_rate'], 2),
-            "Wins": metrics['wins'],
-            "Losses": metrics['losses'],
-            "Closed P/L": round(metrics['closed_pl'], 2),
-            "Avg Win": round(metrics['avg_win'], 2),
-            "Avg Loss": round(metrics['avg_loss'], 2),
-            "Profit Factor": round(metrics['profit_factor'], 2),
-            "Max Drawdown": round(metrics['max_drawdown'], 2),
-            "Avg Duration (s)": round(metrics['avg_trade_duration'], 2)
-        })
+    # Cached by the log's file fingerprint (stat only), so reruns and restarts skip unchanged logs
+    kind = f"summary:{data_path}:{start}:{end}"
+    if data_path:
+        metrics = metrics_cache.get_or_compute_for(log_fingerprint(data_path), kind, lambda: summarize(df, data_path))
+    else:
+        metrics = metrics_cache.get_or_compute(df, kind, lambda: summarize(df, data_path))
+    strategy_metrics[name] = metrics
+    summary_data.append({"Strategy": name, **summary_row(metrics)})
+    if show_ci and "pnl" in df.columns:
+        in_range = df[pd.to_datetime(df["timestamp"]).between(start, end)] if start is not None and "timestamp" in df.columns else df
+        summary_data[-1].update(metrics_cache.get_or_compute(
+            in_range, f"ci:{BOOTSTRAP_RESAMPLES}", lambda: ci_columns(confidence_intervals(in_range["pnl"]))))
+
+run_status.update(label=f"Loaded {len(strategy_dataframes)} strategies", state="complete")
+
+if supervisor_board is not None and not supervisor_board.empty:
+    with st.expander("\U0001F6F0 Supervisor Status", expanded=supervisor_alive):
+        st.dataframe(supervisor_board, use_container_width=True)
 
 # Show performance table
 if summary_data:
@@ -141,45 +171,34 @@ if summary_data:
     csv = filtered_df.to_csv(index=False).encode('utf-8')
     st.download_button("Download Summary as CSV", data=csv, file_name="strategy_performance_summary.csv", mime="text/csv")
 
-    # Expandable details
-    for name, df in strategy_dataframes.items():
-        # if enabled:
-        strategy = strategies[name]
-        # df = strategy.run()
+    # Combined view across the listed strategies, computed only when opened
+    if st.toggle("\U0001F4C8 Portfolio view", value=False):
+        with st.expander("\U0001F4C8 Portfolio", expanded=True):
+            render_portfolio({name: strategy_dataframes[name] for name in filtered_df["Strategy"]}, max_points)
+
+    # Detailed views, rendered only for the strategies the user opens
+    for name in select_detail_views(strategy_dataframes):
         df = strategy_dataframes[name]
-        with st.expander(f"\U0001F4C2 Detailed View: {name}"):
-            if df.empty or 'pnl' not in df.columns:
-                st.info("ℹ️ No trades generated for this strategy yet.")
-            else:
-                st.write("### Trade Log")
-                st.dataframe(df, use_container_width=True)
-
-                if 'timestamp' in df.columns:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-                    df = df.dropna(subset=["timestamp"])
-
-                if 'pnl' in df.columns and not df.empty:
-                    st.write("### Equity Curve")
-                    df['cumulative_pnl'] = df['pnl'].cumsum()
-                    st.line_chart(df.set_index("timestamp")["cumulative_pnl"])
-
-                    df['drawdown'] = df['cumulative_pnl'].cummax() - df['cumulative_pnl']
-                    if df['drawdown'].max() > 0:
-                        st.write("### Drawdown Curve")
-                        st.area_chart(df.set_index("timestamp")["drawdown"])
-                    else:
-                        st.info("✅ No drawdown detected - all trades are profitable or flat")
-                else:
-                    st.warning(f"No valid 'pnl' data available for {name}.")
-
-                if 'duration' in df.columns:
-                    st.write("### Trade Duration Distribution")
-                    st.bar_chart(df['duration'])
-
-                st.write("### Additional Metrics")
-                metrics = calculate_metrics(df)
-                st.json(metrics)
+        metrics = strategy_metrics.get(name)
+        with st.expander(f"\U0001F4C2 Detailed View: {name}", expanded=True):
+            data_path = strategy_data_paths.get(name)
+            if data_path and not df.empty:
+                # Indexed / pruned query instead of filtering the full history
+                symbol_options = trade_log_symbols(data_path)
+                symbols = st.multiselect("Symbols", symbol_options, key=f"symbols_{name}") if symbol_options else None
+                if start is not None or symbols:
+                    df = query_trade_log(data_path, start=start, end=end, symbols=symbols, compact=True)
+                if symbols:
+                    metrics = None  # Summary metrics cover every symbol
+
+            render_strategy_detail(name, df, metrics, max_points)
 
 else:
     st.info("No strategies selected or no trades generated yet.")
 
+cache = metrics_cache_stats()
+st.sidebar.caption(f"Metrics cache: {cache['hit_rate']:.0%} hit rate ({cache['hits']} hits / {cache['misses']} misses)")
+schema = schema_stats()
+if schema["logs"]:
+    st.sidebar.caption(f"Trade logs in memory: {schema['before'] / 1e6:.1f} MB -> {schema['after'] / 1e6:.1f} MB (compact schema)")
+
@@ -7,13 +7,21 @@ from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
 from ibapi.order import Order
 import threading
+from utils.trade_store import load_trade_log
+from utils.trade_journal import get_journal
+from utils.ib_broker import BrokeredClient
+from utils.bar_cache import BarCache
+from utils.indicators import SMA
 
 DATA_PATH = os.path.join("data", "sma200_trades.csv")
+TRADE_KEY = ["timestamp", "action", "price"]
+CLIENT_ID = 2
 
-class SMA200Trader(EWrapper, EClient):
+class SMA200Trader(BrokeredClient, EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self)
         self.historical_data = []
+        self.bar_cache = BarCache("MSFT", '1 day', 'MIDPOINT', 0)
         self.sma_200 = 0.0
         self.current_price = 0.0
         self.order_id = 0
@@ -35,15 +43,15 @@ class SMA200Trader(EWrapper, EClient):
 
     def request_historical_data(self):
         contract = self.get_msft_contract()
-        self.reqHistoricalData(1, contract, '', '300 D', '1 day', 'MIDPOINT', 0, 1, False, [])
+        self.reqHistoricalData(1, contract, '', self.bar_cache.duration('300 D', min_bars=200), '1 day', 'MIDPOINT', 0, 1, False, [])
 
     def historicalData(self, reqId, bar):
-        self.historical_data.append(bar.close)
+        self.historical_data.append(bar)
 
     def historicalDataEnd(self, reqId, start, end):
-        if len(self.historical_data) >= 200:
-            df = pd.Series(self.historical_data)
-            self.sma_200 = df[-200:].mean()
+        df = self.bar_cache.closes(self.historical_data)
+        if len(df) >= 200:
+            self.sma_200 = SMA(200).extend(df.to_numpy()).value
             self.sma_ready = True
             self.infer_last_position()
             self.subscribe_market_data()
@@ -138,11 +146,10 @@ class SMA200Trader(EWrapper, EClient):
             return 0.0
 
     def infer_last_position(self):
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH)
-            if not df.empty and "action" in df.columns:
-                last_action = df.iloc[-1]["action"]
-                self.position = "LONG" if last_action == "BUY" else "SHORT"
+        df = load_trade_log(DATA_PATH, columns=["action"], copy=False)
+        if not df.empty and "action" in df.columns:
+            last_action = df.iloc[-1]["action"]
+            self.position = "LONG" if last_action == "BUY" else "SHORT"
         else:
             self.position = "NONE"
 
@@ -155,7 +162,7 @@ class SMA200Trader(EWrapper, EClient):
         return contract
 
     def run_bot(self):
-        self.connect("127.0.0.1", 7497, clientId=2)
+        self.connect("127.0.0.1", 7497, clientId=CLIENT_ID)
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
 
@@ -170,17 +177,11 @@ class SMA200Trader(EWrapper, EClient):
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-                df = df.drop_duplicates(subset=["timestamp", "action", "price"])
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            return pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-        return pd.DataFrame()
+        return load_trade_log(DATA_PATH, compact=True)
 
 
 class Strategy:
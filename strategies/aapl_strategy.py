@@ -7,13 +7,21 @@ from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
 from ibapi.order import Order
 import threading
+from utils.trade_store import load_trade_log
+from utils.trade_journal import get_journal
+from utils.ib_broker import BrokeredClient
+from utils.bar_cache import BarCache
+from utils.indicators import SMA
 
 DATA_PATH = os.path.join("data", "aapl_trades.csv")
+TRADE_KEY = ["timestamp", "symbol", "action"]
+CLIENT_ID = 3
 
-class AAPLTrader(EWrapper, EClient):
+class AAPLTrader(BrokeredClient, EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self)
         self.data = []
+        self.bar_cache = BarCache("AAPL", '1 day', 'MIDPOINT', 0)
         self.done = False
         self.trade_log = []
         self.order_id = 0
@@ -37,7 +45,7 @@ class AAPLTrader(EWrapper, EClient):
             reqId=1,
             contract=contract,
             endDateTime='',
-            durationStr='300 D',
+            durationStr=self.bar_cache.duration('300 D', min_bars=180),
             barSizeSetting='1 day',
             whatToShow='MIDPOINT',
             useRTH=0,
@@ -46,15 +54,20 @@ class AAPLTrader(EWrapper, EClient):
             chartOptions=[]
         )
 
+    def refresh(self):
+        # Re-evaluate on an already connected session (used by supervisor.py)
+        self.data = []
+        self.done = False
+        self.get_historical_data()
+
     def historicalData(self, reqId: int, bar):
-        self.data.append([bar.date, bar.close])
+        self.data.append(bar)
 
     def historicalDataEnd(self, reqId: int, start: str, end: str):
-        df = pd.DataFrame(self.data, columns=["date", "close"])
-        df["close"] = pd.to_numeric(df["close"], errors="coerce")
+        df = self.bar_cache.closes(self.data).reset_index()
         df.dropna(inplace=True)
 
-        sma_180 = df["close"].rolling(window=180).mean().iloc[-1]
+        sma_180 = SMA(180).extend(df["close"].to_numpy()).value
         last_price = df["close"].iloc[-1]
 
         if pd.isna(sma_180) or last_price <= 0:
@@ -132,7 +145,7 @@ class AAPLTrader(EWrapper, EClient):
         return contract
 
     def run_bot(self):
-        self.connect("127.0.0.1", 7497, clientId=3)
+        self.connect("127.0.0.1", 7497, clientId=CLIENT_ID)
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
 
@@ -144,16 +157,11 @@ class AAPLTrader(EWrapper, EClient):
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            return pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-        return pd.DataFrame()
+        return load_trade_log(DATA_PATH, compact=True)
 
 # ✅ Streamlit-compatible Strategy wrapper
 class Strategy:
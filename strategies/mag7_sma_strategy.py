@@ -9,6 +9,12 @@ from ibapi.client import EClient
 from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
 from ibapi.order import Order
+from utils.trade_store import load_trade_log
+from utils.trade_journal import get_journal
+from utils.ib_broker import BrokeredClient
+from utils.history_scheduler import HistoryRequest, HistoryScheduler
+from utils.bar_cache import BarCache
+from utils.indicators import SMA
 
 # === Custom SMA Settings for Magnificent 7 ===
 MAG7_SMA_SETTINGS = {
@@ -22,69 +28,72 @@ MAG7_SMA_SETTINGS = {
 }
 
 DATA_PATH = os.path.join("data", "mag7_trades.csv")
+TRADE_KEY = ["timestamp", "symbol", "action"]
+CLIENT_ID = 8
 os.makedirs("data", exist_ok=True)
 
-class Mag7CustomSMATrader(EWrapper, EClient):
+class Mag7CustomSMATrader(BrokeredClient, EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self)
         self.order_id = 0
         self.symbols = list(MAG7_SMA_SETTINGS.keys())
-        self.current_symbol_index = 0
-        self.symbol = self.symbols[0]
-        self.data = []
+        self.scheduler = None
         self.done = False
         self.trade_log = []
         self.last_trade_time = None
 
     def nextValidId(self, orderId: int):
         self.order_id = orderId
-        self.request_next_symbol_data()
+        self.request_all_symbol_data()
 
-    def request_next_symbol_data(self):
-        if self.current_symbol_index >= len(self.symbols):
-            self.done = True
-            return
+    def refresh(self):
+        # Start a new pass over all symbols on the connected session (used by supervisor.py)
+        self.request_all_symbol_data()
 
-        self.data = []
-        self.symbol = self.symbols[self.current_symbol_index]
+    def request_all_symbol_data(self):
+        # All symbols are requested at once, each with its own reqId
+        self.done = False
+        self.scheduler = HistoryScheduler(self, self.evaluate_symbol, on_done=self.finish_pass)
+        self.scheduler.submit(self.history_request(symbol) for symbol in self.symbols)
 
+    def history_request(self, symbol):
         contract = Contract()
-        contract.symbol = self.symbol
+        contract.symbol = symbol
         contract.secType = "STK"
         contract.exchange = "SMART"
         contract.primaryExchange = "NASDAQ"
         contract.currency = "USD"
 
-        sma_window = MAG7_SMA_SETTINGS[self.symbol]
-        duration_str = f"{int(sma_window * 2)} D"
-
-        self.reqHistoricalData(
-            reqId=1,
-            contract=contract,
-            endDateTime='',
-            durationStr=duration_str,
-            barSizeSetting='1 day',
-            whatToShow='TRADES',
-            useRTH=0,
-            formatDate=1,
-            keepUpToDate=False,
-            chartOptions=[]
-        )
+        sma_window = MAG7_SMA_SETTINGS[symbol]
+        duration_str = BarCache(symbol, '1 day', 'TRADES', 0).duration(f"{int(sma_window * 2)} D", min_bars=sma_window)
+        return HistoryRequest(symbol, contract, duration_str, '1 day', 'TRADES')
 
     def historicalData(self, reqId: int, bar):
-        self.data.append([bar.date, bar.close])
+        self.scheduler.on_bar(reqId, bar)
 
     def historicalDataEnd(self, reqId: int, start: str, end: str):
-        df = pd.DataFrame(self.data, columns=["date", "close"])
-        df["close"] = pd.to_numeric(df["close"], errors="coerce")
+        self.scheduler.on_end(reqId)
+
+    def error(self, reqId, errorCode, errorString, *args):
+        if self.scheduler is not None:
+            self.scheduler.on_error(reqId, errorCode, errorString)
+        if reqId != -1:
+            print(f"⚠️ IB error {errorCode} (reqId {reqId}): {errorString}")
+
+    def evaluate_symbol(self, request):
+        symbol = request.key
+        if request.error:
+            print(f"⚠️ No history for {symbol}: {request.error}")
+            return
+
+        df = BarCache(symbol, '1 day', 'TRADES', 0).closes(request.bars).reset_index()
         df.dropna(inplace=True)
 
-        sma_window = MAG7_SMA_SETTINGS[self.symbol]
+        sma_window = MAG7_SMA_SETTINGS[symbol]
         if len(df) < sma_window:
-            self.move_to_next()
             return
 
-        sma_val = df["close"].rolling(window=sma_window).mean().iloc[-1]
+        sma_val = SMA(sma_window).extend(df["close"].to_numpy()).value
         last_price = df["close"].iloc[-1]
 
         action = None
@@ -95,9 +104,10 @@ class Mag7CustomSMATrader(EWrapper, EClient):
                 action = "SELL"
 
         if action:
-            self.place_market_order(self.symbol, action, last_price, sma_val)
+            self.place_market_order(symbol, action, last_price, sma_val)
 
-        self.move_to_next()
+    def finish_pass(self):
+        self.done = True
 
     def place_market_order(self, symbol, action, price, sma_val):
         contract = Contract()
@@ -134,13 +144,8 @@ class Mag7CustomSMATrader(EWrapper, EClient):
 
         self.last_trade_time = datetime.datetime.now()
 
-    def move_to_next(self):
-        self.current_symbol_index += 1
-        time.sleep(2)
-        self.request_next_symbol_data()
-
     def run_bot(self):
-        self.connect("127.0.0.1", 7497, clientId=8)
+        self.connect("127.0.0.1", 7497, clientId=CLIENT_ID)
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
 
@@ -152,18 +157,14 @@ class Mag7CustomSMATrader(EWrapper, EClient):
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
+        df = load_trade_log(DATA_PATH, compact=True)
+        if not df.empty:
             df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce")
-            return df
-        return pd.DataFrame()
+        return df
 
 # ✅ Wrapper for Streamlit
 class Strategy:
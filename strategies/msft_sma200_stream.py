@@ -9,14 +9,22 @@ from ibapi.client import EClient
 from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
 from ibapi.order import Order
+from utils.trade_store import load_trade_log
+from utils.trade_journal import get_journal
+from utils.ib_broker import BrokeredClient
+from utils.bar_cache import BarCache
+from utils.indicators import SMA
 
 SYMBOL = "MSFT"
 DATA_PATH = os.path.join("data", f"{SYMBOL.lower()}_sma200_trades.csv")
+TRADE_KEY = ["timestamp", "symbol", "action"]
+CLIENT_ID = 13
 
-class MSFTSMA200Trader(EWrapper, EClient):
+class MSFTSMA200Trader(BrokeredClient, EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self)
         self.historical_data = []
+        self.bar_cache = BarCache("MSFT", '1 day', 'MIDPOINT', 0)
         self.sma_200 = 0.0
         self.current_price = 0.0
         self.order_id = 0
@@ -34,16 +42,16 @@ class MSFTSMA200Trader(EWrapper, EClient):
     def request_historical_data(self):
         contract = self.get_contract()
         self.reqHistoricalData(
-            1, contract, '', '300 D', '1 day', 'MIDPOINT', 0, 1, False, []
+            1, contract, '', self.bar_cache.duration('300 D', min_bars=200), '1 day', 'MIDPOINT', 0, 1, False, []
         )
 
     def historicalData(self, reqId, bar):
-        self.historical_data.append(bar.close)
+        self.historical_data.append(bar)
 
     def historicalDataEnd(self, reqId, start, end):
-        if len(self.historical_data) >= 200:
-            df = pd.Series(self.historical_data)
-            self.sma_200 = df[-200:].mean()
+        df = self.bar_cache.closes(self.historical_data)
+        if len(df) >= 200:
+            self.sma_200 = SMA(200).extend(df.to_numpy()).value
             self.sma_ready = True
             self.subscribe_market_data()
 
@@ -136,7 +144,7 @@ class MSFTSMA200Trader(EWrapper, EClient):
         return contract
 
     def run_bot(self):
-        self.connect("127.0.0.1", 7497, clientId=13)
+        self.connect("127.0.0.1", 7497, clientId=CLIENT_ID)
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
 
@@ -150,16 +158,11 @@ class MSFTSMA200Trader(EWrapper, EClient):
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            return pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-        return pd.DataFrame()
+        return load_trade_log(DATA_PATH, compact=True)
 
 # ✅ Streamlit wrapper
 class Strategy:
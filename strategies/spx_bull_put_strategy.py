@@ -2,8 +2,12 @@ import pandas as pd
 import os
 import datetime
 import math
+from utils.trade_store import latest_trade_time, load_trade_log, trades_on_day
+from utils.trade_journal import get_journal
 
 DATA_PATH = os.path.join("data", "spx_bull_put_trades.csv")
+TRADE_KEY = ["timestamp", "sell_strike", "buy_strike"]
+CLIENT_ID = 4
 
 class SPXBullPutTrader:
     def __init__(self):
@@ -13,11 +17,9 @@ class SPXBullPutTrader:
         self.last_trade_time = None
 
     def already_traded_today(self):
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-            if not df.empty:
-                last_trade_time = df["timestamp"].max()
-                return (datetime.now() - last_trade_time).total_seconds() < self.cooldown_minutes * 60
+        last_trade_time = latest_trade_time(DATA_PATH)
+        if last_trade_time is not None:
+            return (datetime.now() - last_trade_time).total_seconds() < self.cooldown_minutes * 60
         return False
 
     def run(self):
@@ -34,7 +36,7 @@ class SPXBullPutTrader:
 
         ib = IB()
         try:
-            ib.connect('127.0.0.1', 7497, clientId=4)
+            ib.connect('127.0.0.1', 7497, clientId=CLIENT_ID)
         except Exception as e:
             print(f"❌ Connection Error: {e}")
             return pd.DataFrame()
@@ -136,10 +138,8 @@ class SPXBullPutTrader:
         return pd.DataFrame(self.trade_log)
 
     def trade_exists(self, sell_strike, buy_strike):
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH)
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            df_today = df[df["timestamp"].str.startswith(today_str)]
+        df_today = trades_on_day(DATA_PATH, datetime.now().date(), columns=["timestamp", "sell_strike", "buy_strike"])
+        if not df_today.empty:
             return not df_today[
                 (df_today["sell_strike"] == sell_strike) &
                 (df_today["buy_strike"] == buy_strike)
@@ -148,17 +148,11 @@ class SPXBullPutTrader:
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-                df = df.drop_duplicates(subset=["timestamp", "sell_strike", "buy_strike"])
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            return pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-        return pd.DataFrame()
+        return load_trade_log(DATA_PATH, compact=True)
 
 
 # ✅ Streamlit-compatible wrapper
@@ -10,15 +10,20 @@ import time
 import datetime
 import pandas as pd
 import os
-from collections import deque
+from utils.trade_store import load_trade_log
+from utils.trade_journal import get_journal
+from utils.ib_broker import BrokeredClient
+from utils.indicators import SMA
 
 SYMBOL = "TSLA"
 DATA_PATH = os.path.join("data", f"{SYMBOL.lower()}_5min_trades.csv")
+TRADE_KEY = ["timestamp", "symbol", "action"]
+CLIENT_ID = 12
 
-class TSLA5MinSMATrader(EWrapper, EClient):
+class TSLA5MinSMATrader(BrokeredClient, EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self)
-        self.prices = deque(maxlen=15)
+        self.sma = SMA(15)
         self.sma_15 = None
         self.current_price = None
         self.order_id = 0
@@ -38,10 +43,9 @@ class TSLA5MinSMATrader(EWrapper, EClient):
 
     def realtimeBar(self, reqId, time_unix, open_, high, low, close, volume, wap, count):
         self.current_price = close
-        self.prices.append(close)
+        self.sma_15 = self.sma.update(close)
 
-        if len(self.prices) == 15:
-            self.sma_15 = sum(self.prices) / 15
+        if self.sma.ready:
             self.evaluate_trade_logic()
 
     def evaluate_trade_logic(self):
@@ -126,7 +130,7 @@ class TSLA5MinSMATrader(EWrapper, EClient):
         return c
 
     def run_bot(self):
-        self.connect("127.0.0.1", 7497, clientId=12)
+        self.connect("127.0.0.1", 7497, clientId=CLIENT_ID)
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
 
@@ -142,16 +146,11 @@ class TSLA5MinSMATrader(EWrapper, EClient):
 
     def save_trades(self):
         if self.trade_log:
-            df = pd.DataFrame(self.trade_log)
-            if os.path.exists(DATA_PATH):
-                existing = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-                df = pd.concat([existing, df], ignore_index=True)
-            df.to_csv(DATA_PATH, index=False)
+            return get_journal(DATA_PATH, TRADE_KEY).append(self.trade_log)
+        return 0
 
     def get_trade_log(self):
-        if os.path.exists(DATA_PATH):
-            return pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
-        return pd.DataFrame()
+        return load_trade_log(DATA_PATH, compact=True)
 
 # ✅ Streamlit-compatible wrapper
 class Strategy:
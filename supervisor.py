@@ -0,0 +1,152 @@
+# supervisor.py
+#
+# Long-running strategy supervisor, decoupled from Streamlit reruns.
+# Keeps one persistent IB session per strategy, saves trades as they happen
+# and publishes status through utils.supervisor_status; the dashboards only
+# read that board and the trade logs.
+#
+# Usage: python supervisor.py [--strategies aapl_strategy tsla_5min_sma] [--save-interval 30]
+
+import argparse
+import os
+import signal
+import threading
+import time
+
+from utils.strategy_runner import load_module
+from utils.supervisor_status import StatusBoard
+
+STRATEGY_FOLDER = "strategies"
+IB_HOST = os.getenv("IB_HOST", "127.0.0.1")
+IB_PORT = int(os.getenv("IB_PORT", "7497"))
+
+# Trader class per strategy module. "stream" sessions trade from live ticks/bars;
+# "refresh" sessions re-run their historical evaluation every refresh interval;
+# "periodic" strategies (ib_insync based) run a full cycle every refresh interval.
+SESSIONS = {
+    "SMA200_trader": ("SMA200Trader", "stream"),
+    "msft_sma200_stream": ("MSFTSMA200Trader", "stream"),
+    "tsla_5min_sma": ("TSLA5MinSMATrader", "stream"),
+    "aapl_strategy": ("AAPLTrader", "refresh"),
+    "mag7_sma_strategy": ("Mag7CustomSMATrader", "refresh"),
+    "spx_bull_put_strategy": ("SPXBullPutTrader", "periodic"),
+}
+
+
+class StrategySession(threading.Thread):
+    def __init__(self, name, module, trader_class, mode, board, save_interval, refresh_interval, max_session_age):
+        super().__init__(name=f"session-{name}", daemon=True)
+        self.strategy = name
+        self.module = module
+        self.trader_class = trader_class
+        self.mode = mode
+        self.board = board
+        self.save_interval = save_interval
+        self.refresh_interval = refresh_interval
+        self.max_session_age = max_session_age
+        self.stop_event = threading.Event()
+        self.trader = None
+        self.trades_saved = 0
+
+    def run(self):
+        backoff = 5
+        while not self.stop_event.is_set():
+            try:
+                if self.mode == "periodic":
+                    self._run_periodic()
+                else:
+                    self._run_session()
+                backoff = 5
+            except Exception as e:
+                self.board.update(self.strategy, state="error", connected=0, last_error=repr(e))
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, 300)
+        self.board.update(self.strategy, state="stopped", connected=0)
+
+    def _run_session(self):
+        trader = getattr(self.module, self.trader_class)()
+        self.trader = trader
+        trader.connect(IB_HOST, IB_PORT, clientId=self.module.CLIENT_ID)
+        reader = threading.Thread(target=trader.run, daemon=True)
+        reader.start()
+
+        session_start = time.time()
+        last_refresh = session_start
+        self.board.update(self.strategy, state="running", connected=1, session_start=session_start,
+                          last_refresh=last_refresh, last_error=None)
+        try:
+            while not self.stop_event.wait(self.save_interval):
+                if not trader.isConnected():
+                    raise ConnectionError("IB session lost")
+                self._save(trader)
+
+                now = time.time()
+                if self.mode == "refresh" and now - last_refresh >= self.refresh_interval:
+                    trader.refresh()
+                    last_refresh = now
+                if now - session_start >= self.max_session_age:
+                    break  # Recycle the session so daily SMAs are rebuilt from fresh history
+
+                self.board.update(self.strategy, connected=1, last_refresh=last_refresh)
+        finally:
+            self._save(trader)
+            trader.disconnect()
+            self.trader = None
+
+    def _run_periodic(self):
+        while not self.stop_event.is_set():
+            trader = getattr(self.module, self.trader_class)()
+            trader.run()
+            self._save(trader)
+            self.board.update(self.strategy, connected=0, last_refresh=time.time())
+            self.stop_event.wait(self.refresh_interval)
+
+    def _save(self, trader):
+        if trader.trade_log:
+            self.trades_saved += trader.save_trades() or 0
+            self.board.update(self.strategy, trades_saved=self.trades_saved,
+                              last_trade_at=str(trader.trade_log[-1]["timestamp"]))
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run strategies continuously outside Streamlit.")
+    parser.add_argument("--strategies", nargs="+", default=list(SESSIONS))
+    parser.add_argument("--save-interval", type=float, default=30.0, help="seconds between saves/heartbeats")
+    parser.add_argument("--refresh-interval", type=float, default=3600.0, help="seconds between re-evaluations")
+    parser.add_argument("--max-session-age", type=float, default=24 * 3600.0, help="seconds before reconnecting")
+    args = parser.parse_args()
+
+    board = StatusBoard()
+    sessions = []
+    for name in args.strategies:
+        if name not in SESSIONS:
+            print(f"⚠️ Unknown strategy {name}, skipping.")
+            continue
+        _, module = load_module(STRATEGY_FOLDER, f"{name}.py")
+        trader_class, mode = SESSIONS[name]
+        session = StrategySession(name, module, trader_class, mode, board,
+                                  args.save_interval, args.refresh_interval, args.max_session_age)
+        session.start()
+        sessions.append(session)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    print(f"🚀 Supervising {len(sessions)} strategies (pid {os.getpid()})")
+    while not stopping.wait(min(args.save_interval, 10)):
+        for session in sessions:
+            if session.is_alive():
+                board.update(session.strategy)  # Heartbeat
+
+    for session in sessions:
+        session.stop()
+    for session in sessions:
+        session.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# tests/test_downsample.py
+#
+# Chart downsampling of equity curves.
+
+import numpy as np
+import pandas as pd
+
+from utils.downsample import downsample_equity, max_drawdown_indices
+
+
+def equity_with_nan_pnl(n=10_000):
+    rng = np.random.default_rng(0)
+    pnl = pd.Series(rng.normal(0, 1, n).round(2), index=pd.date_range("2024-01-01", periods=n, freq="min"))
+    pnl.iloc[n // 3] = np.nan
+    return pnl.cumsum()  # NaN at the missing trade, as in render_strategy_detail
+
+
+def test_nan_pnl_keeps_max_drawdown():
+    equity = equity_with_nan_pnl()
+    expected = (equity.cummax() - equity).max()
+    assert expected > 0
+
+    equity_chart, drawdown_chart = downsample_equity(equity, max_points=200)
+    assert drawdown_chart.max() == expected
+    assert not equity_chart.isna().any() and not drawdown_chart.isna().any()
+    assert len(equity_chart) <= 200 + 3
+
+
+def test_max_drawdown_indices_skip_nan():
+    values = np.array([0.0, 5.0, np.nan, 2.0, 4.0, 1.0, 3.0])
+    assert max_drawdown_indices(values) == (1, 5)
@@ -0,0 +1,145 @@
+# tests/test_ib_broker.py
+#
+# Routing through the pooled IB broker against the local fake IB server.
+# Run with: python -m pytest tests
+
+import threading
+import time
+import types
+
+import pytest
+
+pytest.importorskip("ibapi")
+
+from ibapi.client import EClient
+from ibapi.wrapper import EWrapper
+
+import utils.ib_broker as ib_broker
+from utils.fake_ib import FakeIBServer
+from utils.pacing import SlidingWindowLimiter
+
+
+class Recorder(ib_broker.BrokeredClient, EWrapper, EClient):
+    def __init__(self):
+        EClient.__init__(self, self)
+        self.bars = []
+        self.ends = []
+        self.errors = []
+        self.fills = []
+        self.order_id = None
+
+    def nextValidId(self, orderId):
+        self.order_id = orderId
+
+    def historicalData(self, reqId, bar):
+        self.bars.append((reqId, bar.close))
+
+    def historicalDataEnd(self, reqId, start, end):
+        self.ends.append(reqId)
+
+    def error(self, reqId, errorCode, errorString, *args):
+        self.errors.append((reqId, errorCode))
+
+    def orderStatus(self, orderId, status, *args):
+        self.fills.append((orderId, status))
+
+
+def contract(symbol):
+    return types.SimpleNamespace(symbol=symbol)
+
+
+def request_history(trader, req_id, symbol):
+    trader.reqHistoricalData(req_id, contract(symbol), "", "5 D", "1 day", "MIDPOINT", 0, 1, False, [])
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    server = FakeIBServer(bars={"MSFT": [410.0, 411.0], "TSLA": [250.0]}, first_order_id=500)
+    broker = ib_broker.IBBroker("fake", 1, pool_size=1, connection_factory=server.connection)
+    monkeypatch.setattr(ib_broker, "BROKER_ENABLED", True)
+    monkeypatch.setitem(ib_broker._brokers, ("fake", 1), broker)
+
+    traders = [Recorder(), Recorder()]
+    for trader in traders:
+        trader.connect("fake", 1, clientId=2)
+        threading.Thread(target=trader.run, daemon=True).start()
+    assert wait_for(lambda: all(t.order_id is not None for t in traders))
+    yield server, broker, traders
+    for trader in traders:
+        trader.disconnect()
+    broker.shutdown()
+
+
+def test_callbacks_routed_by_local_req_id(setup):
+    server, broker, (msft, tsla) = setup
+    request_history(msft, 1, "MSFT")
+    request_history(tsla, 1, "TSLA")
+    assert wait_for(lambda: msft.ends and tsla.ends)
+
+    assert msft.bars == [(1, 410.0), (1, 411.0)]
+    assert tsla.bars == [(1, 250.0)]
+    assert len(broker._connections) == 1
+    # Both strategies used reqId 1; the server saw two distinct ids
+    assert len({req_id for _, req_id in server.requests}) == 2
+
+
+def test_mappings_released_on_end_and_error(setup):
+    server, broker, (msft, tsla) = setup
+    request_history(msft, 1, "MSFT")
+    assert wait_for(lambda: msft.ends)
+    assert broker._requests == {} and broker._local == {}
+
+    server.fail.add("TSLA")
+    request_history(tsla, 7, "TSLA")
+    assert wait_for(lambda: tsla.errors)
+    assert tsla.errors == [(7, 200)] and msft.errors == []
+    assert broker._requests == {} and broker._local == {}
+
+
+def test_reused_req_id_replaces_mapping(setup):
+    server, broker, (msft, _) = setup
+    first = broker.map_request(msft, 3)
+    second = broker.map_request(msft, 3)
+    assert first not in broker._requests
+    assert broker.global_request_ids(msft, 3) == [second]
+
+    # A late callback for the replaced id reaches nobody
+    broker.dispatch_request("historicalDataEnd", first, ("", ""))
+    assert msft.ends == []
+
+
+def test_orders_get_unique_ids_and_fills_route_back(setup):
+    server, broker, (msft, tsla) = setup
+    assert msft.order_id != tsla.order_id
+    order = types.SimpleNamespace(totalQuantity=1, lmtPrice=0.0)
+    msft.placeOrder(msft.order_id, contract("MSFT"), order)
+    tsla.placeOrder(tsla.order_id, contract("TSLA"), order)
+    assert wait_for(lambda: msft.fills and tsla.fills)
+
+    assert msft.fills == [(msft.order_id, "Filled")]
+    assert tsla.fills == [(tsla.order_id, "Filled")]
+    assert len({order_id for method, order_id in server.requests if method == "placeOrder"}) == 2
+
+
+def test_orders_do_not_wait_on_historical_pacing(setup):
+    server, broker, (msft, tsla) = setup
+    # Historical budget used up for the next minute
+    exhausted = SlidingWindowLimiter(1, 60.0)
+    exhausted.acquire()
+    broker.buckets["historical"] = exhausted
+
+    request_history(msft, 1, "MSFT")
+    order = types.SimpleNamespace(totalQuantity=1, lmtPrice=0.0)
+    tsla.placeOrder(tsla.order_id, contract("TSLA"), order)
+    assert wait_for(lambda: tsla.fills, timeout=2.0)
+    assert msft.ends == []
+    assert [method for method, _ in server.requests] == ["placeOrder"]
@@ -0,0 +1,31 @@
+# tests/test_pacing.py
+#
+# IB pacing limiters, driven by a fake clock.
+
+from utils.pacing import HISTORICAL_REQUESTS, HISTORICAL_WINDOW, SlidingWindowLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_historical_limit_holds_in_every_window():
+    clock = FakeClock()
+    bucket = SlidingWindowLimiter(HISTORICAL_REQUESTS, HISTORICAL_WINDOW, clock=clock, sleep=clock.sleep)
+
+    sent = []
+    while clock.now < 3 * HISTORICAL_WINDOW:
+        bucket.acquire()
+        sent.append(clock.now)
+        clock.now += 1.0
+
+    for i, start in enumerate(sent):
+        in_window = [t for t in sent[i:] if t < start + HISTORICAL_WINDOW]
+        assert len(in_window) <= HISTORICAL_REQUESTS
@@ -0,0 +1,196 @@
+# utils/backtest.py
+#
+# Offline replay of the SMA strategies over cached bars. Signals and the
+# trade log are computed with NumPy; the emitted DataFrame has the same
+# columns as the live trade logs, so calculate_metrics and the dashboards
+# read it unchanged.
+#
+# Semantics (SMA200Trader / TSLA5MinSMATrader.evaluate_trade_logic):
+#   * flat: BUY above the SMA, SELL below it (tie_action decides a tie),
+#   * long: SELL when price drops below the SMA; short: BUY when it rises above,
+#   * no trade within `cooldown` seconds of the previous one,
+#   * no trade unless price moved more than min_move (absolute) and
+#     min_move_pct (relative) from the previous trade price. The live
+#     0.5% check only guards repeats of the same action, which alternating
+#     positions never produce, so the presets leave min_move_pct at 0,
+#   * pnl is the move since the previous trade in the closed direction.
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_cache import BarCache
+from utils.performance_metrics import calculate_metrics
+from utils.trade_store import save_trade_log
+
+# Live parameters of each strategy
+PRESETS = {
+    "SMA200_trader": dict(window=200, cooldown=300, cooldown_inclusive=True, min_move=0.0,
+                          min_move_pct=0.0, tie_action=None, round_pnl=None, sma_column="sma_200"),
+    "msft_sma200_stream": dict(window=200, cooldown=300, cooldown_inclusive=False, min_move=0.1,
+                               min_move_pct=0.0, tie_action=None, round_pnl=2, sma_column="sma_200",
+                               symbol="MSFT"),
+    "tsla_5min_sma": dict(window=15, cooldown=300, cooldown_inclusive=False, min_move=0.1,
+                          min_move_pct=0.0, tie_action="SELL", round_pnl=2, sma_column="sma_15",
+                          symbol="TSLA"),
+}
+
+
+def load_bars(symbol, bar_size="1 day", what_to_show="MIDPOINT", use_rth=0):
+    """Close prices from the bar cache as a Series indexed by bar time."""
+    bars = BarCache(symbol, bar_size, what_to_show, use_rth).load()
+    return pd.Series(np.asarray(bars["close"]), index=pd.DatetimeIndex(np.asarray(bars["date"])), name="close")
+
+
+def closes_and_times(bars):
+    if isinstance(bars, pd.DataFrame):
+        if "date" in bars.columns:
+            bars = bars.set_index("date")
+        bars = bars["close"]
+    bars = bars.dropna()
+    times = pd.DatetimeIndex(bars.index).as_unit("ns").asi8
+    return bars.to_numpy(dtype=np.float64), times
+
+
+def _first(mask, start, price=None, last_price=None, min_move=0.0, min_move_pct=0.0):
+    """First index >= start where mask holds (and the price filter passes), scanning in growing chunks."""
+    n = len(mask)
+    size = 256
+    while start < n:
+        stop = min(n, start + size)
+        hits = mask[start:stop]
+        if last_price is not None and (min_move > 0 or min_move_pct > 0):
+            move = np.abs(price[start:stop] - last_price)
+            hits = hits & (move > min_move) & (move > min_move_pct * last_price)
+        found = np.flatnonzero(hits)
+        if len(found):
+            return start + int(found[0])
+        start = stop
+        size *= 4
+    return -1
+
+
+def trade_indices(price, sma, times, cooldown=300, cooldown_inclusive=True,
+                  min_move=0.0, min_move_pct=0.0, tie_action=None):
+    """Bar indices at which the strategy trades and the side taken there (+1 BUY, -1 SELL)."""
+    valid = ~np.isnan(sma)
+    side = np.zeros(len(price), dtype=np.int8)
+    side[valid] = np.sign(price[valid] - sma[valid]).astype(np.int8)
+    first_valid = np.flatnonzero(valid)
+    if len(first_valid) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+
+    opening = side.copy()
+    if tie_action is not None:
+        opening[valid & (side == 0)] = 1 if tie_action == "BUY" else -1
+
+    spacing = np.diff(times).min() if len(times) > 1 else np.iinfo(np.int64).max
+    cooldown_ns = int(cooldown * 1e9)
+    unconstrained = (min_move <= 0 and min_move_pct <= 0 and
+                     (cooldown_ns < spacing or (cooldown_inclusive and cooldown_ns == spacing)))
+
+    if unconstrained:
+        # Filters can never bind: trades are exactly the changes of the price/SMA side
+        start = _first(opening != 0, int(first_valid[0]))
+        if start < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+        later = np.flatnonzero(side[start + 1:]) + start + 1
+        idx = np.concatenate(([start], later))
+        sides = np.concatenate(([opening[start]], side[later]))
+        change = np.concatenate(([True], sides[1:] != sides[:-1]))
+        return idx[change].astype(np.int64), sides[change]
+
+    # Path dependent: one step per trade, each a vectorized search over the bars
+    indices, sides = [], []
+    position, last_price, start = 0, None, int(first_valid[0])
+    above, below = side > 0, side < 0
+    while start < len(price):
+        mask = opening != 0 if position == 0 else (below if position > 0 else above)
+        i = _first(mask, start, price, last_price, min_move, min_move_pct)
+        if i < 0:
+            break
+        position = int(opening[i]) if position == 0 else -position
+        indices.append(i)
+        sides.append(position)
+        last_price = price[i]
+        ready = np.searchsorted(times, times[i] + cooldown_ns, side="left" if cooldown_inclusive else "right")
+        start = max(int(ready), i + 1)
+    return np.asarray(indices, dtype=np.int64), np.asarray(sides, dtype=np.int8)
+
+
+def trade_pnl(traded, sides, stamps, round_pnl=None):
+    """Per-trade pnl and duration (seconds since the previous trade) for trades at `traded` prices."""
+    if len(traded) == 0:
+        return np.empty(0), np.empty(0)
+    prev = np.concatenate(([np.nan], traded[:-1]))
+    # SELL closes a long (gain = price rise), BUY closes a short (gain = price fall)
+    pnl = np.where(sides < 0, traded - prev, prev - traded)
+    pnl[:1] = 0.0
+    if round_pnl is not None:
+        pnl = np.round(pnl, round_pnl)
+    duration = np.concatenate(([0.0], np.diff(stamps) / 1e9))
+    return pnl, duration
+
+
+def backtest_sma(bars, window=200, cooldown=300, cooldown_inclusive=True, min_move=0.0,
+                 min_move_pct=0.0, tie_action=None, round_pnl=None, sma_column=None, symbol=None):
+    """
+    Replay an SMA strategy over `bars` (Series of closes with a DatetimeIndex,
+    or a DataFrame with date/close) and return its trade log.
+    """
+    price, times = closes_and_times(bars)
+    sma = pd.Series(price).rolling(window).mean().to_numpy()
+    idx, sides = trade_indices(price, sma, times, cooldown, cooldown_inclusive,
+                               min_move, min_move_pct, tie_action)
+
+    traded = price[idx]
+    stamps = times[idx]
+    pnl, duration = trade_pnl(traded, sides, stamps, round_pnl)
+
+    log = {"timestamp": pd.to_datetime(stamps)}
+    if symbol is not None:
+        log["symbol"] = symbol
+    log["action"] = np.where(sides > 0, "BUY", "SELL")
+    log["price"] = traded
+    log[sma_column or f"sma_{window}"] = sma[idx]
+    log["pnl"] = pnl
+    log["duration"] = duration
+    return pd.DataFrame(log)
+
+
+def backtest_strategy(name, bars, **overrides):
+    """backtest_sma with the live parameters of strategy module `name` (see PRESETS)."""
+    params = dict(PRESETS[name])
+    params.update(overrides)
+    return backtest_sma(bars, **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest an SMA strategy over cached bars.")
+    parser.add_argument("strategy", choices=sorted(PRESETS))
+    parser.add_argument("--symbol", default="MSFT")
+    parser.add_argument("--bar-size", default="1 day")
+    parser.add_argument("--what-to-show", default="MIDPOINT")
+    parser.add_argument("--window", type=int)
+    parser.add_argument("--cooldown", type=float)
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args()
+
+    overrides = {k: v for k, v in (("window", args.window), ("cooldown", args.cooldown)) if v is not None}
+    bars = load_bars(args.symbol, args.bar_size, args.what_to_show)
+    if bars.empty:
+        print(f"⚠️ No cached bars for {args.symbol} ({args.bar_size}, {args.what_to_show}); run the strategy once first.")
+        return
+    trades = backtest_strategy(args.strategy, bars, **overrides)
+
+    # Written as a regular *_trades log so both dashboards pick it up
+    path = os.path.join(args.data_dir, f"backtest_{args.strategy}_{args.symbol.lower()}_trades.csv")
+    save_trade_log(trades, path)
+    print(f"✅ {len(trades)} trades -> {path}")
+    print(calculate_metrics(trades))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# utils/bar_cache.py
+#
+# On-disk cache of IB historical bars so daily strategies only request the
+# bars missing since their last run. Each (symbol, barSize, whatToShow,
+# useRTH) series is one .npy structured array under BAR_CACHE_DIR, loaded
+# memory-mapped and rewritten atomically after a top-up.
+
+import datetime
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", os.path.join("data", "bars"))
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[s]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+
+def _bar_time(value):
+    # formatDate=1 gives "20240105" for daily bars and "20240105 09:30:00 US/Eastern" intraday
+    text = str(value).strip()
+    parts = text.split()
+    if len(parts) > 2:
+        text = " ".join(parts[:2])
+    return np.datetime64(pd.Timestamp(text).to_datetime64(), "s")
+
+
+def bars_to_array(bars):
+    """Convert ibapi BarData objects (anything with date/open/high/low/close/volume) to BAR_DTYPE."""
+    out = np.empty(len(bars), dtype=BAR_DTYPE)
+    for i, bar in enumerate(bars):
+        out[i] = (_bar_time(bar.date), bar.open, bar.high, bar.low, bar.close, float(bar.volume))
+    return out
+
+
+def day_duration(days):
+    """durationStr covering `days` days; IB rejects "D" above 365, so longer spans use whole years."""
+    return f"{days} D" if days <= 365 else f"{-(-days // 365)} Y"
+
+
+class BarCache:
+    def __init__(self, symbol, bar_size, what_to_show, use_rth, cache_dir=BAR_CACHE_DIR):
+        self.symbol = symbol
+        self.bar_size = bar_size
+        self.what_to_show = what_to_show
+        self.use_rth = int(use_rth)
+        name = f"{symbol}_{bar_size}_{what_to_show}_{self.use_rth}"
+        self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", name) + ".npy")
+
+    def load(self):
+        """Cached bars (read-only memory map), or an empty array."""
+        if not os.path.exists(self.path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.load(self.path, mmap_mode="r")
+
+    def duration(self, full_duration, min_bars=0, today=None):
+        """
+        durationStr to request: `full_duration` when the cache is empty (or
+        shorter than min_bars), otherwise just the days since the last cached
+        bar. That bar is requested again because it may have been partial.
+        """
+        cached = self.load()
+        if len(cached) == 0 or len(cached) < min_bars:
+            count, unit = full_duration.split()
+            return day_duration(int(count)) if unit == "D" else full_duration
+        today = today or datetime.date.today()
+        last = pd.Timestamp(cached["date"][-1]).date()
+        return day_duration(max((today - last).days + 1, 1))
+
+    def merge(self, bars):
+        """Fold freshly downloaded bars into the cache and return the full series."""
+        new = bars if isinstance(bars, np.ndarray) else bars_to_array(bars)
+        cached = self.load()
+        if len(new) == 0:
+            return np.array(cached)
+
+        # Downloaded bars win over cached ones from the first new date on
+        new = new[np.argsort(new["date"], kind="stable")]
+        keep_last = np.append(new["date"][1:] != new["date"][:-1], True)
+        new = new[keep_last]
+        merged = np.concatenate([cached[cached["date"] < new["date"][0]], new])
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, merged)
+        os.replace(tmp_path, self.path)
+        return merged
+
+    def closes(self, bars):
+        """merge(bars) and return the close prices as a pandas Series."""
+        merged = self.merge(bars)
+        return pd.Series(merged["close"], index=pd.DatetimeIndex(merged["date"]), name="close")
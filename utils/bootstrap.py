@@ -0,0 +1,167 @@
+# utils/bootstrap.py
+#
+# Bootstrap confidence intervals for Sharpe, Sortino, profit factor and max
+# drawdown. Resamples are drawn in batches: a chunk of resamples is one 2-D
+# index array (resamples x trades) reduced along its rows, with the chunk
+# size bounded by BOOTSTRAP_CHUNK_MB. Sharpe, Sortino and profit factor only
+# depend on how often each pnl value is drawn, so when a log has few distinct
+# pnl values (prices and pnl are rounded to cents) they are resampled as
+# multinomial counts over those values instead, which costs O(distinct values)
+# per resample rather than O(trades). Max drawdown depends on the order of the
+# trades and always needs full paths, so its resamples are capped at
+# BOOTSTRAP_PATH_BUDGET drawn trades in total. Chunks can run on a process pool.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BOOTSTRAP_RESAMPLES = int(os.getenv("BOOTSTRAP_RESAMPLES", "10000"))
+BOOTSTRAP_CHUNK_MB = int(os.getenv("BOOTSTRAP_CHUNK_MB", "64"))
+BOOTSTRAP_PATH_BUDGET = int(float(os.getenv("BOOTSTRAP_PATH_BUDGET", "1e8")))
+MIN_PATH_RESAMPLES = 100
+CI_METRICS = ["sharpe", "sortino", "profit_factor", "max_drawdown"]
+
+# pnl of the log being resampled, set once per worker process
+_shared = {}
+
+
+def _init_worker(values):
+    _shared["values"] = values
+    unique, counts = np.unique(values, return_counts=True)
+    _shared["unique"] = unique
+    _shared["pvals"] = counts / len(values)
+
+
+def _std(s, q, n):
+    # Sample std from centred sums; cancellation residue (identical draws) counts as zero
+    var = (q - s * s / n) / (n - 1)
+    return np.sqrt(np.where(var > 1e-12 * q / n, var, 0.0))
+
+
+def _ratios(n, s, q, center, d, ds, dq, down_center, win_sum, loss_sum):
+    # Same formulas as metrics_from_arrays, from per-resample (centred) sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / n + center
+        std = _std(s, q, n)
+        down_std = _std(ds, dq, d)
+        return {
+            "sharpe": np.where(std > 0, mean / (std + 1e-9) * np.sqrt(252), 0.0),
+            "sortino": np.where((d > 1) & (down_std > 0), mean / (down_std + 1e-9) * np.sqrt(252), 0.0),
+            "profit_factor": np.where(loss_sum != 0, np.abs(win_sum / loss_sum), np.inf),
+        }
+
+
+def _from_samples(samples, center, down_center):
+    """Ratio metrics of each row of a (resamples x trades) array of pnl."""
+    n = samples.shape[1]
+    x = samples - center
+    down = samples < 0
+    dx = np.where(down, samples - down_center, 0.0)
+    return _ratios(n, x.sum(1), (x * x).sum(1), center, down.sum(1), dx.sum(1), (dx * dx).sum(1), down_center,
+                   np.where(samples > 0, samples, 0.0).sum(1), np.where(down, samples, 0.0).sum(1))
+
+
+def _from_counts(counts, unique, center, down_center):
+    """Ratio metrics of each row of a (resamples x distinct values) array of draw counts."""
+    n = counts[0].sum()
+    x = unique - center
+    down = unique < 0
+    dx = np.where(down, unique - down_center, 0.0)
+    return _ratios(n, counts @ x, counts @ (x * x), center, counts @ down, counts @ dx, counts @ (dx * dx),
+                   down_center, counts @ np.where(unique > 0, unique, 0.0), counts @ np.where(down, unique, 0.0))
+
+
+def _max_drawdowns(samples):
+    curve = np.cumsum(samples, axis=1, out=samples)
+    peak = np.maximum.accumulate(curve, axis=1)
+    np.subtract(peak, curve, out=peak)
+    return peak.max(axis=1)
+
+
+def _run_chunk(task):
+    """Statistics of one chunk of resamples; each chunk has its own seed."""
+    seed, rows, metrics, use_counts = task
+    rng = np.random.default_rng(seed)
+    values = _shared["values"]
+    n = len(values)
+    center = values.mean()
+    down_center = values[values < 0].mean() if (values < 0).any() else 0.0
+
+    if metrics == ["max_drawdown"]:
+        return {"max_drawdown": _max_drawdowns(values[rng.integers(0, n, size=(rows, n))])}
+    if use_counts:
+        counts = rng.multinomial(n, _shared["pvals"], size=rows).astype("float64")
+        out = _from_counts(counts, _shared["unique"], center, down_center)
+    else:
+        out = _from_samples(values[rng.integers(0, n, size=(rows, n))], center, down_center)
+    return {m: out[m] for m in metrics}
+
+
+def _chunks(seed, resamples, width, metrics, use_counts, chunk_mb):
+    # Chunk sizes bound the largest temporaries: ~3 float arrays of rows x width
+    rows = max(1, min(resamples, chunk_mb * 2 ** 20 // (8 * width * 3)))
+    sizes = [min(rows, resamples - start) for start in range(0, resamples, rows)]
+    return [(s, size, metrics, use_counts) for s, size in zip(seed.spawn(len(sizes)), sizes)]
+
+
+def bootstrap_metrics(pnl, resamples=BOOTSTRAP_RESAMPLES, metrics=CI_METRICS, seed=None, workers=1,
+                      chunk_mb=BOOTSTRAP_CHUNK_MB, path_budget=BOOTSTRAP_PATH_BUDGET):
+    """
+    Bootstrap distribution of each metric: {metric: array of resampled values}.
+    pnl is an array-like of per-trade pnl; NaNs are dropped. max_drawdown gets
+    min(resamples, path_budget / trades) resamples (at least MIN_PATH_RESAMPLES).
+    """
+    values = pd.to_numeric(pd.Series(pnl), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n < 2:
+        return {m: np.full(resamples, np.nan) for m in metrics}
+
+    distinct = len(np.unique(values))
+    use_counts = distinct <= n // 8
+    ratio_seed, path_seed = np.random.SeedSequence(seed).spawn(2)
+    tasks = []
+    ratio_metrics = [m for m in metrics if m != "max_drawdown"]
+    if ratio_metrics:
+        tasks += _chunks(ratio_seed, resamples, distinct if use_counts else n, ratio_metrics, use_counts, chunk_mb)
+    if "max_drawdown" in metrics:
+        paths = min(resamples, max(MIN_PATH_RESAMPLES, path_budget // n))
+        tasks += _chunks(path_seed, paths, n, ["max_drawdown"], False, chunk_mb)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        _init_worker(values)
+        try:
+            chunks = list(map(_run_chunk, tasks))
+        finally:
+            _shared.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(values,)) as pool:
+            chunks = list(pool.map(_run_chunk, tasks))
+    return {m: np.concatenate([c[m] for c in chunks if m in c]) for m in metrics}
+
+
+def confidence_intervals(pnl, confidence=0.95, resamples=BOOTSTRAP_RESAMPLES, metrics=CI_METRICS, seed=None,
+                         workers=1):
+    """Percentile bootstrap intervals: {metric: (low, high)}; NaN bounds for fewer than 2 trades."""
+    distributions = bootstrap_metrics(pnl, resamples, metrics, seed, workers)
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for metric, values in distributions.items():
+        if np.isnan(values).all():
+            intervals[metric] = (np.nan, np.nan)
+            continue
+        # Lower/higher order statistics keep infinite profit factors from turning into NaN
+        intervals[metric] = (float(np.quantile(values, tail, method="lower")),
+                             float(np.quantile(values, 1 - tail, method="higher")))
+    return intervals
+
+
+def ci_columns(intervals, confidence=0.95):
+    """Performance Summary columns, e.g. {"Sharpe 95% CI": "0.41 – 2.87"}."""
+    labels = {"sharpe": "Sharpe", "sortino": "Sortino", "profit_factor": "Profit Factor", "max_drawdown": "Max Drawdown"}
+    pct = f"{confidence * 100:g}%"
+    return {f"{labels.get(m, m)} {pct} CI": "" if np.isnan(low) else f"{low:.2f} – {high:.2f}"
+            for m, (low, high) in intervals.items()}
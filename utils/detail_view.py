@@ -0,0 +1,153 @@
+# utils/detail_view.py
+#
+# Per-strategy "Detailed View" and the portfolio view, shared by dashboard.py
+# and viewer_dashboard.py. Only called for the views the user actually opens.
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.downsample import CHART_MAX_POINTS, downsample_equity
+from utils.metric_registry import compute_metrics, detail_metrics
+from utils.metrics_cache import get_metrics_cache
+from utils.portfolio import build_portfolio
+from utils.rolling_metrics import rolling_metrics
+from utils.trade_table import page_count, page_frame
+
+PAGE_SIZES = [25, 50, 100, 250]
+ROLLING_WINDOWS = {"50 trades": 50, "200 trades": 200, "1000 trades": 1000,
+                   "7 days": "7D", "30 days": "30D", "90 days": "90D"}
+
+
+def chart_points_slider():
+    return st.sidebar.slider("Max chart points", 500, 20000, CHART_MAX_POINTS, step=500)
+
+
+def select_detail_views(names, key="detail_views"):
+    """Multiselect of strategies to open; nothing is rendered for the others."""
+    return st.multiselect("\U0001F4C2 Open detailed views", options=list(names), default=[], key=key)
+
+
+def render_trade_table(df, key):
+    """Paginated trade log: filter, sort and slice server-side, ship one page."""
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    actions = None
+    if "action" in df.columns:
+        actions = col1.multiselect("Action", sorted(df["action"].dropna().unique()), key=f"actions_{key}")
+    columns = list(df.columns)
+    sort_by = col2.selectbox(
+        "Sort by", columns, index=columns.index("timestamp") if "timestamp" in columns else 0, key=f"sort_{key}"
+    )
+    ascending = col3.checkbox("Ascending", value=False, key=f"asc_{key}")
+    page_size = col4.selectbox("Rows", PAGE_SIZES, index=1, key=f"page_size_{key}")
+
+    total = len(df) if not actions else int(df["action"].isin(actions).sum())
+    pages = page_count(total, page_size)
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"page_{key}")
+
+    rows, total = page_frame(df, page, page_size, sort_by, ascending, actions)
+    st.dataframe(rows, use_container_width=True)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, total):,}–{first + len(rows):,} of {total:,}")
+
+
+def render_strategy_detail(name, df, metrics=None, max_points=CHART_MAX_POINTS):
+    """
+    Render trade log, equity/drawdown charts and metrics for one strategy.
+    Pass the metrics already computed for the summary table; only the
+    detail metrics missing from them are computed here. Charts are
+    downsampled to about max_points points.
+    """
+    if df.empty or 'pnl' not in df.columns:
+        st.info("ℹ️ No trades generated for this strategy yet.")
+        return
+
+    st.write("### Trade Log")
+    render_trade_table(df, key=name)
+
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        df = df.dropna(subset=["timestamp"])
+
+    if not df.empty:
+        st.write("### Equity Curve")
+        df['cumulative_pnl'] = df['pnl'].cumsum()
+        equity = df.set_index("timestamp")["cumulative_pnl"]
+        equity_chart, drawdown_chart = downsample_equity(equity, max_points)
+        st.line_chart(equity_chart)
+        if len(equity_chart) < len(equity):
+            st.caption(f"Showing {len(equity_chart):,} of {len(equity):,} points (endpoints and max drawdown kept)")
+
+        if drawdown_chart.max() > 0:
+            st.write("### Drawdown Curve")
+            st.area_chart(drawdown_chart)
+        else:
+            st.info("✅ No drawdown detected - all trades are profitable or flat")
+    else:
+        st.warning(f"No valid 'pnl' data available for {name}.")
+
+    if len(df) >= 2:
+        render_rolling_metrics(name, df, max_points)
+
+    if 'duration' in df.columns:
+        st.write("### Trade Duration Distribution")
+        st.bar_chart(df['duration'])
+
+    st.write("### Additional Metrics")
+    details = dict(metrics or {})
+    missing = [name for name in detail_metrics() if name not in details]
+    if missing:
+        details.update(get_metrics_cache().get_or_compute(df, f"detail:{','.join(missing)}",
+                                                          lambda: compute_metrics(df, missing)))
+    st.json(details)
+
+
+def render_rolling_metrics(name, df, max_points=CHART_MAX_POINTS):
+    """Rolling Sharpe/Sortino, win rate, profit factor and drawdown, evaluated at about max_points trades."""
+    st.write("### Rolling Metrics")
+    options = [k for k, v in ROLLING_WINDOWS.items() if isinstance(v, int) or 'timestamp' in df.columns]
+    window = st.selectbox("Rolling window", options, index=1, key=f"rolling_{name}")
+    rolling = rolling_metrics(df, ROLLING_WINDOWS[window], points=max_points)
+
+    col1, col2 = st.columns(2)
+    col1.caption("Sharpe / Sortino")
+    col1.line_chart(rolling[["sharpe", "sortino"]])
+    col2.caption("Win rate (%)")
+    col2.line_chart(rolling["win_rate"])
+    col1.caption("Profit factor")
+    col1.line_chart(rolling["profit_factor"].replace(np.inf, np.nan))
+    col2.caption("Drawdown from window peak")
+    col2.area_chart(rolling["drawdown"])
+
+
+def render_portfolio(frames, max_points=CHART_MAX_POINTS):
+    """Combined equity, per-strategy contributions and PnL correlation across trade logs."""
+    portfolio = build_portfolio(frames)
+    equity = portfolio["equity"]
+    if equity.empty:
+        st.info("ℹ️ No trades with timestamps and pnl to combine yet.")
+        return
+
+    metrics = portfolio["metrics"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total P/L", f"{metrics['total_pnl']:,.2f}")
+    col2.metric("Sharpe", f"{metrics['sharpe']:.2f}")
+    col3.metric("Sortino", f"{metrics['sortino']:.2f}")
+    col4.metric("Max Drawdown", f"{metrics['max_drawdown']:,.2f}")
+
+    st.write("### Portfolio Equity")
+    equity_chart, drawdown_chart = downsample_equity(equity, max_points)
+    st.line_chart(equity_chart)
+    if drawdown_chart.max() > 0:
+        st.area_chart(drawdown_chart)
+
+    st.write("### Contribution by Strategy")
+    contributions = portfolio["contributions"]
+    if len(contributions) > max_points:
+        contributions = contributions.iloc[np.unique(np.linspace(0, len(contributions) - 1, max_points).astype(int))]
+    st.line_chart(contributions)
+
+    if len(portfolio["correlation"]) > 1:
+        st.write("### Daily PnL Correlation")
+        st.dataframe(portfolio["correlation"].style.background_gradient(cmap="RdYlGn", vmin=-1, vmax=1).format("{:.2f}"),
+                     use_container_width=True)
@@ -0,0 +1,111 @@
+# utils/downsample.py
+#
+# Visual-preserving downsampling of equity / drawdown series before charting,
+# so the browser receives a bounded number of points however long the log is.
+# Endpoints and the max-drawdown peak/trough are always kept.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "2000"))
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of each of n_out // 2 equal-width buckets."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    buckets = max(1, n_out // 2)
+    starts = (np.arange(buckets) * n) // buckets
+    counts = np.diff(np.append(starts, n))
+    bucket_of = np.repeat(np.arange(buckets), counts)
+
+    picked = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), counts)
+        hits = np.flatnonzero(y == extreme)
+        # First hit per bucket (ties keep the earliest point)
+        _, first = np.unique(bucket_of[hits], return_index=True)
+        picked.append(hits[first])
+    return np.union1d(picked[0], picked[1])
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of n_out indices."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point)
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def max_drawdown_indices(equity):
+    """(peak, trough) positions of the largest peak-to-trough drop."""
+    if len(equity) == 0:
+        return 0, 0
+    # fmax skips NaN like pandas' cummax; nanargmax ignores NaN positions
+    running_peak = np.fmax.accumulate(equity)
+    drop = running_peak - equity
+    if np.isnan(drop).all():
+        return 0, 0
+    trough = int(np.nanargmax(drop))
+    peak = int(np.nanargmax(equity[:trough + 1])) if trough else 0
+    return peak, trough
+
+
+def downsample_series(series, max_points=CHART_MAX_POINTS, method="minmax", keep=()):
+    """
+    Reduce a chart series to about max_points points.
+
+    method is "minmax" (per-bucket min and max, preserves spikes) or "lttb".
+    The first and last points and every position in keep are always included.
+    """
+    n = len(series)
+    if n <= max_points:
+        return series
+
+    y = series.to_numpy(dtype="float64")
+    if method == "lttb":
+        index = series.index
+        if isinstance(index, pd.DatetimeIndex):
+            x = index.asi8.astype("float64")
+        else:
+            x = np.arange(n, dtype="float64")
+        idx = lttb_indices(x, y, max_points)
+    else:
+        idx = minmax_indices(y, max_points)
+
+    forced = np.array([0, n - 1, *keep], dtype=np.int64)
+    idx = np.union1d(idx, forced)
+    return series.iloc[idx]
+
+
+def downsample_equity(equity, max_points=CHART_MAX_POINTS, method="minmax"):
+    """
+    Downsample an equity curve and its drawdown, keeping the max-drawdown
+    points. Missing values (trades with NaN pnl) are dropped first.
+    """
+    equity = equity[equity.notna()]
+    values = equity.to_numpy(dtype="float64")
+    peak, trough = max_drawdown_indices(values)
+    drawdown = pd.Series(np.maximum.accumulate(values) - values, index=equity.index, name="drawdown")
+    return (
+        downsample_series(equity, max_points, method, keep=(peak, trough)),
+        downsample_series(drawdown, max_points, method, keep=(trough,)),
+    )
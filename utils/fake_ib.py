@@ -0,0 +1,104 @@
+# utils/fake_ib.py
+#
+# Local fake IB server for exercising utils.ib_broker without TWS.
+# FakeIBServer answers requests from its own thread, as TWS callbacks arrive
+# on the reader thread: historical requests get the scripted bars of the
+# contract's symbol followed by historicalDataEnd, market data requests one
+# tick per scripted price, orders an immediate fill. Requests for symbols
+# listed in `fail` get an error instead. Every request received is recorded.
+#
+#   server = FakeIBServer(bars={"MSFT": [410.0, 411.5]})
+#   broker = IBBroker("127.0.0.1", 7497, connection_factory=server.connection)
+
+import queue
+import threading
+
+from utils.ib_broker import BrokerConnection
+from utils.sim_broker import SimBar
+
+LAST_PRICE = 4  # tickType of the last traded price
+
+
+class FakeIBServer:
+    def __init__(self, bars=None, prices=None, first_order_id=1, fail=()):
+        self.bars = dict(bars or {})
+        self.prices = dict(prices or {})
+        self.first_order_id = first_order_id
+        self.fail = set(fail)
+        self.requests = []   # (method, global id) in arrival order
+        self._events = queue.Queue()
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="fake-ib-server")
+        self._thread.start()
+
+    def connection(self, broker, client_id):
+        """IBBroker connection_factory."""
+        return FakeConnection(broker, client_id, self)
+
+    def send(self, callback, *args):
+        self._events.put((callback, args))
+
+    def _serve(self):
+        while True:
+            callback, args = self._events.get()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"❌ Fake IB callback failed: {e!r}")
+
+    def receive(self, conn, method, req_id, contract=None):
+        self.requests.append((method, req_id))
+        symbol = getattr(contract, "symbol", None)
+        if symbol in self.fail:
+            self.send(conn.error, req_id, 200, "No security definition has been found for the request")
+            return
+        if method == "reqHistoricalData":
+            for i, close in enumerate(self.bars.get(symbol, [])):
+                self.send(conn.historicalData, req_id, SimBar(f"2024-01-{i + 1:02d}", close, close, close, close))
+            self.send(conn.historicalDataEnd, req_id, "", "")
+        elif method == "reqMktData":
+            for price in self.prices.get(symbol, []):
+                self.send(conn.tickPrice, req_id, LAST_PRICE, price, None)
+
+
+class FakeConnection(BrokerConnection):
+    """BrokerConnection whose EClient side talks to a FakeIBServer instead of a socket."""
+
+    def __init__(self, broker, client_id, server):
+        super().__init__(broker, client_id)
+        self.server = server
+        self.connected = False
+
+    def start(self, host, port, timeout=10):
+        self.connected = True
+        self.server.send(self.nextValidId, self.server.first_order_id)
+        if not self.ready.wait(timeout):
+            raise ConnectionError(f"No nextValidId from the fake server (clientId {self.client_id})")
+
+    def isConnected(self):
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+
+    def reqHistoricalData(self, reqId, contract, *args):
+        self.server.receive(self, "reqHistoricalData", reqId, contract)
+
+    def reqMktData(self, reqId, contract, *args):
+        self.server.receive(self, "reqMktData", reqId, contract)
+
+    def reqRealTimeBars(self, reqId, contract, *args):
+        self.server.receive(self, "reqRealTimeBars", reqId, contract)
+
+    def reqAccountSummary(self, reqId, groupName, tags):
+        self.server.receive(self, "reqAccountSummary", reqId)
+
+    def cancelMktData(self, reqId):
+        self.server.receive(self, "cancelMktData", reqId)
+
+    def cancelRealTimeBars(self, reqId):
+        self.server.receive(self, "cancelRealTimeBars", reqId)
+
+    def placeOrder(self, orderId, contract, order):
+        self.server.requests.append(("placeOrder", orderId))
+        price = getattr(order, "lmtPrice", 0.0)
+        self.server.send(self.orderStatus, orderId, "Filled", order.totalQuantity, 0, price, 0, 0, price, 0, "", 0)
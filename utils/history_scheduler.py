@@ -0,0 +1,152 @@
+# utils/history_scheduler.py
+#
+# Concurrent reqHistoricalData for a watchlist. Every symbol gets its own
+# reqId, up to MAX_IN_FLIGHT requests are open at once, and request starts are
+# paced by a token bucket instead of fixed sleeps. Sending happens on a
+# scheduler thread, so the IB reader thread never blocks.
+
+import itertools
+import os
+import threading
+
+from utils.pacing import historical_bucket
+
+# IB allows at most 50 simultaneous open historical requests
+MAX_IN_FLIGHT = int(os.getenv("IB_HISTORY_IN_FLIGHT", "50"))
+
+# One bucket per process: the historical pacing limit is shared by all schedulers
+_bucket = historical_bucket()
+
+# One reqId sequence per process, well above the strategies' own reqIds and
+# order ids, so late callbacks from an earlier scheduler never match a new request
+FIRST_REQ_ID = int(os.getenv("IB_HISTORY_FIRST_REQ_ID", "50000000"))
+_req_ids = itertools.count(FIRST_REQ_ID)
+
+# Pacing violations (error 162) are retried with exponential backoff
+PACING_RETRIES = int(os.getenv("IB_HISTORY_PACING_RETRIES", "3"))
+PACING_BACKOFF = float(os.getenv("IB_HISTORY_PACING_BACKOFF", "15"))
+
+
+class HistoryRequest:
+    def __init__(self, key, contract, durationStr, barSizeSetting, whatToShow,
+                 useRTH=0, endDateTime="", formatDate=1):
+        self.key = key
+        self.contract = contract
+        self.endDateTime = endDateTime
+        self.durationStr = durationStr
+        self.barSizeSetting = barSizeSetting
+        self.whatToShow = whatToShow
+        self.useRTH = useRTH
+        self.formatDate = formatDate
+        self.bars = []
+        self.error = None
+        self.retries = 0
+
+
+class HistoryScheduler:
+    """
+    Fans reqHistoricalData out over many keys (usually symbols) on one client.
+
+    The client forwards historicalData, historicalDataEnd and error to
+    on_bar, on_end and on_error. on_complete(request) runs on the reader thread
+    when each request finishes, and on_done() runs once all have finished.
+    Request ids come from the process-wide sequence unless req_ids (an
+    iterator) is given.
+    """
+
+    def __init__(self, client, on_complete, on_done=None, bucket=None,
+                 max_in_flight=MAX_IN_FLIGHT, req_ids=None):
+        self.client = client
+        self.on_complete = on_complete
+        self.on_done = on_done
+        # A brokered client is already paced by the broker
+        if bucket is None and getattr(client, "_broker", None) is None:
+            bucket = _bucket
+        self.bucket = bucket
+        self._slots = threading.Semaphore(max_in_flight)
+        self._req_ids = req_ids if req_ids is not None else _req_ids
+        self._pending = {}
+        self._remaining = 0
+        self._lock = threading.Lock()
+
+    def submit(self, requests):
+        """Start fetching `requests` in the background; returns immediately."""
+        requests = list(requests)
+        with self._lock:
+            self._remaining += len(requests)
+        if not requests:
+            self._finish(None)
+            return
+        threading.Thread(target=self._send_all, args=(requests,), daemon=True,
+                         name="history-scheduler").start()
+
+    def _send_all(self, requests):
+        for request in requests:
+            self._slots.acquire()
+            if self.bucket is not None:
+                self.bucket.acquire()
+            req_id = next(self._req_ids)
+            with self._lock:
+                self._pending[req_id] = request
+            self.client.reqHistoricalData(
+                reqId=req_id,
+                contract=request.contract,
+                endDateTime=request.endDateTime,
+                durationStr=request.durationStr,
+                barSizeSetting=request.barSizeSetting,
+                whatToShow=request.whatToShow,
+                useRTH=request.useRTH,
+                formatDate=request.formatDate,
+                keepUpToDate=False,
+                chartOptions=[]
+            )
+
+    def on_bar(self, reqId, bar):
+        request = self._pending.get(reqId)
+        if request is not None:
+            request.bars.append(bar)
+
+    def on_end(self, reqId):
+        with self._lock:
+            request = self._pending.pop(reqId, None)
+        if request is not None:
+            self._finish(request)
+
+    def on_error(self, reqId, errorCode, errorString):
+        if 2100 <= errorCode < 2200:
+            return  # Informational warnings, the request continues
+        with self._lock:
+            request = self._pending.pop(reqId, None)
+        if request is None:
+            return
+        if errorCode == 162 and "pacing" in str(errorString).lower() and request.retries < PACING_RETRIES:
+            self._retry(request)
+            return
+        request.error = f"{errorCode}: {errorString}"
+        self._finish(request)
+
+    def _retry(self, request):
+        # Free the slot now; the request goes out again after the backoff
+        self._slots.release()
+        delay = PACING_BACKOFF * 2 ** request.retries
+        request.retries += 1
+        request.bars = []
+        print(f"⏳ Pacing violation for {request.key}; retrying in {delay:.0f}s")
+        timer = threading.Timer(delay, self._send_all, args=([request],))
+        timer.daemon = True
+        timer.start()
+
+    def _finish(self, request):
+        if request is not None:
+            self._slots.release()
+            try:
+                self.on_complete(request)
+            except Exception as e:
+                print(f"❌ History callback failed for {request.key}: {e!r}")
+            with self._lock:
+                self._remaining -= 1
+                done = self._remaining == 0
+        else:
+            done = True
+        if done and self.on_done is not None:
+            self.on_done()
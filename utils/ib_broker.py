@@ -0,0 +1,354 @@
+# utils/ib_broker.py
+#
+# Shared, pooled IB connections for all EWrapper strategies.
+#
+# Each trader normally opens its own EClient socket and reader thread. With
+# IB_BROKER=1 a trader that mixes in BrokeredClient instead registers with a
+# process-wide IBBroker which:
+#   * holds a small pool of EClient connections (IB_BROKER_POOL, default 1),
+#   * maps every strategy's local reqIds (they all use reqId=1, 2, ...) to
+#     unique global ids and routes callbacks back by reqId,
+#   * allocates order ids centrally so strategies never collide,
+#   * sends every request through dispatchers that enforce IB pacing; paced
+#     historical requests have their own queue so orders never wait on them.
+#
+# The connection class is injectable (connection_factory) so the broker can
+# be exercised against a local fake IB server instead of TWS.
+
+import itertools
+import os
+import queue
+import threading
+
+from ibapi.client import EClient
+from ibapi.wrapper import EWrapper
+
+from utils.pacing import historical_bucket, message_bucket
+
+BROKER_ENABLED = os.getenv("IB_BROKER", "0") == "1"
+POOL_SIZE = int(os.getenv("IB_BROKER_POOL", "1"))
+BASE_CLIENT_ID = int(os.getenv("IB_BROKER_CLIENT_ID", "100"))
+
+# Callbacks whose first argument is a reqId
+REQ_CALLBACKS = (
+    "historicalData", "historicalDataEnd", "historicalDataUpdate",
+    "tickPrice", "tickSize", "tickString", "tickGeneric",
+    "realtimeBar", "accountSummary", "accountSummaryEnd", "tickSnapshotEnd",
+)
+# Error codes that are warnings: the request stays alive
+WARNING_CODES = set(range(2100, 2200)) | {399, 10167}
+# Callbacks whose first argument is an orderId
+ORDER_CALLBACKS = ("orderStatus", "openOrder")
+
+
+def _req_callback(name):
+    def callback(self, reqId, *args):
+        self.broker.dispatch_request(name, reqId, args)
+    callback.__name__ = name
+    return callback
+
+
+def _order_callback(name):
+    def callback(self, orderId, *args):
+        self.broker.dispatch_order(name, orderId, args)
+    callback.__name__ = name
+    return callback
+
+
+class BrokerConnection(EWrapper, EClient):
+    """One pooled socket; every callback is handed to the broker for routing."""
+
+    def __init__(self, broker, client_id):
+        EClient.__init__(self, self)
+        self.broker = broker
+        self.client_id = client_id
+        self.ready = threading.Event()
+        self.clients = 0
+
+    def start(self, host, port, timeout=10):
+        self.connect(host, port, clientId=self.client_id)
+        threading.Thread(target=self.run, daemon=True, name=f"ib-broker-{self.client_id}").start()
+        if not self.ready.wait(timeout):
+            raise ConnectionError(f"No nextValidId from {host}:{port} (clientId {self.client_id})")
+
+    def nextValidId(self, orderId):
+        self.broker.seed_order_id(orderId)
+        self.ready.set()
+
+    def execDetails(self, reqId, contract, execution):
+        self.broker.dispatch_order("execDetails", execution.orderId, (contract, execution), req_id=reqId)
+
+    def error(self, reqId, *args):
+        self.broker.dispatch_error(reqId, args)
+
+
+for _name in REQ_CALLBACKS:
+    setattr(BrokerConnection, _name, _req_callback(_name))
+for _name in ORDER_CALLBACKS:
+    setattr(BrokerConnection, _name, _order_callback(_name))
+
+
+class IBBroker:
+    def __init__(self, host="127.0.0.1", port=7497, pool_size=POOL_SIZE,
+                 base_client_id=BASE_CLIENT_ID, connection_factory=BrokerConnection):
+        self.host = host
+        self.port = port
+        self.pool_size = max(1, pool_size)
+        self.base_client_id = base_client_id
+        self.connection_factory = connection_factory
+
+        self._lock = threading.Lock()
+        self._order_lock = threading.Lock()  # nextValidId arrives while register() holds _lock
+        self._connections = []
+        self._req_ids = itertools.count(1000)
+        self._requests = {}   # global reqId -> (client, local reqId, final callback or None)
+        self._local = {}      # (client, local reqId) -> global reqId
+        self._orders = {}     # global orderId -> (client, local orderId)
+        self._next_order_id = 0
+
+        self.buckets = {"messages": message_bucket(), "historical": historical_bucket()}
+        self._outbox = queue.Queue()
+        self._history_outbox = queue.Queue()
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch_loop, args=(self._outbox,), daemon=True, name="ib-broker-dispatch"),
+            threading.Thread(target=self._dispatch_loop, args=(self._history_outbox,), daemon=True,
+                             name="ib-broker-history"),
+        ]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    # --- connection pool ----------------------------------------------------
+
+    def register(self, client):
+        """Attach a strategy to the least loaded pooled connection."""
+        with self._lock:
+            if len(self._connections) < self.pool_size and all(c.clients for c in self._connections):
+                conn = self.connection_factory(self, self.base_client_id + len(self._connections))
+                conn.start(self.host, self.port)
+                self._connections.append(conn)
+            conn = min(self._connections, key=lambda c: c.clients)
+            conn.clients += 1
+            return conn
+
+    def unregister(self, client, conn):
+        with self._lock:
+            conn.clients -= 1
+            self._requests = {k: v for k, v in self._requests.items() if v[0] is not client}
+            self._local = {k: v for k, v in self._local.items() if k[0] is not client}
+            self._orders = {k: v for k, v in self._orders.items() if v[0] is not client}
+
+    def shutdown(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.disconnect()
+            self._connections.clear()
+
+    # --- id allocation ------------------------------------------------------
+
+    def seed_order_id(self, order_id):
+        with self._order_lock:
+            self._next_order_id = max(self._next_order_id, order_id)
+
+    def next_order_id(self):
+        with self._order_lock:
+            order_id = self._next_order_id
+            self._next_order_id += 1
+            return order_id
+
+    def map_request(self, client, local_id, final=None):
+        """
+        Global reqId for a strategy's local one. A reused local id replaces its
+        old mapping; the mapping is dropped when the `final` callback (e.g.
+        historicalDataEnd) or an error arrives, or on release_request().
+        """
+        with self._lock:
+            old = self._local.pop((client, local_id), None)
+            if old is not None:
+                self._requests.pop(old, None)
+            global_id = next(self._req_ids)
+            self._requests[global_id] = (client, local_id, final)
+            self._local[(client, local_id)] = global_id
+            return global_id
+
+    def release_request(self, global_id):
+        with self._lock:
+            target = self._requests.pop(global_id, None)
+            if target is not None and self._local.get(target[:2]) == global_id:
+                del self._local[target[:2]]
+
+    def map_order(self, client, local_id):
+        global_id = self.next_order_id()
+        with self._lock:
+            self._orders[global_id] = (client, local_id)
+        return global_id
+
+    def global_request_ids(self, client, local_id):
+        with self._lock:
+            global_id = self._local.get((client, local_id))
+            return [global_id] if global_id is not None else []
+
+    # --- paced sending ------------------------------------------------------
+
+    def submit(self, buckets, fn, *args):
+        """
+        Queue a request; a dispatcher sends it once the pacing buckets allow.
+        Historical requests wait on their own thread, so orders and cancels
+        queued behind them go out at the message rate.
+        """
+        outbox = self._history_outbox if "historical" in buckets else self._outbox
+        outbox.put((buckets, fn, args))
+
+    def _dispatch_loop(self, outbox):
+        while True:
+            buckets, fn, args = outbox.get()
+            for name in buckets:
+                self.buckets[name].acquire()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ IB broker send failed: {e!r}")
+
+    # --- callback routing ---------------------------------------------------
+
+    def dispatch_request(self, name, global_id, args):
+        target = self._requests.get(global_id)
+        if target is not None:
+            client, local_id, final = target
+            if name == final:
+                self.release_request(global_id)
+            getattr(client, name)(local_id, *args)
+
+    def dispatch_order(self, name, global_id, args, req_id=None):
+        target = self._orders.get(global_id)
+        if target is None:
+            return
+        client, local_id = target
+        if name == "execDetails":
+            args[1].orderId = local_id
+            getattr(client, name)(req_id, *args)
+        else:
+            getattr(client, name)(local_id, *args)
+
+    def dispatch_error(self, global_id, args):
+        request = self._requests.get(global_id)
+        if request is not None:
+            client, local_id, _ = request
+            if not args or args[0] not in WARNING_CODES:
+                self.release_request(global_id)
+            client.error(local_id, *args)
+            return
+        target = self._orders.get(global_id)
+        if target is not None:
+            client, local_id = target
+            client.error(local_id, *args)
+        elif global_id == -1 or global_id is None:
+            print(f"ℹ️ IB: {args}")
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker(host, port):
+    with _brokers_lock:
+        broker = _brokers.get((host, port))
+        if broker is None:
+            broker = IBBroker(host, port)
+            _brokers[(host, port)] = broker
+        return broker
+
+
+class BrokeredClient:
+    """
+    Mixin for EWrapper/EClient traders: list it first in the bases, e.g.
+    class SMA200Trader(BrokeredClient, EWrapper, EClient). With IB_BROKER=1
+    the EClient calls below go through the shared broker; otherwise they
+    fall straight through to EClient.
+    """
+
+    _broker = None
+    _broker_conn = None
+
+    def connect(self, host, port, clientId):
+        if not BROKER_ENABLED:
+            return super().connect(host, port, clientId)
+        self._broker = get_broker(host, port)
+        self._broker_conn = self._broker.register(self)
+        self._broker_stopped = threading.Event()
+        self._streams = set()
+
+    def run(self):
+        if self._broker is None:
+            return super().run()
+        # Stand-in for the reader thread: hand out an order id, then idle
+        self.nextValidId(self._broker.next_order_id())
+        self._broker_stopped.wait()
+
+    def isConnected(self):
+        if self._broker is None:
+            return super().isConnected()
+        return not self._broker_stopped.is_set() and self._broker_conn.isConnected()
+
+    def disconnect(self):
+        if self._broker is None:
+            return super().disconnect()
+        for cancel, local_id in list(self._streams):
+            cancel(local_id)
+        self._broker.unregister(self, self._broker_conn)
+        self._broker_stopped.set()
+        self._broker = None
+
+    def _send(self, buckets, method, local_id, *args, final=None):
+        global_id = self._broker.map_request(self, local_id, final)
+        self._broker.submit(buckets, getattr(self._broker_conn, method), global_id, *args)
+
+    def _cancel(self, method, local_id):
+        for global_id in self._broker.global_request_ids(self, local_id):
+            self._broker.release_request(global_id)
+            self._broker.submit(["messages"], getattr(self._broker_conn, method), global_id)
+
+    def reqHistoricalData(self, reqId, contract, endDateTime, durationStr, barSizeSetting,
+                          whatToShow, useRTH, formatDate, keepUpToDate, chartOptions):
+        args = (contract, endDateTime, durationStr, barSizeSetting, whatToShow, useRTH, formatDate, keepUpToDate, chartOptions)
+        if self._broker is None:
+            return super().reqHistoricalData(reqId, *args)
+        self._send(["historical", "messages"], "reqHistoricalData", reqId, *args,
+                   final=None if keepUpToDate else "historicalDataEnd")
+
+    def reqMktData(self, reqId, contract, genericTickList, snapshot, regulatorySnapshot, mktDataOptions):
+        args = (contract, genericTickList, snapshot, regulatorySnapshot, mktDataOptions)
+        if self._broker is None:
+            return super().reqMktData(reqId, *args)
+        if snapshot or regulatorySnapshot:
+            self._send(["messages"], "reqMktData", reqId, *args, final="tickSnapshotEnd")
+            return
+        self._streams.add((self.cancelMktData, reqId))
+        self._send(["messages"], "reqMktData", reqId, *args)
+
+    def reqRealTimeBars(self, reqId, contract, barSize, whatToShow, useRTH, realTimeBarsOptions):
+        args = (contract, barSize, whatToShow, useRTH, realTimeBarsOptions)
+        if self._broker is None:
+            return super().reqRealTimeBars(reqId, *args)
+        self._streams.add((self.cancelRealTimeBars, reqId))
+        self._send(["messages"], "reqRealTimeBars", reqId, *args)
+
+    def reqAccountSummary(self, reqId, groupName, tags):
+        if self._broker is None:
+            return super().reqAccountSummary(reqId, groupName, tags)
+        self._send(["messages"], "reqAccountSummary", reqId, groupName, tags)
+
+    def cancelMktData(self, reqId):
+        if self._broker is None:
+            return super().cancelMktData(reqId)
+        self._cancel("cancelMktData", reqId)
+
+    def cancelRealTimeBars(self, reqId):
+        if self._broker is None:
+            return super().cancelRealTimeBars(reqId)
+        self._cancel("cancelRealTimeBars", reqId)
+
+    def placeOrder(self, orderId, contract, order):
+        if self._broker is None:
+            return super().placeOrder(orderId, contract, order)
+        global_id = self._broker.map_order(self, orderId)
+        self._broker.submit(["messages"], self._broker_conn.placeOrder, global_id, contract, order)
@@ -0,0 +1,191 @@
+# utils/indicators.py
+#
+# Incremental indicators for streaming strategies. Each one keeps its window
+# in a preallocated NumPy ring buffer and updates in O(1) per tick; running
+# sums are recomputed from the buffer once per wrap so float drift cannot
+# accumulate. extend() seeds an indicator from a history array in one step.
+
+import math
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size float64 window; `push` returns the value that fell out (or None)."""
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = size
+        self.values = np.zeros(size, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+
+    def push(self, value):
+        evicted = float(self.values[self.index]) if self.count == self.size else None
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        return evicted
+
+    def fill(self, values):
+        """Replace the contents with the last `size` entries of `values` (oldest first)."""
+        tail = np.asarray(values, dtype=np.float64)[-self.size:]
+        self.values[:len(tail)] = tail
+        self.count = len(tail)
+        self.index = self.count % self.size
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    @property
+    def wrapped(self):
+        return self.full and self.index == 0
+
+    def window(self):
+        """Current window in arrival order (allocates; not for the hot path)."""
+        if not self.full:
+            return self.values[:self.count].copy()
+        return np.concatenate((self.values[self.index:], self.values[:self.index]))
+
+
+class SMA:
+    """Simple moving average; `value` is None until `window` prices have been seen."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.value = None
+
+    def update(self, price):
+        price = float(price)
+        evicted = self.buffer.push(price)
+        if self.buffer.wrapped:
+            self.total = float(self.buffer.values.sum())
+        else:
+            self.total += price - (evicted or 0.0)
+        if self.buffer.full:
+            self.value = self.total / self.window
+        return self.value
+
+    def extend(self, prices):
+        """Seed from (or continue with) a history array; returns self."""
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) >= self.window:
+            self.buffer.fill(prices)
+            self.total = float(self.buffer.values.sum())
+            self.value = self.total / self.window
+        else:
+            for price in prices:
+                self.update(price)
+        return self
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+
+class EMA:
+    """
+    Exponential moving average with alpha = 2 / (span + 1), seeded with the
+    first price (pandas ewm(span, adjust=False)). `ready` once `span` prices
+    have been seen.
+    """
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.count = 0
+        self.value = None
+
+    def update(self, price):
+        price = float(price)
+        if self.value is None:
+            self.value = price
+        else:
+            self.value += self.alpha * (price - self.value)
+        self.count += 1
+        return self.value
+
+    def extend(self, prices):
+        for price in np.asarray(prices, dtype=np.float64):
+            self.update(price)
+        return self
+
+    @property
+    def ready(self):
+        return self.count >= self.span
+
+
+class RollingStd:
+    """Rolling standard deviation (ddof=1 like pandas) over `window` prices."""
+
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.value = None
+
+    def _resync(self):
+        values = self.buffer.values[:self.buffer.count]
+        self.total = float(values.sum())
+        self.total_sq = float(np.dot(values, values))
+
+    def _finish(self):
+        n = self.buffer.count
+        if self.buffer.full and n > self.ddof:
+            var = (self.total_sq - self.total * self.total / n) / (n - self.ddof)
+            self.value = math.sqrt(max(var, 0.0))
+        return self.value
+
+    def update(self, price):
+        price = float(price)
+        evicted = self.buffer.push(price)
+        if self.buffer.wrapped:
+            self._resync()
+        else:
+            old = evicted or 0.0
+            self.total += price - old
+            self.total_sq += price * price - old * old
+        return self._finish()
+
+    def extend(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) >= self.window:
+            self.buffer.fill(prices)
+            self._resync()
+            self._finish()
+            return self
+        for price in prices:
+            self.update(price)
+        return self
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+
+class Crossover:
+    """
+    Tracks which of two series is on top. update(a, b) returns 1 when `a`
+    crosses above `b`, -1 when it crosses below, and 0 otherwise (including
+    the first comparison and ties).
+    """
+
+    def __init__(self):
+        self.state = 0
+
+    def update(self, a, b):
+        if a is None or b is None:
+            return 0
+        state = int(a > b) - int(a < b)
+        if state == 0:
+            return 0
+        crossed = state if self.state and state != self.state else 0
+        self.state = state
+        return crossed
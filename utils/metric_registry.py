@@ -0,0 +1,299 @@
+# utils/metric_registry.py
+#
+# Registry of the performance metrics. Each metric declares the intermediates
+# it needs (cumulative pnl, win mask, downside returns, durations, ...); the
+# engine computes every intermediate at most once per trade log and evaluates
+# only the metrics a view asks for. Adding a metric is one @metric function:
+# calculate_metrics, default_metrics and the dashboards' summary table all
+# read the registry.
+
+import numpy as np
+import pandas as pd
+
+METRICS = {}
+INTERMEDIATES = {}
+
+
+class Metric:
+    def __init__(self, name, func, needs=(), label=None, digits=2, default=0.0, few=None, summary=True, core=True):
+        self.name = name
+        self.func = func
+        self.needs = tuple(needs)
+        self.label = label or name.replace("_", " ").title()
+        self.digits = digits
+        self.default = default
+        self.few = few
+        self.summary = summary
+        self.core = core
+
+
+def intermediate(name):
+    """Register a lazily computed, memoized intermediate: func(ctx) -> value."""
+    def register(func):
+        INTERMEDIATES[name] = func
+        return func
+    return register
+
+
+def metric(name, needs=(), label=None, digits=2, default=0.0, few=None, summary=True, core=True):
+    """
+    Register a metric: func(ctx) -> value, evaluated for logs with at least
+    two trades and a non-zero total. `few` (ctx -> value) covers logs with
+    fewer than two trades, otherwise `default` is used. `summary` puts it in
+    the Performance Summary; non-core metrics are only shown in detail views.
+    """
+    def register(func):
+        METRICS[name] = Metric(name, func, needs, label, digits, default, few, summary, core)
+        return func
+    return register
+
+
+class MetricContext:
+    """Per-log cache of intermediates over a NaN-free pnl array (and durations)."""
+
+    def __init__(self, values, durations=None):
+        self.values = values
+        self.durations = durations
+        self._cache = {}
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            self._cache[name] = INTERMEDIATES[name](self)
+        return self._cache[name]
+
+
+def evaluate(values, durations=None, names=None, few_trades=True):
+    """
+    Evaluate the named metrics (default: the core set) over `values`, a
+    float64 pnl array with NaNs removed, and optional NaN-free `durations`.
+    With few_trades=False logs of fewer than two trades get the defaults
+    instead of the `few` values (the metrics_from_arrays behaviour).
+    """
+    names = core_metrics() if names is None else names
+    ctx = MetricContext(values, durations)
+    n = len(values)
+    if n < 2 and few_trades:
+        return {name: METRICS[name].few(ctx) if METRICS[name].few else METRICS[name].default for name in names}
+    if n < 2 or ctx["total"] == 0:
+        return {name: METRICS[name].default for name in names}
+
+    result = {}
+    for name in names:
+        m = METRICS[name]
+        for dependency in m.needs:
+            ctx[dependency]
+        result[name] = m.func(ctx)
+    return result
+
+
+def compute_metrics(df, names=None):
+    """Metrics of a trade log DataFrame (pnl and optional duration columns)."""
+    names = core_metrics() if names is None else names
+    if df is None or df.empty or "pnl" not in df.columns:
+        return {name: METRICS[name].default for name in names}
+    values = _finite(df["pnl"])
+    durations = _finite(df["duration"]) if "duration" in df.columns else None
+    return evaluate(values, durations, names)
+
+
+def core_metrics():
+    return [name for name, m in METRICS.items() if m.core]
+
+
+def detail_metrics():
+    return list(METRICS)
+
+
+def summary_row(metrics, names=None):
+    """Performance Summary row {label: rounded value} for a metrics dict (metrics flagged summary=True)."""
+    if names is None:
+        names = [name for name, m in METRICS.items() if m.summary]
+    row = {}
+    for name in names:
+        m = METRICS[name]
+        value = metrics.get(name, m.default)
+        row[m.label] = round(value, m.digits) if m.digits is not None else value
+    return row
+
+
+def _finite(series):
+    # Float64 view of a column with NaNs dropped (no pandas copy involved)
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+# --- intermediates ----------------------------------------------------------
+
+@intermediate("n")
+def _n(ctx):
+    return len(ctx.values)
+
+
+@intermediate("total")
+def _total(ctx):
+    return ctx.values.sum()
+
+
+@intermediate("mean")
+def _mean(ctx):
+    return ctx["total"] / ctx["n"]
+
+
+@intermediate("std")
+def _std(ctx):
+    return ctx.values.std(ddof=1)
+
+
+@intermediate("cumulative_pnl")
+def _cumulative_pnl(ctx):
+    return np.cumsum(ctx.values)
+
+
+@intermediate("drawdown")
+def _drawdown(ctx):
+    curve = ctx["cumulative_pnl"]
+    peak = np.maximum.accumulate(curve)
+    np.subtract(peak, curve, out=peak)
+    return peak
+
+
+@intermediate("win_mask")
+def _win_mask(ctx):
+    return ctx.values > 0
+
+
+@intermediate("wins")
+def _wins(ctx):
+    return ctx.values[ctx["win_mask"]]
+
+
+@intermediate("losses")
+def _losses(ctx):
+    return ctx.values[~ctx["win_mask"]]
+
+
+@intermediate("downside")
+def _downside(ctx):
+    losses = ctx["losses"]
+    return losses[losses < 0]
+
+
+@intermediate("durations")
+def _durations(ctx):
+    return ctx.durations if ctx.durations is not None else np.empty(0)
+
+
+# --- metrics ------------------------------------------------------------------
+# Formulas match the original calculate_metrics (same summation order, ddof=1 std)
+
+def _few_win_rate(ctx):
+    return (ctx.values > 0).mean() * 100 if len(ctx.values) else 0
+
+
+def _few_mean(mask):
+    def few(ctx):
+        selected = ctx.values[mask(ctx.values)]
+        return selected.mean() if len(selected) else 0
+    return few
+
+
+@metric("sharpe", needs=("mean", "std"), label="Sharpe Ratio", few=lambda ctx: 0)
+def sharpe(ctx):
+    std = ctx["std"]
+    return ctx["mean"] / (std + 1e-9) * np.sqrt(252) if std > 0 else 0.0
+
+
+@metric("sortino", needs=("mean", "downside"), label="Sortino Ratio", few=lambda ctx: 0)
+def sortino(ctx):
+    downside = ctx["downside"]
+    if len(downside) > 1:
+        downside_std = downside.std(ddof=1)
+        if downside_std > 0:
+            return ctx["mean"] / (downside_std + 1e-9) * np.sqrt(252)
+    return 0.0
+
+
+@metric("win_rate", needs=("wins", "n"), label="Win Rate (%)", few=_few_win_rate)
+def win_rate(ctx):
+    return (len(ctx["wins"]) / ctx["n"]) * 100
+
+
+@metric("wins", needs=("wins",), digits=None, default=0, few=lambda ctx: int((ctx.values > 0).sum()))
+def wins(ctx):
+    return len(ctx["wins"])
+
+
+@metric("losses", needs=("losses",), digits=None, default=0, few=lambda ctx: int((ctx.values < 0).sum()))
+def losses(ctx):
+    return len(ctx["losses"])
+
+
+@metric("closed_pl", needs=("total",), label="Closed P/L", few=lambda ctx: ctx.values.sum())
+def closed_pl(ctx):
+    return ctx["total"]
+
+
+@metric("avg_win", needs=("wins",), few=_few_mean(lambda v: v > 0))
+def avg_win(ctx):
+    wins = ctx["wins"]
+    return wins.sum() / len(wins) if len(wins) else 0.0
+
+
+@metric("avg_loss", needs=("losses",), few=_few_mean(lambda v: v < 0))
+def avg_loss(ctx):
+    losses = ctx["losses"]
+    return losses.sum() / len(losses) if len(losses) else 0.0
+
+
+@metric("profit_factor", needs=("wins", "losses"), few=lambda ctx: 0)
+def profit_factor(ctx):
+    loss_sum = ctx["losses"].sum()
+    return abs(ctx["wins"].sum() / loss_sum) if loss_sum != 0 else np.inf
+
+
+@metric("max_drawdown", needs=("drawdown",), few=lambda ctx: 0)
+def max_drawdown(ctx):
+    return ctx["drawdown"].max()
+
+
+def _few_duration(ctx):
+    # As calculate_metrics always did: NaN when the duration column has no values
+    if ctx.durations is None:
+        return 0
+    return ctx.durations.mean() if len(ctx.durations) else np.nan
+
+
+@metric("avg_trade_duration", needs=("durations",), label="Avg Duration (s)", few=_few_duration)
+def avg_trade_duration(ctx):
+    durations = ctx["durations"]
+    return round(durations.sum() / len(durations), 2) if len(durations) else 0.0
+
+
+@metric("total_pnl", needs=("total",), summary=False, few=lambda ctx: ctx.values.sum())
+def total_pnl(ctx):
+    return ctx["total"]
+
+
+@metric("number_of_trades", needs=("n",), label="Trades", digits=None, default=0, few=lambda ctx: len(ctx.values))
+def number_of_trades(ctx):
+    return ctx["n"]
+
+
+# Detail-view only: not part of calculate_metrics' dict
+
+@metric("expectancy", needs=("mean",), summary=False, core=False,
+        few=lambda ctx: ctx.values.mean() if len(ctx.values) else 0.0)
+def expectancy(ctx):
+    return ctx["mean"]
+
+
+@metric("largest_win", needs=("wins",), summary=False, core=False,
+        few=lambda ctx: max(ctx.values.max(), 0.0) if len(ctx.values) else 0.0)
+def largest_win(ctx):
+    return ctx["wins"].max() if len(ctx["wins"]) else 0.0
+
+
+@metric("largest_loss", needs=("losses",), summary=False, core=False,
+        few=lambda ctx: min(ctx.values.min(), 0.0) if len(ctx.values) else 0.0)
+def largest_loss(ctx):
+    return ctx["losses"].min() if len(ctx["losses"]) else 0.0
@@ -0,0 +1,162 @@
+# utils/metrics_cache.py
+#
+# Disk-persisted cache of computed metrics (summary rows, detail metrics,
+# bootstrap intervals), keyed by a fingerprint of the trade log: for logs on
+# disk the file sizes and mtimes (utils.rollups.log_fingerprint, O(1) per
+# rerun), otherwise row count, last timestamp and rolling hashes of the pnl
+# and duration columns. Streamlit reruns and cold starts after a deploy reuse
+# earlier results for unchanged logs. Entries live in data/metrics_cache.db; once the stored values exceed
+# METRICS_CACHE_MB the least recently used ones are evicted.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+METRICS_CACHE_PATH = os.getenv("METRICS_CACHE_PATH", os.path.join("data", "metrics_cache.db"))
+METRICS_CACHE_MB = float(os.getenv("METRICS_CACHE_MB", "16"))
+
+# Multiplier of the polynomial rolling hash (arithmetic mod 2**64)
+_HASH_BASE = np.uint64(0x100000001B3)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics_cache (
+    key       TEXT PRIMARY KEY,
+    value     TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_cache_last_used ON metrics_cache (last_used);
+"""
+
+
+def rolling_hash(values):
+    """Polynomial hash sum(bits[i] * BASE**(n-1-i)) mod 2**64 of a float64 array's bit patterns."""
+    bits = np.ascontiguousarray(values, dtype="float64").view(np.uint64)
+    if not len(bits):
+        return 0
+    powers = np.full(len(bits), _HASH_BASE, dtype=np.uint64)
+    powers[-1] = 1
+    powers = np.cumprod(powers[::-1])[::-1]
+    return int(np.sum(bits * powers, dtype=np.uint64))
+
+
+def _column_hash(df, column):
+    if column not in df.columns:
+        return "-"
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    # One NaN bit pattern, whatever produced the missing values
+    values = np.where(np.isnan(values), np.nan, values)
+    return f"{rolling_hash(values):016x}"
+
+
+def fingerprint(df):
+    """Row count, last timestamp and rolling pnl/duration hashes of a trade log."""
+    if df is None or df.empty:
+        return "0"
+    last = df["timestamp"].iloc[-1] if "timestamp" in df.columns else ""
+    return f"{len(df)}:{last}:{_column_hash(df, 'pnl')}:{_column_hash(df, 'duration')}"
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class MetricsCache:
+    def __init__(self, path=METRICS_CACHE_PATH, max_bytes=int(METRICS_CACHE_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def get_or_compute(self, df, kind, compute):
+        """
+        Cached compute() for this trade log; kind names the computation and its
+        parameters (e.g. "summary", "ci:10000"). Values must be JSON-serializable.
+        """
+        return self.get_or_compute_for(fingerprint(df), kind, compute)
+
+    def get_or_compute_for(self, source, kind, compute):
+        """get_or_compute keyed by a precomputed fingerprint, e.g. log_fingerprint(path)."""
+        key = f"{kind}|{source}"
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM metrics_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                with self._conn:
+                    self._conn.execute("UPDATE metrics_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                return json.loads(row[0])
+            self.misses += 1
+
+        value = compute()
+        encoded = json.dumps(value, default=_json_default)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metrics_cache (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, encoded, len(encoded), time.time()),
+            )
+            self._evict()
+        return value
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM metrics_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM metrics_cache ORDER BY last_used"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM metrics_cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metrics_cache")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM metrics_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_metrics_cache = None
+_metrics_cache_lock = threading.Lock()
+
+
+def get_metrics_cache(path=METRICS_CACHE_PATH):
+    global _metrics_cache
+    with _metrics_cache_lock:
+        if _metrics_cache is None or _metrics_cache.path != path:
+            _metrics_cache = MetricsCache(path)
+        return _metrics_cache
+
+
+def metrics_cache_stats():
+    return get_metrics_cache().stats()
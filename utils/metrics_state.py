@@ -0,0 +1,287 @@
+# utils/metrics_state.py
+#
+# Incremental version of calculate_metrics: a small, JSON-serializable
+# accumulator that folds in only the trades appended since the last run.
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.performance_metrics import default_metrics
+from utils.storage import TRADE_STORE, journal_path_for, resolve_path
+from utils.trade_store import SUMMARY_COLUMNS, load_trade_log
+
+
+def state_path_for(csv_path):
+    """data/aapl_trades.csv -> data/aapl_trades.metrics.json"""
+    root, _ = os.path.splitext(csv_path)
+    return root + ".metrics.json"
+
+
+def _merge_moments(n_a, mean_a, m2_a, values):
+    # Chan et al. parallel update of (count, mean, sum of squared deviations)
+    n_b = len(values)
+    if n_b == 0:
+        return n_a, mean_a, m2_a
+    mean_b = values.mean()
+    m2_b = ((values - mean_b) ** 2).sum()
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return n, float(mean), float(m2)
+
+
+class MetricsState:
+    """
+    Running sums needed to reproduce calculate_metrics without rescanning history.
+
+    Holds pnl count/sum/mean/M2 (sum of squared deviations, the stable form
+    of the sum of squares), the same for downside (pnl < 0) trades, win and
+    loss counts and sums, the current and peak equity, max drawdown and
+    duration totals. `offset` and `tail` remember how far into the CSV the
+    state has been folded so refresh() only parses the appended bytes.
+    """
+
+    FIELDS = (
+        "count", "total", "mean", "m2",
+        "down_count", "down_mean", "down_m2",
+        "win_count", "win_sum", "loss_count", "loss_sum",
+        "equity", "peak", "max_drawdown",
+        "duration_count", "duration_sum",
+        "rows", "offset", "tail", "columns",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.down_count = 0
+        self.down_mean = 0.0
+        self.down_m2 = 0.0
+        self.win_count = 0
+        self.win_sum = 0.0
+        self.loss_count = 0
+        self.loss_sum = 0.0
+        self.equity = 0.0
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.rows = 0
+        self.offset = 0
+        self.tail = ""
+        self.columns = None
+        self.partial = b""
+
+    def update(self, new_trades_df):
+        """Fold newly appended trades into the state in O(len(new_trades_df))."""
+        if new_trades_df is None or new_trades_df.empty or "pnl" not in new_trades_df.columns:
+            return self
+
+        self.rows += len(new_trades_df)
+        pnl = pd.to_numeric(new_trades_df["pnl"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        pnl = pnl[~np.isnan(pnl)]
+
+        if len(pnl):
+            curve = self.equity + np.cumsum(pnl)
+            peak = np.maximum.accumulate(curve)
+            if self.peak is not None:
+                np.maximum(peak, self.peak, out=peak)
+            self.max_drawdown = max(self.max_drawdown, float((peak - curve).max()))
+            self.peak = float(peak[-1])
+            self.equity = float(curve[-1])
+
+            self.total += float(pnl.sum())
+            self.count, self.mean, self.m2 = _merge_moments(self.count, self.mean, self.m2, pnl)
+
+            wins = pnl > 0
+            self.win_count += int(wins.sum())
+            self.win_sum += float(pnl[wins].sum())
+            self.loss_count += int((~wins).sum())
+            self.loss_sum += float(pnl[~wins].sum())
+
+            downside = pnl[pnl < 0]
+            self.down_count, self.down_mean, self.down_m2 = _merge_moments(
+                self.down_count, self.down_mean, self.down_m2, downside
+            )
+
+        if "duration" in new_trades_df.columns:
+            durations = pd.to_numeric(new_trades_df["duration"], errors="coerce").dropna()
+            self.duration_count += len(durations)
+            self.duration_sum += float(durations.sum())
+
+        return self
+
+    def to_metrics(self):
+        """Return the same dict calculate_metrics would for the folded trades."""
+        n = self.count
+        avg_duration = self.duration_sum / self.duration_count if self.duration_count else 0.0
+
+        if n == 0:
+            return default_metrics()
+
+        if n < 2:
+            return {
+                'sharpe': 0,
+                'sortino': 0,
+                'win_rate': self.win_count * 100.0,
+                'wins': self.win_count,
+                'losses': self.down_count,
+                'closed_pl': self.total,
+                'avg_win': self.win_sum if self.win_count else 0,
+                'avg_loss': self.total if self.down_count else 0,
+                'profit_factor': 0,
+                'max_drawdown': 0,
+                'avg_trade_duration': avg_duration,
+                'total_pnl': self.total,
+                'number_of_trades': n,
+            }
+
+        if self.total == 0:
+            return default_metrics(n=n)
+
+        sharpe = 0.0
+        sortino = 0.0
+        std = np.sqrt(self.m2 / (n - 1))
+        if std > 0:
+            sharpe = self.mean / (std + 1e-9) * np.sqrt(252)
+        if self.down_count > 1:
+            down_std = np.sqrt(self.down_m2 / (self.down_count - 1))
+            if down_std > 0:
+                sortino = self.mean / (down_std + 1e-9) * np.sqrt(252)
+
+        return {
+            'sharpe': sharpe,
+            'sortino': sortino,
+            'wins': self.win_count,
+            'losses': self.loss_count,
+            'win_rate': (self.win_count / n) * 100,
+            'closed_pl': self.total,
+            'avg_win': self.win_sum / self.win_count if self.win_count else 0.0,
+            'avg_loss': self.loss_sum / self.loss_count if self.loss_count else 0.0,
+            'profit_factor': abs(self.win_sum / self.loss_sum) if self.loss_sum != 0 else np.inf,
+            'max_drawdown': self.max_drawdown,
+            'avg_trade_duration': round(avg_duration, 2),
+            'total_pnl': self.total,
+            'number_of_trades': n
+        }
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(state, field, data[field])
+        return state
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    return cls.from_dict(json.load(f))
+            except (OSError, ValueError):
+                pass  # Corrupt state is rebuilt from the CSV
+        return cls()
+
+    def refresh(self, csv_path):
+        """
+        Fold in only the rows appended to csv_path since the last refresh.
+
+        If the file was truncated or rewritten with a different prefix, the
+        state is rebuilt from scratch. Returns the (possibly new) state.
+        """
+        if not os.path.exists(csv_path):
+            return MetricsState()
+
+        state = self
+        with open(csv_path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if not state._prefix_matches(f, size):
+                state = MetricsState()
+
+            if state.offset == 0:
+                f.seek(0)
+                header = f.readline()
+                if not header.strip():
+                    return state
+                state.columns = header.decode("utf-8").strip().split(",")
+                state.offset = f.tell()
+                state.tail = header[-64:].decode("latin-1")
+
+            f.seek(state.offset)
+            chunk = f.read()
+
+        # Only consume complete lines; an unterminated last line is kept aside
+        # and only counted in to_metrics() until a newline follows it
+        end = chunk.rfind(b"\n") + 1
+        state.partial = chunk[end:]
+        if end == 0:
+            return state
+        chunk = chunk[:end]
+
+        state.update(state._parse(chunk))
+        state.offset += end
+        state.tail = chunk[-64:].decode("latin-1")
+        return state
+
+    def _parse(self, chunk):
+        usecols = [c for c in ("pnl", "duration") if c in self.columns]
+        if not usecols or not chunk.strip():
+            return pd.DataFrame()
+        return pd.read_csv(io.BytesIO(chunk), header=None, names=self.columns, usecols=usecols)
+
+    def with_partial(self):
+        """Copy of the state with the unterminated last line folded in (not persisted)."""
+        if not self.partial.strip():
+            return self
+        return MetricsState.from_dict(self.to_dict()).update(self._parse(self.partial))
+
+    def _prefix_matches(self, f, size):
+        if self.offset == 0:
+            return True
+        if size < self.offset:
+            return False
+        tail = self.tail.encode("latin-1")
+        f.seek(self.offset - len(tail))
+        return f.read(len(tail)) == tail
+
+
+def refresh_metrics(csv_path):
+    """
+    Load the persisted state for csv_path, fold in new trades, save it and
+    return the metrics. Returns None when the log has no trades or no pnl column.
+    """
+    path = resolve_path(csv_path)
+    if TRADE_STORE == "sqlite" or not path.endswith(".csv") or journal_path_for(csv_path) != path:
+        # Columnar and SQLite logs are cheap to re-read with column projection
+        state = MetricsState()
+        df = load_trade_log(path, columns=SUMMARY_COLUMNS, copy=False)
+        state.columns = list(df.columns)
+        state.update(df)
+        return state.to_metrics() if state.rows and "pnl" in state.columns else None
+
+    state_path = state_path_for(path)
+    state = MetricsState.load(state_path).refresh(path)
+    try:
+        state.save(state_path)
+    except OSError:
+        pass  # Read-only deployments still get correct metrics, just not cached
+    state = state.with_partial()
+    if not state.rows or "pnl" not in (state.columns or []):
+        return None
+    return state.to_metrics()
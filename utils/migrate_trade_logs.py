@@ -0,0 +1,52 @@
+# utils/migrate_trade_logs.py
+#
+# One-shot conversion of data/*_trades.csv into typed, compressed Parquet.
+# Usage: python -m utils.migrate_trade_logs [--data-dir data] [--remove-csv]
+# Afterwards set TRADE_LOG_FORMAT=parquet so strategies keep writing Parquet.
+
+import argparse
+import os
+
+import pandas as pd
+
+from utils.storage import BACKENDS, with_format
+
+
+def migrate(data_dir="data", remove_csv=False):
+    migrated = []
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith("_trades.csv"):
+            continue
+        csv_path = os.path.join(data_dir, filename)
+        parquet_path = with_format(csv_path, "parquet")
+
+        df = BACKENDS["csv"].read(csv_path)
+        if "pnl" in df.columns:
+            df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce")
+        BACKENDS["parquet"].write(df, parquet_path)
+
+        # Verify the round trip before touching the original
+        check = BACKENDS["parquet"].read(parquet_path)
+        if len(check) != len(df) or list(check.columns) != list(df.columns):
+            raise RuntimeError(f"Round-trip mismatch for {csv_path}")
+
+        csv_size = os.path.getsize(csv_path)
+        parquet_size = os.path.getsize(parquet_path)
+        print(f"✅ {filename}: {len(df)} rows, {csv_size:,} B -> {parquet_size:,} B")
+
+        if remove_csv:
+            os.remove(csv_path)
+        migrated.append(parquet_path)
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CSV trade logs to Parquet.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--remove-csv", action="store_true", help="delete each CSV after a verified conversion")
+    args = parser.parse_args()
+    migrate(args.data_dir, args.remove_csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# utils/pacing.py
+#
+# Rate limiters for Interactive Brokers pacing limits, shared by the
+# connection broker and the historical-data scheduler: a token bucket for the
+# per-second message rate and a sliding window for historical requests.
+
+import threading
+import time
+from collections import deque
+
+# IB limits: 50 API messages per second per client, and at most 60
+# historical-data requests in any 10 minute window.
+MESSAGES_PER_SECOND = 50
+HISTORICAL_REQUESTS = 60
+HISTORICAL_WINDOW = 600.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1.0):
+        """Take tokens if available; otherwise return the seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1.0):
+        """Block until tokens are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return
+            self._sleep(wait)
+
+
+class SlidingWindowLimiter:
+    """
+    Thread-safe limit of `limit` events in any `window` seconds. Unlike a
+    token bucket it never allows a burst on top of a refilled budget, so
+    60 per 600 s really means at most 60 in every 600 s span.
+    """
+
+    def __init__(self, limit, window, clock=time.monotonic, sleep=time.sleep):
+        self.limit = int(limit)
+        self.window = float(window)
+        self._sent = deque()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """Record `tokens` events if the window allows; otherwise return the seconds to wait."""
+        tokens = int(tokens)
+        with self._lock:
+            now = self._clock()
+            while self._sent and now - self._sent[0] >= self.window:
+                self._sent.popleft()
+            if len(self._sent) + tokens <= self.limit:
+                self._sent.extend([now] * tokens)
+                return 0.0
+            # Wait until enough of the oldest sends leave the window
+            oldest = self._sent[len(self._sent) + tokens - self.limit - 1]
+            return max(oldest + self.window - now, 1e-3)
+
+    def acquire(self, tokens=1):
+        """Block until the window allows `tokens` more events."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return
+            self._sleep(wait)
+
+
+def message_bucket():
+    return TokenBucket(MESSAGES_PER_SECOND, MESSAGES_PER_SECOND)
+
+
+def historical_bucket():
+    return SlidingWindowLimiter(HISTORICAL_REQUESTS, HISTORICAL_WINDOW)
@@ -0,0 +1,150 @@
+# utils/param_sweep.py
+#
+# Grid search over SMA window, cooldown and minimum price move using the
+# offline backtester. Combinations run on a process pool across all cores;
+# the bars are written once to .npy files that every worker memory-maps, so
+# nothing but the parameters is pickled per task. Results are ranked with
+# the same metrics as the dashboards and saved under data/sweeps/.
+# Rows with min_move_pct 0 match the live strategies; larger values add a
+# move filter on every trade that live trading does not apply.
+# Usage: python -m utils.param_sweep SMA200_trader --symbols MSFT --windows 50:250:10
+
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import PRESETS, closes_and_times, load_bars, trade_indices, trade_pnl
+from utils.performance_metrics import calculate_metrics, default_metrics
+
+SWEEP_DIR = os.path.join("data", "sweeps")
+RANK_COLUMNS = ["sharpe", "sortino", "profit_factor", "total_pnl", "win_rate"]
+
+# Bars of the current sweep, memory-mapped once per worker process
+_shared = {}
+
+
+def _init_worker(folder):
+    _shared["price"] = np.load(os.path.join(folder, "close.npy"), mmap_mode="r")
+    _shared["times"] = np.load(os.path.join(folder, "times.npy"), mmap_mode="r")
+
+
+def _run_window(task):
+    """All (cooldown, min_move_pct) combinations for one window; the SMA is computed once."""
+    window, combos, base = task
+    price, times = _shared["price"], _shared["times"]
+    sma = pd.Series(price).rolling(window).mean().to_numpy()
+
+    rows = []
+    for cooldown, min_move_pct in combos:
+        idx, sides = trade_indices(price, sma, times, cooldown, base["cooldown_inclusive"],
+                                   base["min_move"], min_move_pct, base["tie_action"])
+        pnl, duration = trade_pnl(price[idx], sides, times[idx], base["round_pnl"])
+        metrics = calculate_metrics(pd.DataFrame({"pnl": pnl, "duration": duration})) if len(pnl) else default_metrics()
+        rows.append({"window": window, "cooldown": cooldown, "min_move_pct": min_move_pct, **metrics})
+    return rows
+
+
+def sweep(strategy, bars, windows, cooldowns=(300,), min_move_pcts=(0.0,), workers=None):
+    """
+    Backtest every combination of the grid on `bars` (closes with a
+    DatetimeIndex) and return one row per combination, best Sharpe first.
+    Windows at least as long as the bar history never produce an SMA and
+    are skipped.
+    """
+    base = dict(PRESETS[strategy])
+    price, times = closes_and_times(bars)
+    combos = list(itertools.product(cooldowns, min_move_pcts))
+    tasks = [(int(w), combos, base) for w in windows if int(w) < len(price)]
+    if not tasks:
+        return pd.DataFrame()
+    workers = workers or os.cpu_count() or 1
+
+    folder = tempfile.mkdtemp(prefix="sweep_")
+    try:
+        np.save(os.path.join(folder, "close.npy"), price)
+        np.save(os.path.join(folder, "times.npy"), times)
+        if workers == 1:
+            _init_worker(folder)
+            results = map(_run_window, tasks)
+            rows = [row for chunk in results for row in chunk]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folder,)) as pool:
+                rows = [row for chunk in pool.map(_run_window, tasks) for row in chunk]
+    finally:
+        _shared.clear()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return rank(pd.DataFrame(rows))
+
+
+def rank(results, by="sharpe"):
+    """Sort sweep results by one of RANK_COLUMNS, best first."""
+    if results.empty or by not in results.columns:
+        return results
+    return results.sort_values(by, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def sweep_path(strategy, symbol, folder=SWEEP_DIR):
+    return os.path.join(folder, f"{strategy}_{symbol.lower()}.csv")
+
+
+def list_sweeps(folder=SWEEP_DIR):
+    """Saved sweep result files as {name: path}."""
+    if not os.path.isdir(folder):
+        return {}
+    return {os.path.splitext(f)[0]: os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".csv")}
+
+
+def _grid(values, cast):
+    # "50:250:10" is a range (inclusive end), anything else a list of values
+    if len(values) == 1 and values[0].count(":") == 2:
+        start, stop, step = (cast(v) for v in values[0].split(":"))
+        return list(np.arange(start, stop + step / 2, step).astype(type(start)))
+    return [cast(v) for v in values]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search SMA strategy parameters over cached bars.")
+    parser.add_argument("strategy", choices=sorted(PRESETS))
+    parser.add_argument("--symbols", nargs="+", default=["MSFT"])
+    parser.add_argument("--bar-size", default="1 day")
+    parser.add_argument("--what-to-show", default="MIDPOINT")
+    parser.add_argument("--windows", nargs="+", default=["20:250:10"])
+    parser.add_argument("--cooldowns", nargs="+", default=["300"])
+    parser.add_argument("--min-move-pct", nargs="+", default=["0", "0.005", "0.01"],
+                        help="relative move required before every trade; 0 is the live behaviour")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out-dir", default=SWEEP_DIR)
+    args = parser.parse_args()
+
+    windows = _grid(args.windows, int)
+    cooldowns = _grid(args.cooldowns, float)
+    min_move_pcts = _grid(args.min_move_pct, float)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    for symbol in args.symbols:
+        bars = load_bars(symbol, args.bar_size, args.what_to_show)
+        if bars.empty:
+            print(f"⚠️ No cached bars for {symbol}; skipping.")
+            continue
+        usable = [w for w in windows if w < len(bars)]
+        if len(usable) < len(windows):
+            print(f"⚠️ {symbol}: skipping windows >= {len(bars)} bars of history.")
+        if not usable:
+            continue
+        results = sweep(args.strategy, bars, usable, cooldowns, min_move_pcts, args.workers)
+        path = sweep_path(args.strategy, symbol, args.out_dir)
+        results.to_csv(path, index=False)
+        best = results.iloc[0]
+        print(f"✅ {symbol}: {len(results)} runs -> {path} "
+              f"(best window {best['window']}, cooldown {best['cooldown']:g}s, sharpe {best['sharpe']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import numpy as np
 import pandas as pd
 
+from utils.metric_registry import METRICS, _finite, core_metrics, evaluate
+
 def calculate_metrics(df):
     """
     Calculates comprehensive performance metrics for a trading strategy.
@@ -16,6 +17,8 @@ def calculate_metrics(df):
 
     Returns:
         dict: A dictionary with multiple performance metrics
+
+    Every metric is defined in utils/metric_registry.py.
     """
 
     # Ensure pnl exists and is numeric
@@ -23,88 +26,19 @@ def calculate_metrics(df):
         return default_metrics()
 
     df['pnl'] = pd.to_numeric(df['pnl'], errors='coerce')
-    pnl = df['pnl'].dropna()
-
-    if len(pnl) < 2:
-        return {
-            'sharpe': 0,
-            'sortino': 0,
-            'win_rate': (pnl > 0).mean() * 100 if len(pnl) > 0 else 0,
-            'wins': int((pnl > 0).sum()),
-            'losses': int((pnl < 0).sum()),
-            'closed_pl': pnl.sum(),
-            'avg_win': pnl[pnl > 0].mean() if any(pnl > 0) else 0,
-            'avg_loss': pnl[pnl < 0].mean() if any(pnl < 0) else 0,
-            'profit_factor': 0,
-            'max_drawdown': 0,
-            'avg_trade_duration': df['duration'].dropna().mean() if 'duration' in df.columns else 0,
-        }
-
-    # Debug print (optional)
-    # print("📊 Metrics Debug:\n", df.head(), "\nPNL dtype:", df["pnl"].dtype)
-
-    if pnl.empty or len(pnl) < 2 or pnl.sum() == 0:
-        return default_metrics(n=len(pnl))
-
-    returns = pnl
-    cumulative = returns.cumsum()
-    peak = cumulative.cummax()
-    drawdown = peak - cumulative
-    max_drawdown = drawdown.max()
-
-    wins = pnl[pnl > 0]
-    losses = pnl[pnl <= 0]
+    values = _finite(df['pnl'])
+    durations = _finite(df['duration']) if 'duration' in df.columns else None
+    return evaluate(values, durations)
 
-    win_count = len(wins)
-    loss_count = len(losses)
-
-    avg_win = wins.mean() if win_count else 0.0
-    avg_loss = losses.mean() if loss_count else 0.0
-
-    win_rate = (win_count / len(pnl)) * 100 if len(pnl) > 0 else 0.0
-    profit_factor = abs(wins.sum() / losses.sum()) if losses.sum() != 0 else np.inf
-
-    sharpe = 0.0
-    sortino = 0.0
-    if pnl.std() > 0:
-        sharpe = pnl.mean() / (pnl.std() + 1e-9) * np.sqrt(252)
-    if pnl[pnl < 0].std() > 0:
-        sortino = pnl.mean() / (pnl[pnl < 0].std() + 1e-9) * np.sqrt(252)
-
-    # Duration
-    avg_duration = 0.0
-    if 'duration' in df.columns and not df['duration'].dropna().empty:
-        avg_duration = round(df['duration'].dropna().mean(), 2)
+def metrics_from_arrays(values, durations=None):
+    """
+    Vectorized metrics kernel working on raw NumPy arrays.
 
-    return {
-        'sharpe': sharpe,
-        'sortino': sortino,
-        'wins': win_count,
-        'losses': loss_count,
-        'win_rate': win_rate,
-        'closed_pl': pnl.sum(),
-        'avg_win': avg_win,
-        'avg_loss': avg_loss,
-        'profit_factor': profit_factor,
-        'max_drawdown': max_drawdown,
-        'avg_trade_duration': avg_duration,
-        'total_pnl': pnl.sum(),
-        'number_of_trades': len(pnl)
-    }
+    `values` is a float64 array of per-trade pnl with NaNs already removed,
+    `durations` an optional float64 array of trade durations (NaN-free).
+    Fewer than two trades (or a zero total) give the default metrics.
+    """
+    return evaluate(values, durations, few_trades=False)
 
 def default_metrics(n=0):
-    return {
-        'sharpe': 0.0,
-        'sortino': 0.0,
-        'wins': 0,
-        'losses': 0,
-        'win_rate': 0.0,
-        'closed_pl': 0.0,
-        'avg_win': 0.0,
-        'avg_loss': 0.0,
-        'profit_factor': 0.0,
-        'max_drawdown': 0.0,
-        'avg_trade_duration': 0.0,
-        'total_pnl': 0.0,
-        'number_of_trades': 0
-    }
+    return {name: METRICS[name].default for name in core_metrics()}
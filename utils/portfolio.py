@@ -0,0 +1,94 @@
+# utils/portfolio.py
+#
+# Portfolio view across strategies. All trade logs are merged into one
+# time-ordered set of arrays; the equity curve, per-strategy contributions,
+# portfolio metrics and the cross-strategy correlation are then computed on
+# those arrays in a handful of vectorized passes, independent of how many
+# strategies there are.
+
+import numpy as np
+import pandas as pd
+
+from utils.performance_metrics import default_metrics, metrics_from_arrays
+
+
+def merge_trades(frames):
+    """
+    Merge {name: trade log} into time-ordered arrays.
+    Returns (names, timestamps datetime64[ns], pnl float64, strategy codes).
+    Logs without timestamp/pnl columns or without any valid row are skipped.
+    """
+    names, stamps, pnls, codes = [], [], [], []
+    for name, df in frames.items():
+        if df is None or df.empty or "timestamp" not in df.columns or "pnl" not in df.columns:
+            continue
+        ts = df["timestamp"]
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts, errors="coerce")
+        ts = ts.to_numpy("datetime64[ns]")
+        pnl = pd.to_numeric(df["pnl"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        ok = ~np.isnat(ts) & ~np.isnan(pnl)
+        if not ok.any():
+            continue
+        stamps.append(ts[ok])
+        pnls.append(pnl[ok])
+        codes.append(np.full(int(ok.sum()), len(names), dtype=np.int32))
+        names.append(name)
+
+    if not names:
+        return [], np.empty(0, "datetime64[ns]"), np.empty(0), np.empty(0, np.int32)
+    # Logs are usually already time ordered, which the stable (run-aware) sort exploits
+    ts = np.concatenate(stamps)
+    order = np.argsort(ts, kind="stable")
+    return names, ts[order], np.concatenate(pnls)[order], np.concatenate(codes)[order]
+
+
+def build_portfolio(frames, freq="D"):
+    """
+    Aggregate trade logs into a portfolio.
+
+    Returns a dict with:
+        equity         Series of cumulative pnl at every trade (merged time index)
+        period_pnl     DataFrame of pnl per `freq` period and strategy
+        contributions  cumulative period_pnl (each strategy's share of equity)
+        correlation    strategy x strategy correlation of period pnl
+        metrics        calculate_metrics-style dict over the merged trades
+    """
+    names, ts, pnl, code = merge_trades(frames)
+    equity = pd.Series(np.cumsum(pnl), index=pd.DatetimeIndex(ts), name="portfolio")
+    metrics = metrics_from_arrays(pnl) if len(pnl) >= 2 else default_metrics(n=len(pnl))
+
+    if not names:
+        empty = pd.DataFrame()
+        return {"equity": equity, "period_pnl": empty, "contributions": empty,
+                "correlation": empty, "metrics": metrics}
+
+    # Every period in the range counts, including those without trades (pnl 0)
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        step = offset.nanos
+        first = ts[0].astype(np.int64) // step
+        period_idx = ts.astype(np.int64) // step - first
+        periods = pd.to_datetime((first + np.arange(period_idx[-1] + 1)) * step)
+    else:
+        floored = pd.DatetimeIndex(ts).floor(freq)
+        periods = pd.date_range(floored[0], floored[-1], freq=freq)
+        period_idx = periods.searchsorted(floored)
+    k = len(names)
+    grid = np.bincount(period_idx * k + code, weights=pnl, minlength=len(periods) * k).reshape(len(periods), k)
+    period_pnl = pd.DataFrame(grid, index=periods, columns=names)
+
+    if len(periods) > 1 and k > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.corrcoef(grid, rowvar=False)
+    else:
+        corr = np.ones((k, k))
+    correlation = pd.DataFrame(corr, index=names, columns=names)
+
+    return {
+        "equity": equity,
+        "period_pnl": period_pnl,
+        "contributions": period_pnl.cumsum(),
+        "correlation": correlation,
+        "metrics": metrics,
+    }
@@ -0,0 +1,118 @@
+# utils/rolling_metrics.py
+#
+# Rolling versions of the calculate_metrics ratios over the last N trades or
+# a trailing time window ("30D"). Every window statistic is a difference of
+# cumulative sums taken at the window's start and end, so the whole series
+# costs O(n) however large the window is; no per-window metrics calls.
+
+import numpy as np
+import pandas as pd
+
+ROLLING_COLUMNS = ["trades", "sharpe", "sortino", "win_rate", "profit_factor", "drawdown"]
+
+
+def _window_sums(values, starts, ends):
+    # Sum of values[starts[i]:ends[i] + 1] for every i, from one cumulative sum
+    cs = np.concatenate([[0.0], np.cumsum(values)])
+    return cs[ends + 1] - cs[starts]
+
+
+def _window_std(sum_x, sum_sq, n):
+    # Sample std (ddof=1) from window sums; residues of cancellation count as zero
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (sum_sq - sum_x * sum_x / n) / (n - 1)
+        var[var <= 1e-12 * sum_sq / n] = 0.0
+    return np.sqrt(var)
+
+
+def rolling_metrics(df, window=100, min_trades=2, points=None):
+    """
+    Rolling Sharpe, Sortino, win rate, profit factor and drawdown.
+
+    window is a number of trades or a pandas offset string ("7D", "30D") for
+    a trailing time window (t - window, t]. Each row uses the same formulas as
+    calculate_metrics over the trades in its window; drawdown is the distance
+    from the highest equity reached within the window. Rows whose window has
+    fewer than min_trades trades are NaN. Indexed by timestamp when present.
+
+    With points set, only about that many evenly spaced trades (always
+    including the last) are evaluated, for charting multi-million-trade logs.
+    """
+    if df is None or df.empty or "pnl" not in df.columns:
+        return pd.DataFrame(columns=ROLLING_COLUMNS)
+
+    pnl = pd.to_numeric(df["pnl"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    index = None
+    if "timestamp" in df.columns:
+        ts = df["timestamp"]
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts, errors="coerce")
+        ts = ts.to_numpy("datetime64[ns]")
+        ok = ~np.isnat(ts) & ~np.isnan(pnl)
+        ts, pnl = ts[ok], pnl[ok]
+        if len(ts) and (np.diff(ts.astype(np.int64)) < 0).any():
+            order = np.argsort(ts, kind="stable")
+            ts, pnl = ts[order], pnl[order]
+        index = pd.DatetimeIndex(ts, name="timestamp")
+    else:
+        pnl = pnl[~np.isnan(pnl)]
+
+    n_total = len(pnl)
+    positions = np.arange(n_total)
+    if isinstance(window, (int, np.integer)):
+        starts = np.maximum(positions - int(window) + 1, 0)
+    else:
+        if index is None:
+            raise ValueError("Time-based rolling windows need a timestamp column")
+        span = pd.Timedelta(window).value
+        stamps = index.asi8
+        starts = np.searchsorted(stamps, stamps - span, side="right")
+
+    ends = positions
+    if points is not None and n_total > points:
+        ends = np.unique(np.append(np.linspace(0, n_total - 1, points).astype(np.int64), n_total - 1))
+        starts = starts[ends]
+    n = (ends - starts + 1).astype("float64")
+
+    # Centre the pnl so the sums of squares do not swamp the window variance
+    center = pnl.mean() if n_total else 0.0
+    x = pnl - center
+    sum_x = _window_sums(x, starts, ends)
+    total = sum_x + n * center
+    mean = total / n
+    std = _window_std(sum_x, _window_sums(x * x, starts, ends), n)
+
+    down = pnl < 0
+    down_center = pnl[down].mean() if down.any() else 0.0
+    dx = np.where(down, pnl - down_center, 0.0)
+    down_n = _window_sums(down.astype("float64"), starts, ends)
+    down_std = _window_std(_window_sums(dx, starts, ends), _window_sums(dx * dx, starts, ends), down_n)
+
+    wins = pnl > 0
+    win_n = _window_sums(wins.astype("float64"), starts, ends)
+    win_sum = _window_sums(np.where(wins, pnl, 0.0), starts, ends)
+    loss_sum = np.where(down_n > 0, _window_sums(np.where(down, pnl, 0.0), starts, ends), 0.0)
+
+    # Window peak of the equity curve (pandas' rolling max is a linear-time deque)
+    equity = np.cumsum(pnl)
+    if isinstance(window, (int, np.integer)):
+        peak = pd.Series(equity).rolling(int(window), min_periods=1).max()
+    else:
+        peak = pd.Series(equity, index=index).rolling(window, min_periods=1).max()
+    drawdown = peak.to_numpy()[ends] - equity[ends]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / (std + 1e-9) * np.sqrt(252), 0.0)
+        sortino = np.where((down_n > 1) & (down_std > 0), mean / (down_std + 1e-9) * np.sqrt(252), 0.0)
+        profit_factor = np.where(loss_sum != 0, np.abs(win_sum / loss_sum), np.inf)
+    result = pd.DataFrame({
+        "trades": n.astype(np.int64),
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "win_rate": win_n / n * 100,
+        "profit_factor": profit_factor,
+        "drawdown": drawdown,
+    }, index=index[ends] if index is not None else ends)
+
+    result.loc[n < max(min_trades, 2), ROLLING_COLUMNS[1:]] = np.nan
+    return result
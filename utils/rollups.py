@@ -0,0 +1,362 @@
+# utils/rollups.py
+#
+# Per-strategy, per-day and per-month aggregates of the trade logs, kept in a
+# small SQLite table (data/rollups.db) and updated as trades are saved. Each
+# bucket holds the same running sums as MetricsState (count, sum, M2, downside
+# M2, wins/losses, durations) plus the bucket's equity path summary (min/max
+# cumulative pnl and the drawdown inside the bucket), so metrics for any date
+# range are answered by combining O(days) buckets instead of O(trades) rows.
+#
+# Inspect a log: python -m utils.rollups data/aapl_trades.csv [--period month]
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics_state import MetricsState
+from utils.sqlite_store import get_store, strategy_name
+from utils.storage import TRADE_STORE, journal_path_for, resolve_path
+from utils.trade_store import SUMMARY_COLUMNS, load_trade_log
+
+ROLLUP_DB_PATH = os.getenv("ROLLUP_DB_PATH", os.path.join("data", "rollups.db"))
+
+PERIODS = {"day": "datetime64[D]", "month": "datetime64[M]"}
+
+BUCKET_FIELDS = [
+    "count", "total", "mean", "m2",
+    "down_count", "down_mean", "down_m2",
+    "win_count", "win_sum", "loss_count", "loss_sum",
+    "min_equity", "max_equity", "max_drawdown",
+    "duration_count", "duration_sum",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rollups (
+    strategy TEXT NOT NULL,
+    period   TEXT NOT NULL,
+    bucket   TEXT NOT NULL,
+    {", ".join(f"{field} REAL" for field in BUCKET_FIELDS)},
+    PRIMARY KEY (strategy, period, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_sources (
+    strategy    TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+"""
+
+
+def log_fingerprint(path):
+    """Cheap identity of a trade log: file sizes and mtimes, or the SQLite row count."""
+    if TRADE_STORE == "sqlite":
+        return json.dumps(["sqlite", get_store().count(strategy_name(path))])
+    files = []
+    for candidate in dict.fromkeys([resolve_path(path), journal_path_for(path)]):
+        if os.path.exists(candidate):
+            stat = os.stat(candidate)
+            files.append([candidate, stat.st_size, stat.st_mtime_ns])
+    return json.dumps(files)
+
+
+def _bucket_frame(df, period):
+    """Aggregate a trade log into one row per `period` bucket (time ordered)."""
+    if df is None or df.empty or "timestamp" not in df.columns or "pnl" not in df.columns:
+        return pd.DataFrame(columns=["bucket"] + BUCKET_FIELDS)
+
+    ts = df["timestamp"]
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts, errors="coerce")
+    ts = ts.to_numpy("datetime64[ns]")
+    pnl = pd.to_numeric(df["pnl"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if "duration" in df.columns:
+        duration = pd.to_numeric(df["duration"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        duration = np.full(len(df), np.nan)
+
+    ok = ~np.isnat(ts)
+    order = np.argsort(ts[ok], kind="stable")
+    keys = ts[ok][order].astype(PERIODS[period])
+    pnl, duration = pnl[ok][order], duration[ok][order]
+    if not len(keys):
+        return pd.DataFrame(columns=["bucket"] + BUCKET_FIELDS)
+
+    buckets, group = np.unique(keys, return_inverse=True)
+    k = len(buckets)
+    out = {"bucket": buckets.astype("datetime64[D]").astype(str)}
+
+    has_duration = ~np.isnan(duration)
+    out["duration_count"] = np.bincount(group, weights=has_duration, minlength=k)
+    out["duration_sum"] = np.bincount(group[has_duration], weights=duration[has_duration], minlength=k)
+
+    valid = ~np.isnan(pnl)
+    g, x = group[valid], pnl[valid]
+    count = np.bincount(g, minlength=k)
+    total = np.bincount(g, weights=x, minlength=k)
+    mean = np.divide(total, count, out=np.zeros(k), where=count > 0)
+    out.update(count=count, total=total, mean=mean,
+               m2=np.bincount(g, weights=(x - mean[g]) ** 2, minlength=k))
+
+    down = x < 0
+    down_count = np.bincount(g[down], minlength=k)
+    down_mean = np.divide(np.bincount(g[down], weights=x[down], minlength=k), down_count,
+                          out=np.zeros(k), where=down_count > 0)
+    out.update(down_count=down_count, down_mean=down_mean,
+               down_m2=np.bincount(g[down], weights=(x[down] - down_mean[g[down]]) ** 2, minlength=k))
+
+    wins = x > 0
+    out.update(win_count=np.bincount(g[wins], minlength=k),
+               win_sum=np.bincount(g[wins], weights=x[wins], minlength=k),
+               loss_count=np.bincount(g[~wins], minlength=k),
+               loss_sum=np.bincount(g[~wins], weights=x[~wins], minlength=k))
+
+    # Equity path inside each bucket, relative to the bucket's opening equity
+    prefix = pd.Series(x).groupby(g).cumsum()
+    drawdown = prefix.groupby(g).cummax() - prefix
+    out["min_equity"] = prefix.groupby(g).min().reindex(range(k)).to_numpy()
+    out["max_equity"] = prefix.groupby(g).max().reindex(range(k)).to_numpy()
+    out["max_drawdown"] = drawdown.groupby(g).max().reindex(range(k), fill_value=0.0).to_numpy()
+    return pd.DataFrame(out)
+
+
+def combine(buckets):
+    """
+    Fold time-ordered bucket rows into one bucket (a dict of BUCKET_FIELDS).
+    Moments merge exactly (Chan et al.); the drawdown across buckets uses each
+    bucket's opening equity, its min/max prefix and the running peak before it.
+    """
+    b = {field: buckets[field].to_numpy(dtype="float64", na_value=np.nan) for field in BUCKET_FIELDS}
+    result = {field: 0.0 for field in BUCKET_FIELDS}
+    if not len(buckets):
+        result["min_equity"] = result["max_equity"] = np.nan
+        return result
+
+    for field in ("count", "total", "down_count", "win_count", "win_sum",
+                  "loss_count", "loss_sum", "duration_count", "duration_sum"):
+        result[field] = float(b[field].sum())
+
+    for n, mean, m2 in (("count", "mean", "m2"), ("down_count", "down_mean", "down_m2")):
+        total_n = result[n]
+        if total_n:
+            merged_mean = float((b[n] * b[mean]).sum() / total_n)
+            result[mean] = merged_mean
+            result[m2] = float((b[m2] + b[n] * (b[mean] - merged_mean) ** 2).sum())
+
+    opening = np.cumsum(b["total"]) - b["total"]
+    highs = opening + b["max_equity"]
+    lows = opening + b["min_equity"]
+    peak_before = np.fmax.accumulate(np.concatenate([[np.nan], highs[:-1]]))
+    with np.errstate(invalid="ignore"):
+        across = peak_before - lows
+    if np.isnan(lows).all():
+        result["min_equity"] = result["max_equity"] = np.nan
+    else:
+        result["min_equity"] = float(np.nanmin(lows))
+        result["max_equity"] = float(np.nanmax(highs))
+    result["max_drawdown"] = float(np.nanmax(np.concatenate([b["max_drawdown"], across, [0.0]])))
+    return result
+
+
+def bucket_metrics(bucket):
+    """calculate_metrics-style dict for one combined bucket."""
+    state = MetricsState()
+    for field in ("count", "down_count", "win_count", "loss_count", "duration_count"):
+        setattr(state, field, int(bucket[field]))
+    for field in ("total", "mean", "m2", "down_mean", "down_m2", "win_sum", "loss_sum",
+                  "max_drawdown", "duration_sum"):
+        setattr(state, field, float(bucket[field]))
+    return state.to_metrics()
+
+
+class RollupStore:
+    def __init__(self, db_path=ROLLUP_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def fingerprint(self, strategy):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM rollup_sources WHERE strategy = ?", (strategy,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def rebuild(self, strategy, df, fingerprint):
+        """Replace a strategy's buckets with ones aggregated from its full log."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rollups WHERE strategy = ?", (strategy,))
+            for period in PERIODS:
+                self._write(strategy, period, _bucket_frame(df, period))
+            if fingerprint is not None:
+                self._set_fingerprint(strategy, fingerprint)
+            else:
+                self._conn.execute("DELETE FROM rollup_sources WHERE strategy = ?", (strategy,))
+
+    def record(self, strategy, df, previous, fingerprint):
+        """
+        Fold newly appended trades into the day and month buckets they fall in.
+        Trades are assumed to arrive in time order; if the log changed since
+        the buckets were last written (previous != stored fingerprint) the
+        buckets are dropped and rebuilt from the log on the next query.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM rollup_sources WHERE strategy = ?", (strategy,)
+            ).fetchone()
+            if row is None or row[0] != previous:
+                self._conn.execute("DELETE FROM rollup_sources WHERE strategy = ?", (strategy,))
+                return
+            for period in PERIODS:
+                fresh = _bucket_frame(df, period)
+                if fresh.empty:
+                    continue
+                existing = self._read(strategy, period, fresh["bucket"].iloc[0], fresh["bucket"].iloc[-1])
+                existing = existing[existing["bucket"].isin(fresh["bucket"])]
+                merged = [
+                    dict(bucket=key, **combine(pd.concat([existing[existing["bucket"] == key], new], ignore_index=True)))
+                    if key in existing["bucket"].values else new.iloc[0].to_dict()
+                    for key, new in fresh.groupby("bucket", sort=True)
+                ]
+                self._write(strategy, period, pd.DataFrame(merged))
+            self._set_fingerprint(strategy, fingerprint)
+
+    def buckets(self, strategy, period="day", start=None, end=None):
+        with self._lock:
+            return self._read(strategy, period, start, end)
+
+    def range_buckets(self, strategy, start=None, end=None):
+        """
+        Time-ordered buckets covering [start, end] (whole days): full months
+        come from the month table, the partial months at either end from days.
+        """
+        if start is None or end is None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT MIN(bucket), MAX(bucket) FROM rollups WHERE strategy = ? AND period = 'day'",
+                    (strategy,),
+                ).fetchone()
+            if row[0] is None:
+                return self.buckets(strategy, "day", start, end)
+            start = pd.Timestamp(row[0]) if start is None else start
+            end = pd.Timestamp(row[1]) if end is None else end
+
+        first_day, last_day = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        first_month = first_day if first_day.day == 1 else first_day + pd.offsets.MonthBegin(1)
+        last_month = (last_day + pd.Timedelta(days=1)) - pd.offsets.MonthBegin(1)
+        if last_month < first_month:
+            return self.buckets(strategy, "day", first_day, last_day)
+
+        parts = [
+            self.buckets(strategy, "day", first_day, first_month - pd.Timedelta(days=1)),
+            self.buckets(strategy, "month", first_month, last_month - pd.Timedelta(days=1)),
+            self.buckets(strategy, "day", last_month, last_day),
+        ]
+        return pd.concat([p for p in parts if not p.empty] or parts[:1], ignore_index=True)
+
+    def _read(self, strategy, period, start, end):
+        where = ["strategy = ?", "period = ?"]
+        params = [strategy, period]
+        if start is not None:
+            where.append("bucket >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("bucket <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        sql = f"SELECT bucket, {', '.join(BUCKET_FIELDS)} FROM rollups WHERE {' AND '.join(where)} ORDER BY bucket"
+        return pd.read_sql_query(sql, self._conn, params=params)
+
+    def _write(self, strategy, period, frame):
+        if frame.empty:
+            return
+        rows = frame[["bucket"] + BUCKET_FIELDS].astype({f: "float64" for f in BUCKET_FIELDS})
+        # NaN equity bounds (buckets without pnl) are stored as NULL
+        values = [(strategy, period, *(None if isinstance(v, float) and np.isnan(v) else v for v in row))
+                  for row in rows.itertuples(index=False)]
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO rollups (strategy, period, bucket, {', '.join(BUCKET_FIELDS)}) "
+            f"VALUES ({', '.join('?' * (len(BUCKET_FIELDS) + 3))})",
+            values,
+        )
+
+    def _set_fingerprint(self, strategy, fingerprint):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO rollup_sources (strategy, fingerprint) VALUES (?, ?)",
+            (strategy, fingerprint),
+        )
+
+
+_rollups = None
+_rollups_lock = threading.Lock()
+
+
+def get_rollups(db_path=ROLLUP_DB_PATH):
+    global _rollups
+    with _rollups_lock:
+        if _rollups is None or _rollups.db_path != db_path:
+            _rollups = RollupStore(db_path)
+        return _rollups
+
+
+def record_trades(path, df, previous):
+    """Called by the trade writers after appending df; previous is the log fingerprint before the write."""
+    try:
+        get_rollups().record(strategy_name(path), df, previous, log_fingerprint(path))
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Rollup update failed for {path}: {e}")
+
+
+def ensure_rollups(path):
+    """Rebuild a log's buckets from the log itself when they are missing or stale."""
+    store = get_rollups()
+    strategy = strategy_name(path)
+    fingerprint = log_fingerprint(path)
+    if store.fingerprint(strategy) != fingerprint:
+        df = load_trade_log(path, columns=SUMMARY_COLUMNS, copy=False)
+        # A write racing the load leaves the buckets unowned, so the next query rebuilds again
+        store.rebuild(strategy, df, fingerprint if log_fingerprint(path) == fingerprint else None)
+    return store, strategy
+
+
+def range_metrics(path, start=None, end=None):
+    """
+    calculate_metrics-style dict for the trades of one log between start and
+    end (whole days), from the rollups. Returns None when there are no trades.
+    """
+    store, strategy = ensure_rollups(path)
+    buckets = store.range_buckets(strategy, start, end)
+    if buckets.empty or not buckets["count"].sum():
+        return None
+    return bucket_metrics(combine(buckets))
+
+
+def period_table(path, period="day", start=None, end=None):
+    """One row per day or month: trades, pnl, win rate, Sharpe and drawdown of that period."""
+    store, strategy = ensure_rollups(path)
+    buckets = store.buckets(strategy, period, start, end)
+    rows = [dict(bucket_metrics(row), period=row["bucket"]) for _, row in buckets.iterrows()]
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).set_index("period")
+    return table.reindex(columns=["number_of_trades", "closed_pl", "win_rate", "sharpe", "sortino",
+                                  "profit_factor", "max_drawdown"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show per-day or per-month rollups of a trade log.")
+    parser.add_argument("path")
+    parser.add_argument("--period", choices=list(PERIODS), default="month")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    args = parser.parse_args()
+    print(period_table(args.path, args.period, args.start, args.end).to_string())
+
+
+if __name__ == "__main__":
+    main()
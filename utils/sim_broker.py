@@ -0,0 +1,314 @@
+# utils/sim_broker.py
+#
+# Deterministic, in-process stand-in for TWS. SimulatedIB.attach(trader)
+# swaps the EClient calls of an unmodified EWrapper strategy instance for
+# simulated ones; replay() then feeds recorded bars back as historicalData,
+# tickPrice and realtimeBar events as fast as the CPU allows, fills orders
+# at the last price and times every callback.
+#
+# During replay the strategy module's `datetime` and `pd` see the simulated
+# clock (the bar time), so cooldowns behave as they would live, and its
+# BarCache points at a scratch directory instead of data/bars/.
+
+import contextlib
+import datetime
+import functools
+import queue
+import re
+import sys
+import tempfile
+import time
+import types
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_cache import BarCache
+
+LAST_PRICE = 4  # tickType of the last traded price
+
+DURATION_UNITS = {"S": "seconds", "D": "days", "W": "weeks"}
+
+
+class SimBar:
+    """Same attributes as ibapi.common.BarData."""
+
+    __slots__ = ("date", "open", "high", "low", "close", "volume", "wap", "barCount")
+
+    def __init__(self, date, open_, high, low, close, volume=0.0, wap=0.0, barCount=0):
+        self.date = date
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.wap = wap
+        self.barCount = barCount
+
+
+def _frame(bars):
+    """Normalize a close Series or an OHLC(V) DataFrame (DatetimeIndex or date column) to OHLCV arrays."""
+    if isinstance(bars, np.ndarray):
+        bars = pd.DataFrame({k: np.asarray(bars[k]) for k in bars.dtype.names}).set_index("date")
+    if isinstance(bars, pd.Series):
+        bars = bars.to_frame("close")
+    if "date" in bars.columns:
+        bars = bars.set_index("date")
+    bars = bars.sort_index()
+    close = bars["close"].to_numpy(dtype=np.float64)
+    columns = {c: bars[c].to_numpy(dtype=np.float64) if c in bars.columns else close for c in ("open", "high", "low")}
+    volume = bars["volume"].to_numpy(dtype=np.float64) if "volume" in bars.columns else np.zeros(len(close))
+    return pd.DatetimeIndex(bars.index), columns["open"], columns["high"], columns["low"], close, volume
+
+
+def _duration(text):
+    count, unit = text.split()
+    if unit == "M":
+        return pd.DateOffset(months=int(count))
+    if unit == "Y":
+        return pd.DateOffset(years=int(count))
+    return pd.Timedelta(**{DURATION_UNITS[unit]: int(count)})
+
+
+class _Clock:
+    def __init__(self, start):
+        self.now = pd.Timestamp(start)
+
+
+def _clocked_datetime(clock):
+    class SimDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now.to_pydatetime()
+
+    module = types.ModuleType("datetime")
+    module.__dict__.update(datetime.__dict__)
+    module.datetime = SimDatetime
+    return module
+
+
+def _clocked_pandas(clock):
+    class SimTimestamp:
+        def __new__(cls, *args, **kwargs):
+            return pd.Timestamp(*args, **kwargs)
+
+        @staticmethod
+        def now(tz=None):
+            return clock.now
+
+    class SimPandas(types.ModuleType):
+        def __getattr__(self, name):
+            return getattr(pd, name)
+
+    module = SimPandas("pandas")
+    module.Timestamp = SimTimestamp
+    return module
+
+
+class SimulatedIB:
+    """
+    history: {symbol: bars} answered to reqHistoricalData (bars up to the
+             current simulated time),
+    stream:  {symbol: bars} replayed in time order as tickPrice (last price)
+             to reqMktData subscribers and realtimeBar to reqRealTimeBars ones.
+
+    bars are close Series or OHLC(V) DataFrames with a DatetimeIndex.
+    """
+
+    def __init__(self, history=None, stream=None, account=None, start=None):
+        self.history = {s: _frame(b) for s, b in (history or {}).items()}
+        self.stream = {s: _frame(b) for s, b in (stream or {}).items()}
+        self.account = account or {"NetLiquidation": "100000", "TotalCashValue": "100000", "AccountType": "INDIVIDUAL"}
+
+        if start is None:
+            firsts = [f[0][0] for f in self.stream.values() if len(f[0])]
+            lasts = [f[0][-1] for f in self.history.values() if len(f[0])]
+            start = min(firsts) if firsts else (max(lasts) if lasts else pd.Timestamp.now())
+        self.clock = _Clock(start)
+
+        self.events = queue.Queue()
+        self.fills = []
+        self.latencies = defaultdict(list)
+        self.delivered = 0
+        self.wall_time = 0.0
+
+        self._traders = []
+        self._market_data = defaultdict(list)   # symbol -> [(trader, reqId)]
+        self._realtime_bars = defaultdict(list)
+        self._last_price = {s: f[4][f[0] <= self.clock.now][-1] for s, f in self.history.items()
+                            if (f[0] <= self.clock.now).any()}
+        self._scratch = tempfile.TemporaryDirectory(prefix="sim_bars_")
+
+    # --- wiring -------------------------------------------------------------
+
+    def attach(self, trader):
+        """Route the trader's EClient calls to this simulator (the instance only; the class is untouched)."""
+        for name in ("connect", "disconnect", "isConnected", "run", "reqHistoricalData", "reqMktData",
+                     "cancelMktData", "reqRealTimeBars", "cancelRealTimeBars", "reqAccountSummary",
+                     "cancelAccountSummary", "placeOrder", "reqIds"):
+            setattr(trader, name, functools.partial(getattr(self, f"_{name}"), trader))
+        cache = getattr(trader, "bar_cache", None)
+        if isinstance(cache, BarCache):
+            trader.bar_cache = BarCache(cache.symbol, cache.bar_size, cache.what_to_show, cache.use_rth,
+                                        cache_dir=self._scratch.name)
+        self._traders.append(trader)
+        return trader
+
+    @contextlib.contextmanager
+    def _patched_modules(self):
+        patches = {
+            "datetime": _clocked_datetime(self.clock),
+            "pd": _clocked_pandas(self.clock),
+            "BarCache": functools.partial(BarCache, cache_dir=self._scratch.name),
+        }
+        saved = []
+        for module in {sys.modules[type(t).__module__] for t in self._traders}:
+            for name, replacement in patches.items():
+                if name in module.__dict__:
+                    saved.append((module, name, module.__dict__[name]))
+                    setattr(module, name, replacement)
+        try:
+            yield
+        finally:
+            for module, name, original in reversed(saved):
+                setattr(module, name, original)
+
+    def _post(self, trader, callback, *args):
+        self.events.put((trader, callback, args))
+
+    def _deliver(self, trader, callback, args):
+        method = getattr(trader, callback, None)
+        if method is None:
+            return
+        start = time.perf_counter_ns()
+        method(*args)
+        self.latencies[callback].append(time.perf_counter_ns() - start)
+        self.delivered += 1
+
+    # --- simulated EClient --------------------------------------------------
+
+    def _connect(self, trader, host=None, port=None, clientId=None):
+        trader._sim_connected = True
+        self._post(trader, "nextValidId", 1)
+
+    def _disconnect(self, trader):
+        trader._sim_connected = False
+        for subs in (*self._market_data.values(), *self._realtime_bars.values()):
+            subs[:] = [s for s in subs if s[0] is not trader]
+
+    def _isConnected(self, trader):
+        return getattr(trader, "_sim_connected", False)
+
+    def _run(self, trader):
+        # The replay loop plays the reader thread; a trader's own run() has nothing to do
+        pass
+
+    def _reqIds(self, trader, numIds=1):
+        self._post(trader, "nextValidId", 1)
+
+    def _reqHistoricalData(self, trader, reqId, contract, endDateTime, durationStr, barSizeSetting,
+                           whatToShow, useRTH, formatDate, keepUpToDate, chartOptions):
+        data = self.history.get(contract.symbol)
+        if data is None:
+            self._post(trader, "error", reqId, 162, f"No simulated history for {contract.symbol}")
+            return
+        dates, open_, high, low, close, volume = data
+        now = self.clock.now
+        lo, hi = np.searchsorted(dates, [now - _duration(durationStr), now], side="right")
+        daily = re.search(r"day|week|month", barSizeSetting) is not None
+        fmt = "%Y%m%d" if daily else "%Y%m%d %H:%M:%S"
+        for i in range(lo, hi):
+            bar = SimBar(dates[i].strftime(fmt), open_[i], high[i], low[i], close[i], volume[i])
+            self._post(trader, "historicalData", reqId, bar)
+        self._post(trader, "historicalDataEnd", reqId, "", "")
+
+    def _reqMktData(self, trader, reqId, contract, genericTickList, snapshot, regulatorySnapshot, mktDataOptions):
+        self._market_data[contract.symbol].append((trader, reqId))
+        if contract.symbol in self._last_price:
+            self._post(trader, "tickPrice", reqId, LAST_PRICE, self._last_price[contract.symbol], None)
+
+    def _cancelMktData(self, trader, reqId):
+        for subs in self._market_data.values():
+            subs[:] = [s for s in subs if s != (trader, reqId)]
+
+    def _reqRealTimeBars(self, trader, reqId, contract, barSize, whatToShow, useRTH, realTimeBarsOptions):
+        self._realtime_bars[contract.symbol].append((trader, reqId))
+
+    def _cancelRealTimeBars(self, trader, reqId):
+        for subs in self._realtime_bars.values():
+            subs[:] = [s for s in subs if s != (trader, reqId)]
+
+    def _reqAccountSummary(self, trader, reqId, groupName, tags):
+        for tag in tags.split(","):
+            if tag in self.account:
+                self._post(trader, "accountSummary", reqId, "SIM", tag, self.account[tag], "USD")
+        self._post(trader, "accountSummaryEnd", reqId)
+
+    def _cancelAccountSummary(self, trader, reqId):
+        pass
+
+    def _placeOrder(self, trader, orderId, contract, order):
+        price = self._last_price.get(contract.symbol, float("nan"))
+        qty = float(order.totalQuantity)
+        self.fills.append({"timestamp": self.clock.now, "symbol": contract.symbol, "orderId": orderId,
+                           "action": order.action, "quantity": qty, "price": price})
+        self._post(trader, "orderStatus", orderId, "Filled", qty, 0.0, price, orderId, 0, price, 0, "", 0.0)
+
+    # --- replay -------------------------------------------------------------
+
+    def _drain(self, settle):
+        while True:
+            try:
+                trader, callback, args = self.events.get(timeout=settle) if settle else self.events.get_nowait()
+            except queue.Empty:
+                return
+            self._deliver(trader, callback, args)
+
+    def replay(self, settle=0.05):
+        """
+        Connect every attached trader and replay the stream to the end.
+        `settle` is how long to wait for requests sent from the traders' own
+        threads (e.g. HistoryScheduler) once the stream is exhausted.
+        """
+        # One time-ordered sequence over all streamed symbols
+        symbols = list(self.stream)
+        times = np.concatenate([self.stream[s][0].asi8 for s in symbols] or [np.empty(0, np.int64)])
+        which = np.concatenate([np.full(len(self.stream[s][0]), i) for i, s in enumerate(symbols)] or [np.empty(0, np.int64)])
+        rows = np.concatenate([np.arange(len(self.stream[s][0])) for s in symbols] or [np.empty(0, np.int64)])
+        order = np.argsort(times, kind="stable")
+
+        start = time.perf_counter()
+        with self._patched_modules():
+            for trader in self._traders:
+                trader.connect("127.0.0.1", 7497, clientId=0)
+            self._drain(0)
+            for k in order:
+                symbol = symbols[which[k]]
+                dates, open_, high, low, close, volume = self.stream[symbol]
+                i = rows[k]
+                self.clock.now = dates[i]
+                self._last_price[symbol] = close[i]
+                for trader, reqId in self._realtime_bars[symbol]:
+                    self._post(trader, "realtimeBar", reqId, int(dates[i].timestamp()), open_[i], high[i],
+                               low[i], close[i], volume[i], close[i], 0)
+                for trader, reqId in self._market_data[symbol]:
+                    self._post(trader, "tickPrice", reqId, LAST_PRICE, close[i], None)
+                self._drain(0)
+            self._drain(settle)
+        self.wall_time = time.perf_counter() - start
+        return self
+
+    def report(self):
+        """Per-callback count and latency (microseconds), plus overall events per second."""
+        rows = []
+        for callback, samples in sorted(self.latencies.items()):
+            us = np.asarray(samples, dtype=np.float64) / 1e3
+            rows.append({"callback": callback, "count": len(us), "mean_us": us.mean(),
+                         "p50_us": np.percentile(us, 50), "p99_us": np.percentile(us, 99), "max_us": us.max()})
+        table = pd.DataFrame(rows, columns=["callback", "count", "mean_us", "p50_us", "p99_us", "max_us"])
+        events_per_second = self.delivered / self.wall_time if self.wall_time else 0.0
+        return table, events_per_second
+
+    def close(self):
+        self._scratch.cleanup()
@@ -0,0 +1,241 @@
+# utils/sqlite_store.py
+#
+# Optional embedded SQLite store for all strategies' trades (TRADE_STORE=sqlite).
+# One WAL-mode `trades` table indexed on (strategy, timestamp) and
+# (strategy, symbol) replaces the one-CSV-per-strategy layout, so "did we
+# trade today?" checks and date-range/symbol views become indexed queries.
+#
+# Import existing logs: python -m utils.sqlite_store [--data-dir data]
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.storage import backend_for
+
+DB_PATH = os.getenv("TRADE_DB_PATH", os.path.join("data", "trades.db"))
+
+# Columns stored natively; everything else (sma_200, sell_strike, credit, ...) goes to `extra`
+CORE_COLUMNS = ["timestamp", "symbol", "action", "price", "pnl", "duration"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id        INTEGER PRIMARY KEY,
+    strategy  TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    symbol    TEXT,
+    action    TEXT,
+    price     REAL,
+    pnl       REAL,
+    duration  REAL,
+    extra     TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS trades_strategy_key ON trades (strategy, key);
+CREATE INDEX IF NOT EXISTS trades_strategy_timestamp ON trades (strategy, timestamp);
+CREATE INDEX IF NOT EXISTS trades_strategy_symbol ON trades (strategy, symbol);
+"""
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def strategy_name(path):
+    """data/spx_bull_put_trades.csv -> spx_bull_put"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem[:-len("_trades")] if stem.endswith("_trades") else stem
+
+
+def _to_sql_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _format_ts(value):
+    return pd.Timestamp(value).strftime(TIMESTAMP_FORMAT)
+
+
+class TradeStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def insert(self, strategy, records, key_columns=("timestamp",)):
+        """Bulk insert trades, ignoring rows whose natural key is already stored."""
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        if df.empty:
+            return 0
+
+        extra_columns = [c for c in df.columns if c not in CORE_COLUMNS]
+        rows = []
+        for record in df.to_dict("records"):
+            ts = _format_ts(record["timestamp"])
+            key = json.dumps([ts if c == "timestamp" else _to_sql_value(record.get(c)) for c in key_columns])
+            extra = {c: _to_sql_value(record[c]) for c in extra_columns}
+            rows.append((
+                strategy, key, ts,
+                _to_sql_value(record.get("symbol")),
+                _to_sql_value(record.get("action")),
+                _to_sql_value(record.get("price")),
+                _to_sql_value(record.get("pnl")),
+                _to_sql_value(record.get("duration")),
+                json.dumps(extra) if extra else None,
+            ))
+
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO trades "
+                "(strategy, key, timestamp, symbol, action, price, pnl, duration, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def query(self, strategy, start=None, end=None, symbols=None, columns=None):
+        """Trades of one strategy, filtered on the indexed timestamp/symbol columns."""
+        where = ["strategy = ?"]
+        params = [strategy]
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(_format_ts(start))
+        if end is not None:
+            where.append("timestamp <= ?")
+            params.append(_format_ts(end))
+        if symbols:
+            where.append(f"symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(symbols)
+
+        select = CORE_COLUMNS + ["extra"]
+        if columns is not None:
+            select = [c for c in CORE_COLUMNS if c in columns] + ["extra"]
+
+        sql = f"SELECT {', '.join(select)} FROM trades WHERE {' AND '.join(where)} ORDER BY timestamp, id"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+
+        extra = df.pop("extra")
+        if extra.notna().any():
+            expanded = pd.DataFrame([json.loads(e) if e else {} for e in extra], index=df.index)
+            if columns is not None:
+                expanded = expanded[[c for c in expanded.columns if c in columns]]
+            df = pd.concat([df, expanded], axis=1)
+        # Drop core columns a strategy never fills (e.g. symbol for SMA200)
+        if not df.empty:
+            unused = [c for c in ("symbol", "action", "price", "duration") if c in df.columns and df[c].isna().all()]
+            df = df.drop(columns=unused)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
+    def count(self, strategy):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM trades WHERE strategy = ?", (strategy,)).fetchone()[0]
+
+    def last_trade_time(self, strategy):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(timestamp) FROM trades WHERE strategy = ?", (strategy,)
+            ).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def trades_on_day(self, strategy, day, columns=None):
+        day = pd.Timestamp(day).normalize()
+        end = day + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        return self.query(strategy, start=day, end=end, columns=columns)
+
+    def symbols(self, strategy):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT symbol FROM trades WHERE strategy = ? AND symbol IS NOT NULL ORDER BY symbol",
+                (strategy,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def strategies(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT strategy FROM trades ORDER BY strategy").fetchall()
+        return [r[0] for r in rows]
+
+    def writer(self, strategy, key_columns):
+        return StoreWriter(self, strategy, key_columns)
+
+
+class StoreWriter:
+    """Journal-compatible writer (append/flush/close/compact) for one strategy."""
+
+    def __init__(self, store, strategy, key_columns):
+        self.store = store
+        self.strategy = strategy
+        self.key_columns = list(key_columns)
+
+    def append(self, records):
+        from utils.rollups import record_trades
+
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        previous = json.dumps(["sqlite", self.store.count(self.strategy)])
+        inserted = self.store.insert(self.strategy, df, self.key_columns)
+        if inserted:
+            # Ignored duplicates make the new rows unknown; the rollups then rebuild lazily
+            record_trades(self.strategy, df, previous if inserted == len(df) else None)
+        return inserted
+
+    def flush(self):
+        pass  # Each executemany is its own transaction
+
+    def close(self):
+        pass
+
+    def compact(self):
+        pass  # The unique (strategy, key) index already keeps the table deduplicated
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(db_path=DB_PATH):
+    global _store
+    with _store_lock:
+        if _store is None or _store.db_path != db_path:
+            _store = TradeStore(db_path)
+        return _store
+
+
+def import_logs(data_dir="data", db_path=DB_PATH):
+    """
+    Load every data/*_trades.{csv,parquet} into the SQLite store. Imported rows
+    are keyed on all their columns, so re-running the import is idempotent.
+    """
+    store = get_store(db_path)
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(("_trades.csv", "_trades.parquet")):
+            continue
+        path = os.path.join(data_dir, filename)
+        df = backend_for(path).read(path)
+        inserted = store.insert(strategy_name(path), df, key_columns=[c for c in df.columns])
+        print(f"✅ {filename}: {inserted} new rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import trade logs into the SQLite trade store.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+    import_logs(args.data_dir, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# utils/storage.py
+#
+# Pluggable on-disk formats for trade logs. CSV stays the default; Parquet
+# (typed, compressed, one row group per trading day) is enabled with
+# TRADE_LOG_FORMAT=parquet and needs the optional pyarrow dependency.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+STORAGE_FORMAT = os.getenv("TRADE_LOG_FORMAT", "csv").lower()
+
+# "files" keeps one log per strategy under data/; "sqlite" uses utils.sqlite_store
+TRADE_STORE = os.getenv("TRADE_STORE", "files").lower()
+
+
+class CSVBackend:
+    extension = ".csv"
+
+    def read(self, path, columns=None):
+        if columns is None:
+            return pd.read_csv(path, parse_dates=["timestamp"])
+        wanted = set(columns)
+        df = pd.read_csv(path, usecols=lambda c: c in wanted)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        return df
+
+    def write(self, df, path):
+        tmp_path = path + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+class ParquetBackend:
+    extension = ".parquet"
+    compression = "zstd"
+
+    def _pyarrow(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet trade logs require pyarrow: pip install pyarrow") from e
+        return pa, pq
+
+    def read(self, path, columns=None, start=None, end=None):
+        """
+        Read a Parquet trade log, optionally projecting columns and pruning
+        row groups (days) outside [start, end] via the timestamp statistics.
+        """
+        _, pq = self._pyarrow()
+        if columns is not None:
+            available = pq.read_schema(path).names
+            columns = [c for c in columns if c in available]
+
+        filters = []
+        if start is not None:
+            filters.append(("timestamp", ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append(("timestamp", "<=", pd.Timestamp(end)))
+
+        table = pq.read_table(path, columns=columns, filters=filters or None)
+        return table.to_pandas()
+
+    def write(self, df, path):
+        pa, pq = self._pyarrow()
+        df = df.copy()
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        tmp_path = path + ".tmp"
+        with pq.ParquetWriter(tmp_path, table.schema, compression=self.compression) as writer:
+            if "timestamp" not in df.columns or df.empty:
+                writer.write_table(table)
+            else:
+                # One row group per calendar day so date-range reads can skip whole days
+                days = df["timestamp"].dt.normalize().to_numpy()
+                starts = np.flatnonzero(days[1:] != days[:-1]) + 1
+                bounds = np.concatenate(([0], starts, [len(days)]))
+                for lo, hi in zip(bounds[:-1], bounds[1:]):
+                    writer.write_table(table.slice(int(lo), int(hi - lo)))
+        os.replace(tmp_path, path)
+
+
+BACKENDS = {
+    "csv": CSVBackend(),
+    "parquet": ParquetBackend(),
+}
+
+
+def with_format(path, fmt):
+    root, _ = os.path.splitext(path)
+    return root + BACKENDS[fmt].extension
+
+
+def backend_for(path):
+    ext = os.path.splitext(path)[1].lower()
+    for backend in BACKENDS.values():
+        if backend.extension == ext:
+            return backend
+    raise ValueError(f"Unsupported trade log format: {path}")
+
+
+def resolve_path(path):
+    """
+    Map a logical trade-log path (e.g. DATA_PATH = data/aapl_trades.csv) to
+    the file that should be read: the configured format if it exists, then
+    the path as given, then any other supported format.
+    """
+    preferred = with_format(path, STORAGE_FORMAT)
+    if os.path.exists(preferred):
+        return preferred
+    if os.path.exists(path):
+        return path
+    for fmt in BACKENDS:
+        candidate = with_format(path, fmt)
+        if os.path.exists(candidate):
+            return candidate
+    return preferred
+
+
+def journal_path_for(path):
+    """
+    Append-only journal for a logical trade log. With CSV storage the log
+    itself is the journal; columnar formats get a CSV sidecar that is
+    folded into the base file on compaction.
+    """
+    target = with_format(path, STORAGE_FORMAT)
+    if STORAGE_FORMAT == "csv":
+        return target
+    root, _ = os.path.splitext(path)
+    return root + ".journal.csv"
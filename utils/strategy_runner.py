@@ -0,0 +1,117 @@
+# utils/strategy_runner.py
+#
+# Concurrent loading and execution of the strategies/ modules for dashboard.py.
+# A thread pool is used rather than processes: Strategy objects come from
+# dynamically loaded modules (not picklable) and the bots are I/O bound on
+# their IB sockets, each with its own clientId.
+
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_TIMEOUT = float(os.getenv("STRATEGY_TIMEOUT", "900"))  # seconds per strategy
+MAX_WORKERS = int(os.getenv("STRATEGY_WORKERS", "8"))
+
+# Runs still in progress in this process, by strategy name. A rerun reuses a
+# strategy's live run instead of starting a second bot with the same clientId.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def load_module(folder, filename):
+    path = os.path.join(folder, filename)
+    module_name = filename[:-3]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        print(f"⚠️ Skipping {filename}: cannot load module spec.")
+        return module_name, None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module_name, module
+
+
+def load_strategies(folder, max_workers=MAX_WORKERS):
+    """
+    Import every strategy file in parallel.
+
+    Returns (strategies, data_paths, timeouts) keyed by module name. A module
+    may define RUN_TIMEOUT to override DEFAULT_TIMEOUT.
+    """
+    filenames = sorted(f for f in os.listdir(folder) if f.endswith(".py"))
+    strategies, data_paths, timeouts = {}, {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for module_name, module in pool.map(lambda f: load_module(folder, f), filenames):
+            if module is not None and hasattr(module, "Strategy"):
+                strategies[module_name] = module.Strategy()
+                data_paths[module_name] = getattr(module, "DATA_PATH", None)
+                timeouts[module_name] = getattr(module, "RUN_TIMEOUT", DEFAULT_TIMEOUT)
+    return strategies, data_paths, timeouts
+
+
+def _run_one(strategy):
+    # ib_insync based strategies need an event loop in their worker thread
+    try:
+        asyncio.get_event_loop()
+    except RuntimeError:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+    start = time.perf_counter()
+    df = strategy.run()
+    return df, time.perf_counter() - start
+
+
+def _release(name, future):
+    with _in_flight_lock:
+        if _in_flight.get(name) is future:
+            del _in_flight[name]
+
+
+def run_strategies(strategies, timeouts=None, max_workers=MAX_WORKERS):
+    """
+    Run strategy.run() for every strategy concurrently.
+
+    Yields (name, df, error, elapsed) as each strategy finishes. A strategy
+    that exceeds its timeout is reported with a TimeoutError and df=None; its
+    thread is abandoned (Python threads cannot be killed) and the caller is
+    expected to fall back to the saved trade log. A strategy whose run from an
+    earlier call (e.g. an interrupted Streamlit rerun) is still alive is not
+    started again; that run is awaited instead.
+    """
+    timeouts = timeouts or {}
+    pool = ThreadPoolExecutor(max_workers=max_workers or 1, thread_name_prefix="strategy")
+    started = time.monotonic()
+    pending = {}
+    for name, strategy in strategies.items():
+        with _in_flight_lock:
+            future = _in_flight.get(name)
+            if future is None:
+                future = pool.submit(_run_one, strategy)
+                _in_flight[name] = future
+                future.add_done_callback(lambda f, name=name: _release(name, f))
+            else:
+                print(f"ℹ️ {name} is still running from an earlier pass; waiting for that run.")
+        pending[future] = (name, started + timeouts.get(name, DEFAULT_TIMEOUT))
+
+    try:
+        while pending:
+            next_deadline = min(deadline for _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = pending.pop(future)
+                try:
+                    df, elapsed = future.result()
+                    yield name, df, None, elapsed
+                except Exception as e:
+                    yield name, None, e, time.monotonic() - started
+
+            now = time.monotonic()
+            for future, (name, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(future)
+                    future.cancel()
+                    yield name, None, TimeoutError(f"{name} exceeded {deadline - started:.0f}s"), now - started
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
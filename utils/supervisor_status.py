@@ -0,0 +1,91 @@
+# utils/supervisor_status.py
+#
+# Status board shared between supervisor.py (writer) and the dashboards
+# (readers) through a small WAL-mode SQLite file, so a UI rerun never talks
+# to TWS itself.
+
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+SUPERVISOR_DB = os.getenv("SUPERVISOR_DB", os.path.join("data", "supervisor.db"))
+HEARTBEAT_TIMEOUT = 30  # seconds without a heartbeat before the supervisor counts as down
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS strategy_status (
+    strategy       TEXT PRIMARY KEY,
+    state          TEXT NOT NULL DEFAULT 'starting',
+    pid            INTEGER,
+    connected      INTEGER DEFAULT 0,
+    session_start  REAL,
+    last_heartbeat REAL,
+    last_refresh   REAL,
+    trades_saved   INTEGER DEFAULT 0,
+    last_trade_at  TEXT,
+    last_error     TEXT
+);
+"""
+
+FIELDS = ("state", "pid", "connected", "session_start", "last_heartbeat",
+          "last_refresh", "trades_saved", "last_trade_at", "last_error")
+
+
+class StatusBoard:
+    def __init__(self, db_path=SUPERVISOR_DB):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def update(self, strategy, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown status fields: {sorted(unknown)}")
+        fields.setdefault("last_heartbeat", time.time())
+        fields.setdefault("pid", os.getpid())
+        columns = ["strategy", *fields]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO strategy_status ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(strategy) DO UPDATE SET {updates}",
+                [strategy, *fields.values()],
+            )
+
+    def read(self):
+        with self._lock:
+            df = pd.read_sql_query("SELECT * FROM strategy_status ORDER BY strategy", self._conn)
+        for col in ("session_start", "last_heartbeat", "last_refresh"):
+            df[col] = pd.to_datetime(df[col], unit="s")
+        return df
+
+    def is_alive(self, timeout=HEARTBEAT_TIMEOUT):
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(last_heartbeat) FROM strategy_status").fetchone()
+        return bool(row and row[0] and time.time() - row[0] < timeout)
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def get_status_board(db_path=SUPERVISOR_DB):
+    """Process-wide board per database, so dashboard reruns reuse one connection."""
+    with _boards_lock:
+        board = _boards.get(db_path)
+        if board is None:
+            board = StatusBoard(db_path)
+            _boards[db_path] = board
+        return board
+
+
+def supervisor_status(db_path=SUPERVISOR_DB):
+    """(alive, status DataFrame) for the dashboards; (False, None) if no supervisor ever ran."""
+    if not os.path.exists(db_path):
+        return False, None
+    board = get_status_board(db_path)
+    return board.is_alive(), board.read()
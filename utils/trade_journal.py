@@ -0,0 +1,327 @@
+# utils/trade_journal.py
+#
+# Append-only trade journal shared by every strategy's save_trades.
+# Appends cost O(new trades) regardless of history size: rows are written
+# with a single O_APPEND write, duplicates are filtered against an in-memory
+# index of each strategy's natural key, fsyncs are batched, and a background
+# compaction periodically rewrites the log (dedup, folding a CSV journal
+# into a Parquet base).
+
+import atexit
+import io
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils.rollups import log_fingerprint, record_trades
+from utils.sqlite_store import get_store, strategy_name
+from utils.storage import BACKENDS, STORAGE_FORMAT, TRADE_STORE, backend_for, journal_path_for, resolve_path, with_format
+from utils.trade_store import invalidate, load_trade_log
+
+FSYNC_EVERY = 16          # appends between forced fsyncs
+FSYNC_INTERVAL = 1.0      # seconds between forced fsyncs
+COMPACT_EVERY = 50_000    # appended rows between background compactions
+
+
+def _key_columns(df, columns):
+    # Normalise key columns so in-memory trades compare equal to rows parsed back from disk
+    normalised = []
+    for col in columns:
+        values = df[col]
+        if col == "timestamp":
+            values = pd.to_datetime(values, errors="coerce")
+        elif pd.api.types.is_numeric_dtype(values):
+            values = values.astype("float64")
+        else:
+            values = values.astype(str)
+        normalised.append(values.tolist())
+    return normalised
+
+
+class TradeJournal:
+    """
+    Append-only writer for one logical trade log (a strategy's DATA_PATH).
+
+    key_columns is the strategy's natural key, e.g. ["timestamp", "action",
+    "price"] or ["timestamp", "sell_strike", "buy_strike"] for SPX; rows whose
+    key was already written are skipped, matching the old drop_duplicates.
+    """
+
+    def __init__(self, path, key_columns=("timestamp",), fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = journal_path_for(path)
+        self.key_columns = list(key_columns)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._fd = None
+        self._columns = None
+        self._index = None
+        self._pending_syncs = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+        self._rows_since_compact = 0
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+        self._generation = 0  # bumped by every full rewrite of the journal
+
+    # --- public API -------------------------------------------------------
+
+    def append(self, records):
+        """Append trade dicts (or a DataFrame); returns the number of rows written."""
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        if df.empty:
+            return 0
+
+        with self._lock:
+            df = self._drop_known(df)
+            if df.empty:
+                return 0
+
+            self._open()
+            previous = log_fingerprint(self.path)
+            new_columns = [c for c in df.columns if c not in self._columns]
+            if new_columns:
+                # Schema change: one full rewrite with the union of columns
+                self._rewrite(df)
+            else:
+                buf = io.StringIO()
+                # Columns the batch lacks are written empty, as the old concat did
+                df.reindex(columns=self._columns).to_csv(buf, header=False, index=False)
+                os.write(self._fd, buf.getvalue().encode("utf-8"))
+                self._pending_syncs += 1
+
+            self._index.update(self._keys(df))
+            record_trades(self.path, df, previous)
+            self._rows_since_compact += len(df)
+            self._maybe_sync()
+            self._maybe_compact()
+            return len(df)
+
+    def flush(self):
+        with self._lock:
+            if self._fd is not None and self._pending_syncs:
+                os.fsync(self._fd)
+            self._pending_syncs = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def compact(self):
+        """
+        Rewrite the log deduplicated on the natural key. For columnar storage
+        the CSV journal is folded into the base file and removed. Reading and
+        rewriting happen outside the lock, so appends keep flowing; rows
+        appended meanwhile are carried over when the new files are swapped in.
+        """
+        with self._compact_lock:
+            with self._lock:
+                self.flush()
+                generation = self._generation
+                size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+            df = self._read_snapshot(size)
+            if df.empty:
+                return
+            df = df.drop_duplicates(subset=[c for c in self.key_columns if c in df.columns])
+            target = with_format(self.path, STORAGE_FORMAT)
+            staged = target + ".compact"
+            BACKENDS[STORAGE_FORMAT].write(df, staged)
+
+            with self._lock:
+                if self._generation != generation:
+                    # The journal was rewritten (schema change) meanwhile; try again later
+                    os.remove(staged)
+                    return
+                self._swap(df, staged, target, size)
+
+    # --- internals --------------------------------------------------------
+
+    def _read_snapshot(self, size):
+        # Base log plus the first `size` bytes of the journal
+        frames = []
+        base = resolve_path(self.path)
+        if base != self.journal_path and os.path.exists(base):
+            frames.append(backend_for(base).read(base))
+        if size:
+            with open(self.journal_path, "rb") as f:
+                frames.append(BACKENDS["csv"].read(io.BytesIO(f.read(size))))
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def _swap(self, df, staged, target, size):
+        # Called with the lock held: install the compacted log and keep rows appended after the snapshot
+        columns = self._columns
+        tail = b""
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                f.seek(size)
+                tail = f.read()
+        self.close()
+
+        if self.journal_path == target:
+            if tail and list(df.columns) != columns:
+                # The compacted columns differ from the journal's (e.g. a legacy base): rewrite with the tail
+                tail_rows = BACKENDS["csv"].read(io.BytesIO((",".join(columns) + "\n").encode("utf-8") + tail))
+                BACKENDS["csv"].write(pd.concat([df, tail_rows], ignore_index=True), staged)
+            elif tail:
+                with open(staged, "ab") as f:
+                    f.write(tail)
+            os.replace(staged, target)
+        else:
+            os.replace(staged, target)
+            if tail:
+                tmp_path = self.journal_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write((",".join(columns) + "\n").encode("utf-8") + tail)
+                os.replace(tmp_path, self.journal_path)
+            elif os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        invalidate(target)
+        invalidate(self.journal_path)
+
+        self._columns = None
+        self._index = set(self._keys(df))
+        if tail:
+            header = (",".join(columns) + "\n").encode("utf-8")
+            self._index.update(self._keys(BACKENDS["csv"].read(io.BytesIO(header + tail))))
+        self._rows_since_compact = 0
+
+    def _open(self):
+        if self._fd is not None or self._columns == []:
+            return
+        self._terminate_last_line()
+
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            with open(self.journal_path, encoding="utf-8") as f:
+                self._columns = f.readline().strip().split(",")
+        else:
+            # New journal: inherit the base log's columns so the two stay aligned
+            self._columns = list(load_trade_log(self.path, copy=False).columns)
+            if not self._columns:
+                return  # First append creates the file through _rewrite
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.write(",".join(self._columns) + "\n")
+
+        self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND)
+
+    def _terminate_last_line(self):
+        # A log that does not end in a newline ends in a torn (partially written)
+        # row; cut it off at the last complete line instead of keeping it as a row
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            return
+        with open(self.journal_path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                step = min(pos, 64 * 1024)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    f.truncate(pos + newline + 1)
+                    return
+        # Not even the header is complete: start the log afresh
+        os.remove(self.journal_path)
+
+    def _rewrite(self, df):
+        existing = pd.DataFrame()
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            existing = BACKENDS["csv"].read(self.journal_path)
+        combined = pd.concat([existing, df], ignore_index=True) if not existing.empty else df
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        BACKENDS["csv"].write(combined, self.journal_path)
+        invalidate(self.journal_path)
+        self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND)
+        self._columns = list(combined.columns)
+        self._pending_syncs = 0
+        self._generation += 1
+
+    def _keys(self, df):
+        cols = [c for c in self.key_columns if c in df.columns]
+        if not cols or df.empty:
+            return []
+        return list(zip(*_key_columns(df, cols)))
+
+    def _drop_known(self, df):
+        if self._index is None:
+            history = load_trade_log(self.path, columns=self.key_columns, copy=False)
+            self._index = set(self._keys(history))
+        keys = self._keys(df)
+        if not keys:
+            return df
+        seen = set()
+        keep = []
+        for key in keys:
+            keep.append(key not in self._index and key not in seen)
+            seen.add(key)
+        return df[keep]
+
+    def _maybe_sync(self):
+        if (self._pending_syncs >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.flush()
+        elif self._pending_syncs and self._sync_timer is None:
+            # No append may follow this one; sync it within fsync_interval anyway
+            self._sync_timer = threading.Timer(self.fsync_interval, self._timed_flush)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._sync_timer = None
+            self.flush()
+
+    def _maybe_compact(self):
+        if self._rows_since_compact < self.compact_every:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._rows_since_compact = 0
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(path, key_columns=("timestamp",)):
+    """
+    Process-wide journal per trade log, so the dedup index is built once.
+    With TRADE_STORE=sqlite the trades go to the shared SQLite table instead.
+    """
+    if TRADE_STORE == "sqlite":
+        return get_store().writer(strategy_name(path), key_columns)
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = TradeJournal(path, key_columns)
+            _journals[path] = journal
+        return journal
+
+
+@atexit.register
+def _flush_all():
+    for journal in list(_journals.values()):
+        try:
+            journal.close()
+        except OSError:
+            pass
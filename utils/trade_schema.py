@@ -0,0 +1,119 @@
+# utils/trade_schema.py
+#
+# Canonical in-memory schema for trade logs. Logs parse as object strings and
+# float64 everywhere; compact() converts them to datetime64 timestamps,
+# categorical symbol/action/status (int8 codes), float32 for price-like
+# columns whose values survive the round trip at FLOAT32_DECIMALS, and
+# downcast integers. pnl stays float64 because it feeds running sums, and
+# duration only becomes float32 when every value is represented exactly.
+#
+# Report a log's footprint: python -m utils.trade_schema data/aapl_trades.csv
+
+import argparse
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ["symbol", "action", "status"]
+FLOAT64_COLUMNS = ["pnl"]
+EXACT_COLUMNS = ["duration"]
+FLOAT32_DECIMALS = int(os.getenv("TRADE_SCHEMA_DECIMALS", "4"))
+
+# Footprint (before, after) of the latest compacted frame per log and projection
+_footprints = {}
+_stats_lock = threading.Lock()
+
+
+def _float32_allowed(values, exact):
+    narrowed = values.astype("float32").astype("float64")
+    finite = np.isfinite(values)
+    if not np.array_equal(np.isfinite(narrowed), finite):
+        return False  # Overflow beyond float32 range
+    if exact:
+        return np.array_equal(narrowed[finite], values[finite])
+    return bool((np.abs(narrowed[finite] - values[finite]) < 0.5 * 10.0 ** -FLOAT32_DECIMALS).all())
+
+
+def compact(df):
+    """Return df converted to the compact trade schema (the input is not modified)."""
+    if df is None or df.empty:
+        return df
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if col == "timestamp":
+            if kind != "M":
+                series = pd.to_datetime(series, errors="coerce")
+        elif col in CATEGORICAL_COLUMNS or (pd.api.types.is_string_dtype(series) and series.nunique() <= len(series) // 2):
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+        elif kind == "f" and col not in FLOAT64_COLUMNS and series.dtype != np.float32:
+            values = series.to_numpy(dtype="float64")
+            if _float32_allowed(values, exact=col in EXACT_COLUMNS):
+                series = series.astype("float32")
+        elif kind in "iu":
+            series = pd.to_numeric(series, downcast="integer")
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_footprint(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def memory_report(before, after):
+    """Per-column dtype and bytes before and after compaction, with a total row."""
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_after": after.memory_usage(deep=True, index=False),
+    })
+    report.loc["total"] = ["", report["bytes_before"].sum(), "", report["bytes_after"].sum()]
+    return report
+
+
+def compact_and_record(df, key):
+    """
+    compact() that records the before/after footprint under key (e.g. the
+    log path and projected columns), replacing the previous frame's.
+    """
+    if df is None or df.empty:
+        return df
+    result = compact(df)
+    with _stats_lock:
+        _footprints[key] = (memory_footprint(df), memory_footprint(result))
+    return result
+
+
+def schema_stats():
+    """Number of compacted logs held and their footprint before/after, in bytes."""
+    with _stats_lock:
+        footprints = list(_footprints.values())
+    return {
+        "logs": len(footprints),
+        "before": sum(before for before, _ in footprints),
+        "after": sum(after for _, after in footprints),
+    }
+
+
+def main():
+    from utils.trade_store import load_trade_log
+
+    parser = argparse.ArgumentParser(description="Report the memory footprint of trade logs in the compact schema.")
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+    for path in args.paths:
+        before = load_trade_log(path)
+        report = memory_report(before, compact(before))
+        total = report.loc["total"]
+        print(f"🧮 {path}: {len(before):,} rows, {total['bytes_before'] / 1e6:.2f} MB -> "
+              f"{total['bytes_after'] / 1e6:.2f} MB")
+        print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# utils/trade_store.py
+#
+# Central trade-log repository. Every reader (dashboards and each strategy's
+# get_trade_log) goes through load_trade_log so a log is parsed at most once
+# per change on disk. The on-disk format is chosen by utils.storage; with
+# TRADE_STORE=sqlite all reads are served by utils.sqlite_store instead.
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.storage import (
+    STORAGE_FORMAT, TRADE_STORE, BACKENDS, backend_for, journal_path_for, resolve_path, with_format
+)
+from utils.sqlite_store import get_store, strategy_name
+from utils.trade_schema import compact as compact_schema, compact_and_record
+
+# Memory budget for parsed trade logs, overridable per deployment
+DEFAULT_CACHE_MB = float(os.getenv("TRADE_LOG_CACHE_MB", "256"))
+
+# Columns needed for the performance summary (column projection)
+SUMMARY_COLUMNS = ["timestamp", "pnl", "duration"]
+
+
+class TradeLogCache:
+    """
+    In-process LRU cache of parsed trade logs.
+
+    Entries are keyed on (path, mtime_ns, size), so any rewrite or append
+    invalidates the cached frame, plus a variant (e.g. the projected
+    columns). When the estimated footprint exceeds max_bytes the least
+    recently used logs are evicted.
+    """
+
+    def __init__(self, max_bytes=int(DEFAULT_CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, loader, variant=None, replaces=None):
+        """
+        Cached loader(path). Storing the result drops the `replaces` variant of
+        the same file, so two forms of one log (e.g. raw and compact) are not
+        held side by side.
+        """
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        df = loader(path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            # Drop stale versions of the same file before inserting the new one
+            for stale in [k for k in self._entries if k[0] == key[0]
+                          and (k[1:3] != key[1:3] or (replaces is not None and k[3] == replaces))]:
+                self._remove(stale)
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (df, nbytes)
+                self.current_bytes += nbytes
+                self._evict()
+        return df
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                keys = list(self._entries)
+            else:
+                target = os.path.abspath(path)
+                keys = [k for k in self._entries if k[0] == target]
+            for key in keys:
+                self._remove(key)
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+
+_cache = TradeLogCache()
+
+
+def load_trade_log(path, columns=None, copy=True, compact=False):
+    """
+    Return the trade log at path as a DataFrame, parsing it only if the file
+    changed since the last call. Returns an empty DataFrame if it does not exist.
+
+    path is the logical log name (DATA_PATH); it is resolved to the CSV or
+    Parquet file on disk. columns restricts the read to a subset, e.g.
+    SUMMARY_COLUMNS. A copy is returned by default because callers add
+    columns in place (cumulative_pnl, drawdown); pass copy=False for
+    read-only use. compact=True returns (and caches) the log in the compact
+    schema of utils.trade_schema, for readers such as get_trade_log and the
+    dashboards; writers keep the parsed dtypes. Only one form of a projection
+    is cached at a time: loading the other form replaces it.
+    """
+    projection = tuple(columns) if columns is not None else None
+    if TRADE_STORE == "sqlite":
+        df = get_store().query(strategy_name(path), columns=columns)
+        return compact_and_record(df, (path, projection)) if compact else df
+
+    journal_path = journal_path_for(path)
+    path = resolve_path(path)
+    variant, other = (projection, compact), (projection, not compact)
+
+    def reader(backend):
+        if compact:
+            return lambda p: compact_and_record(backend.read(p, columns=columns), (p, projection))
+        return lambda p: backend.read(p, columns=columns)
+
+    frames = []
+    if os.path.exists(path):
+        frames.append(_cache.get(path, reader(backend_for(path)), variant, replaces=other))
+    if journal_path != path and os.path.exists(journal_path) and os.path.getsize(journal_path) > 0:
+        # Trades appended since the last compaction of a columnar log
+        frames.append(_cache.get(journal_path, reader(BACKENDS["csv"]), variant, replaces=other))
+
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) > 1:
+        combined = pd.concat(frames, ignore_index=True)
+        # Categories of the two parts differ, so concat falls back to object columns
+        return compact_schema(combined) if compact else combined
+    return frames[0].copy() if copy else frames[0]
+
+
+def save_trade_log(df, path):
+    """Write the full trade log in the configured format (TRADE_LOG_FORMAT)."""
+    if TRADE_STORE == "sqlite":
+        get_store().insert(strategy_name(path), df, key_columns=list(df.columns))
+        return
+    path = with_format(path, STORAGE_FORMAT)
+    backend_for(path).write(df, path)
+    _cache.invalidate(path)
+
+
+def query_trade_log(path, start=None, end=None, symbols=None, columns=None, compact=False):
+    """
+    Trades of one log filtered by timestamp range and symbols. SQLite answers
+    from its indexes and Parquet prunes whole day row groups; CSV logs are
+    filtered from the cached frame.
+    """
+    projection = tuple(columns) if columns is not None else None
+    if TRADE_STORE == "sqlite":
+        df = get_store().query(strategy_name(path), start, end, symbols, columns)
+        return compact_and_record(df, (path, projection)) if compact else df
+
+    if columns is not None and symbols and "symbol" not in columns:
+        columns = list(columns) + ["symbol"]
+    resolved = resolve_path(path)
+    if resolved.endswith(".parquet") and not os.path.exists(journal_path_for(path)):
+        df = backend_for(resolved).read(resolved, columns=columns, start=start, end=end)
+        if compact:
+            df = compact_and_record(df, (resolved, projection))
+    else:
+        df = load_trade_log(path, columns=columns, copy=False, compact=compact)
+
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if start is not None and "timestamp" in df.columns:
+        mask &= df["timestamp"] >= pd.Timestamp(start)
+    if end is not None and "timestamp" in df.columns:
+        mask &= df["timestamp"] <= pd.Timestamp(end)
+    if symbols and "symbol" in df.columns:
+        mask &= df["symbol"].isin(symbols)
+    return df[mask].reset_index(drop=True)
+
+
+def latest_trade_time(path):
+    if TRADE_STORE == "sqlite":
+        return get_store().last_trade_time(strategy_name(path))
+    df = load_trade_log(path, columns=["timestamp"], copy=False)
+    return df["timestamp"].max() if not df.empty else None
+
+
+def trades_on_day(path, day, columns=None):
+    if TRADE_STORE == "sqlite":
+        return get_store().trades_on_day(strategy_name(path), day, columns)
+    start = pd.Timestamp(day).normalize()
+    return query_trade_log(path, start, start + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1), columns=columns)
+
+
+def trade_log_symbols(path):
+    if TRADE_STORE == "sqlite":
+        return get_store().symbols(strategy_name(path))
+    df = load_trade_log(path, columns=["symbol"], copy=False)
+    return sorted(df["symbol"].dropna().unique()) if "symbol" in df.columns else []
+
+
+def list_trade_logs(data_dir="data"):
+    """Logical *_trades.csv paths of every stored strategy, whatever the backend."""
+    if TRADE_STORE == "sqlite":
+        names = get_store().strategies()
+    else:
+        names = {
+            strategy_name(f)
+            for f in os.listdir(data_dir)
+            if f.endswith(("_trades.csv", "_trades.parquet"))
+        }
+    return [os.path.join(data_dir, f"{name}_trades.csv") for name in sorted(names)]
+
+
+def invalidate(path=None):
+    _cache.invalidate(path)
+
+
+def set_cache_budget(max_mb):
+    _cache.resize(int(max_mb * 1024 * 1024))
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,69 @@
+# utils/trade_table.py
+#
+# Server-side filtering, sorting and paging of a trade log so the dashboards
+# only ship the visible page of rows to the browser.
+
+import numpy as np
+
+
+def _sort_keys(values, ascending):
+    # Float keys with NaN/NaT last, negated for descending order
+    if values.dtype.kind == "M":
+        keys = values.astype("datetime64[ns]").view("i8").astype("float64")
+        keys[np.isnat(values)] = np.nan
+    else:
+        keys = values.astype("float64")
+    return keys if ascending else -keys
+
+
+def _top_positions(df, sort_by, ascending, k):
+    """
+    Positions of the first k rows in sort order, without sorting the whole
+    frame. Ties keep their row order in both directions, so every page is a
+    slice of one deterministic order.
+    """
+    values = df[sort_by].to_numpy()
+    if values.dtype.kind not in "iufM":
+        # Rank strings once; the ranks sort like numbers
+        _, ranks = np.unique(df[sort_by].astype(str).to_numpy(), return_inverse=True)
+        values = ranks.astype("float64")
+
+    keys = _sort_keys(values, ascending)
+    if k < len(keys) // 2:
+        # Every row up to the k-th key (ties included), then an exact sort of those
+        kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+        candidates = np.flatnonzero(keys <= kth) if not np.isnan(kth) else np.arange(len(keys))
+        return candidates[np.lexsort((candidates, keys[candidates]))][:k]
+    return np.lexsort((np.arange(len(keys)), keys))[:k]
+
+
+def filter_trades(df, actions=None):
+    if actions and "action" in df.columns:
+        return df[df["action"].isin(actions)]
+    return df
+
+
+def page_frame(df, page=1, page_size=50, sort_by=None, ascending=True, actions=None):
+    """
+    Return (rows of the requested page, total matching rows).
+
+    Filtering and sorting happen on the server-side frame; only the page
+    slice is copied out, and sorting uses a partial sort when the page is
+    near the top of the order.
+    """
+    df = filter_trades(df, actions)
+    total = len(df)
+    offset = max(page - 1, 0) * page_size
+    if offset >= total:
+        return df.iloc[0:0], total
+
+    k = min(offset + page_size, total)
+    if sort_by is not None and sort_by in df.columns:
+        positions = _top_positions(df, sort_by, ascending, k)[offset:k]
+    else:
+        positions = np.arange(offset, k)
+    return df.iloc[positions].reset_index(drop=True), total
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
@@ -3,7 +3,16 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.performance_metrics import calculate_metrics
+from utils.metrics_state import refresh_metrics
+from utils.performance_metrics import default_metrics
+from utils.metric_registry import summary_row
+from utils.rollups import log_fingerprint, range_metrics
+from utils.bootstrap import BOOTSTRAP_RESAMPLES, ci_columns, confidence_intervals
+from utils.metrics_cache import get_metrics_cache, metrics_cache_stats
+from utils.trade_schema import schema_stats
+from utils.trade_store import SUMMARY_COLUMNS, cache_stats, list_trade_logs, load_trade_log, query_trade_log, trade_log_symbols
+from utils.detail_view import chart_points_slider, render_portfolio, render_strategy_detail, select_detail_views
+from utils.param_sweep import RANK_COLUMNS, list_sweeps, rank
 
 # Set Streamlit config
 st.set_page_config(page_title="Alpha Quant Viewer", layout="wide")
@@ -13,8 +22,8 @@ st.sidebar.header("🧠 Strategy Summary Viewer")
 # Configuration
 DATA_FOLDER = "data"
 
-# List available trade logs
-available_files = [f for f in os.listdir(DATA_FOLDER) if f.endswith("_trades.csv")]
+# List available trade logs by their logical *_trades.csv name (CSV, Parquet or SQLite)
+available_files = [os.path.basename(path) for path in list_trade_logs(DATA_FOLDER)]
 
 if not available_files:
     st.warning("No trade log files found in /data. Upload trade data to view performance.")
@@ -23,47 +32,95 @@ if not available_files:
 # Select strategies to view
 selected_files = st.sidebar.multiselect("Select Strategy Logs to View:", available_files, default=available_files)
 
+# Date range applied to the summary (answered from the daily/monthly rollups)
+# and to the detailed views (queried, not loaded in full)
+date_range = st.sidebar.date_input("Date range", value=[])
+start, end = None, None
+if len(date_range) == 2:
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+max_points = chart_points_slider()
+show_ci = st.sidebar.toggle("Bootstrap confidence intervals", value=False)
+
 summary_data = {}
+intervals = {}
+metrics_cache = get_metrics_cache()
+
+
+def summarize(filepath):
+    # Only the rows appended since the last rerun are parsed
+    metrics = refresh_metrics(filepath)
+    if metrics is not None and start is not None:
+        metrics = range_metrics(filepath, start, end) or default_metrics()
+    return metrics
+
 
 for filename in selected_files:
     strategy_name = filename.replace("_trades.csv", "")
     filepath = os.path.join(DATA_FOLDER, filename)
-    df = pd.read_csv(filepath, parse_dates=["timestamp"])
 
-    if df.empty or "pnl" not in df.columns:
+    # Cached by the log's file fingerprint (stat only), so reruns and restarts skip unchanged logs
+    metrics = metrics_cache.get_or_compute_for(log_fingerprint(filepath), f"summary:{filepath}:{start}:{end}",
+                                               lambda: summarize(filepath))
+    if metrics is None:
         continue
 
-    metrics = calculate_metrics(df)
     summary_data[strategy_name] = metrics
+    if show_ci:
+        trades = query_trade_log(filepath, start=start, end=end, columns=["timestamp", "pnl"], compact=True)
+        intervals[strategy_name] = metrics_cache.get_or_compute(
+            trades, f"ci:{BOOTSTRAP_RESAMPLES}", lambda: ci_columns(confidence_intervals(trades["pnl"])))
 
 # Show performance table
 if summary_data:
     st.subheader("📋 Performance Summary")
-    df_summary = pd.DataFrame.from_dict(summary_data, orient="index")
+    df_summary = pd.DataFrame.from_dict({name: summary_row(m) for name, m in summary_data.items()}, orient="index")
+    if intervals:
+        df_summary = df_summary.join(pd.DataFrame.from_dict(intervals, orient="index"))
     df_summary.index.name = "Strategy"
     st.dataframe(df_summary.reset_index(), use_container_width=True)
 
-    # Show expanders
-    for filename in selected_files:
-        strategy_name = filename.replace("_trades.csv", "")
-        filepath = os.path.join(DATA_FOLDER, filename)
-        df = pd.read_csv(filepath, parse_dates=["timestamp"])
-
-        with st.expander(f"📂 Detailed View: {strategy_name}"):
-            st.write("### Trade Log")
-            st.dataframe(df, use_container_width=True)
-
-            if "pnl" in df.columns and not df.empty:
-                st.write("### Equity Curve")
-                df['cumulative_pnl'] = df['pnl'].cumsum()
-                st.line_chart(df.set_index("timestamp")["cumulative_pnl"])
-
-                st.write("### Drawdown Curve")
-                df['drawdown'] = df['cumulative_pnl'].cummax() - df['cumulative_pnl']
-                st.area_chart(df.set_index("timestamp")["drawdown"])
-
-                st.write("### Metrics")
-                metrics = calculate_metrics(df)
-                st.json(metrics)
+    # Combined view across the selected logs, computed only when opened
+    if st.toggle("📈 Portfolio view", value=False):
+        with st.expander("📈 Portfolio", expanded=True):
+            frames = {
+                name: load_trade_log(os.path.join(DATA_FOLDER, f"{name}_trades.csv"), columns=SUMMARY_COLUMNS, copy=False,
+                                     compact=True)
+                for name in summary_data
+            }
+            render_portfolio(frames, max_points)
+
+    # Detailed views, rendered only for the strategies the user opens
+    for strategy_name in select_detail_views(summary_data):
+        filepath = os.path.join(DATA_FOLDER, f"{strategy_name}_trades.csv")
+        metrics = summary_data[strategy_name]
+
+        with st.expander(f"📂 Detailed View: {strategy_name}", expanded=True):
+            symbol_options = trade_log_symbols(filepath)
+            symbols = st.multiselect("Symbols", symbol_options, key=f"symbols_{strategy_name}") if symbol_options else None
+            if symbols:
+                metrics = None  # Summary metrics cover every symbol
+            df = query_trade_log(filepath, start=start, end=end, symbols=symbols, compact=True)
+            render_strategy_detail(strategy_name, df, metrics, max_points)
 else:
     st.info("No trade data available to analyze.")
+
+# Parameter sweep results (python -m utils.param_sweep), ranked by the summary metrics
+sweeps = list_sweeps(os.path.join(DATA_FOLDER, "sweeps"))
+if sweeps:
+    with st.expander("🔬 Parameter Sweeps"):
+        sweep_name = st.selectbox("Sweep", list(sweeps))
+        rank_by = st.selectbox("Rank by", RANK_COLUMNS)
+        results = rank(pd.read_csv(sweeps[sweep_name]), rank_by)
+        st.caption("min_move_pct 0 matches live trading; larger values require that move before "
+                   "every trade, while live only checks it for a repeated action.")
+        st.dataframe(results.head(50), use_container_width=True)
+
+stats = cache_stats()
+st.sidebar.caption(f"Trade-log cache: {stats['hits']} hits / {stats['misses']} misses, {stats['bytes'] / 1e6:.1f} MB")
+stats = metrics_cache_stats()
+st.sidebar.caption(f"Metrics cache: {stats['hit_rate']:.0%} hit rate ({stats['hits']} hits / {stats['misses']} misses)")
+schema = schema_stats()
+if schema["logs"]:
+    st.sidebar.caption(f"Trade logs in memory: {schema['before'] / 1e6:.1f} MB -> {schema['after'] / 1e6:.1f} MB (compact schema)")